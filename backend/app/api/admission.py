@@ -0,0 +1,259 @@
+# Per-user admission control and load shedding
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import Depends, HTTPException, status
+from app.api.auth import get_current_user
+from app.core.config import settings
+from app.models.user import User as UserModel
+
+# Lower values are served first when requests queue for a worker slot
+INTERACTIVE = 0
+BACKGROUND = 1
+
+
+@dataclass(frozen=True)
+class AdmissionPolicy:
+    cost: float  # tokens taken from the user's bucket
+    priority: int = INTERACTIVE
+    gated: bool = True  # whether the request occupies a concurrency slot
+
+
+ADMISSION_POLICIES = {
+    "search": AdmissionPolicy(cost=1.0),
+    "chat": AdmissionPolicy(cost=2.0),
+    "precedent": AdmissionPolicy(cost=1.0),
+    "citations": AdmissionPolicy(cost=0.2),
+    "autocomplete": AdmissionPolicy(cost=0.05, gated=False),  # one call per keystroke
+    "reference": AdmissionPolicy(cost=0.1, gated=False),  # served from memory
+    "analysis": AdmissionPolicy(cost=5.0, priority=BACKGROUND),
+    "batch_analysis": AdmissionPolicy(cost=20.0, priority=BACKGROUND),
+}
+
+
+class InMemoryTokenBuckets:
+    """Token buckets held in this process"""
+
+    def __init__(self, capacity: float, refill_rate: float):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self._buckets: Dict[str, List[float]] = {}
+
+    async def take(self, key: str, cost: float) -> Tuple[bool, float]:
+        """Take tokens from a bucket, returning (allowed, seconds until enough tokens)"""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= settings.admission_max_tracked_users:
+                self._prune(now)
+            bucket = self._buckets[key] = [self.capacity, now]
+
+        tokens = min(self.capacity, bucket[0] + (now - bucket[1]) * self.refill_rate)
+        bucket[1] = now
+        if tokens >= cost:
+            bucket[0] = tokens - cost
+            return True, 0.0
+        bucket[0] = tokens
+        return False, (cost - tokens) / self.refill_rate
+
+    def _prune(self, now: float):
+        # Buckets that have refilled completely carry no state worth keeping
+        full_after = self.capacity / self.refill_rate
+        for key in [key for key, (_, updated) in self._buckets.items() if now - updated >= full_after]:
+            del self._buckets[key]
+
+
+# Atomic refill-and-take so several workers can share buckets
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+
+class RedisTokenBuckets:
+    """Token buckets shared through Redis, falling back to this process if Redis fails"""
+
+    def __init__(self, capacity: float, refill_rate: float, redis_url: str):
+        import redis.asyncio as redis
+
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self._client = redis.from_url(redis_url)
+        self._script = self._client.register_script(TOKEN_BUCKET_SCRIPT)
+        self._fallback = InMemoryTokenBuckets(capacity, refill_rate)
+
+    async def take(self, key: str, cost: float) -> Tuple[bool, float]:
+        try:
+            allowed, retry_after = await self._script(
+                keys=[f"admission:{key}"],
+                args=[self.capacity, self.refill_rate, time.time(), cost]
+            )
+            return bool(int(allowed)), float(retry_after)
+        except Exception as e:
+            print(f"Error using Redis token buckets: {e}")
+            return await self._fallback.take(key, cost)
+
+
+class Overloaded(Exception):
+    """Raised when a request cannot get a worker slot in time"""
+
+
+class PriorityGate:
+    """Concurrency limit with a bounded priority queue of waiting requests"""
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    async def acquire(self, priority: int):
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise Overloaded()
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._sequence), future)
+        heapq.heappush(self._waiters, entry)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as the wait ended
+                self.release()
+            else:
+                future.cancel()
+                self._remove(entry)
+            if isinstance(e, asyncio.TimeoutError):
+                raise Overloaded()
+            raise
+
+    def _remove(self, entry):
+        try:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+        except ValueError:
+            pass
+
+    def release(self):
+        # Hand the slot straight to the most urgent waiter
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+
+class AdmissionController:
+    """Per-user token buckets in front of a priority-ordered concurrency gate.
+
+    With the redis backend every worker process shares one bucket per user.
+    The memory backend keeps buckets per process, so each of the
+    `admission_processes` workers gets an equal share of the capacity and
+    refill rate, and a user's total across workers stays at the configured
+    limit. A share never drops below the most expensive request, so a user
+    whose requests land unevenly may get somewhat more than the limit.
+    """
+
+    def __init__(self):
+        capacity = settings.admission_bucket_capacity
+        refill_rate = settings.admission_refill_rate
+        if settings.admission_backend == "redis":
+            self.buckets = RedisTokenBuckets(capacity, refill_rate, settings.redis_url)
+        else:
+            processes = max(1, settings.admission_processes)
+            largest_cost = max(policy.cost for policy in ADMISSION_POLICIES.values())
+            self.buckets = InMemoryTokenBuckets(
+                max(capacity / processes, min(capacity, largest_cost)),
+                refill_rate / processes
+            )
+        self.gate = PriorityGate(
+            settings.admission_max_concurrency,
+            settings.admission_max_queue,
+            settings.admission_queue_timeout
+        )
+        self.admitted = 0
+        self.rate_limited = 0
+        self.shed = 0
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "backend": settings.admission_backend,
+            "bucket_capacity": self.buckets.capacity,
+            "refill_rate": self.buckets.refill_rate,
+            "active": self.gate.active,
+            "queued": len(self.gate._waiters),
+            "admitted": self.admitted,
+            "rate_limited": self.rate_limited,
+            "shed": self.shed,
+        }
+
+
+admission = AdmissionController()
+
+
+def admit(endpoint: str):
+    """Dependency that admits a request for an endpoint or rejects it with 429/503"""
+    policy = ADMISSION_POLICIES[endpoint]
+
+    async def dependency(current_user: UserModel = Depends(get_current_user)):
+        if not settings.admission_enabled:
+            yield
+            return
+
+        allowed, retry_after = await admission.buckets.take(str(current_user.id), policy.cost)
+        if not allowed:
+            admission.rate_limited += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+
+        if not policy.gated:
+            admission.admitted += 1
+            yield
+            return
+
+        try:
+            await admission.gate.acquire(policy.priority)
+        except Overloaded:
+            admission.shed += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry shortly",
+                headers={"Retry-After": str(settings.admission_retry_after)},
+            )
+        admission.admitted += 1
+        try:
+            yield
+        finally:
+            admission.gate.release()
+
+    return dependency
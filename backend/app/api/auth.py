@@ -8,6 +8,7 @@ from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from app.core.config import settings
+from app.core.tracing import span
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -77,18 +78,19 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        email: str = payload.get("sub")
-        if email is None:
+    with span("auth"):
+        try:
+            payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+            email: str = payload.get("sub")
+            if email is None:
+                raise credentials_exception
+        except JWTError:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    user = db.query(UserModel).filter(UserModel.email == email).first()
-    if user is None:
-        raise credentials_exception
-    return user
+        
+        user = db.query(UserModel).filter(UserModel.email == email).first()
+        if user is None:
+            raise credentials_exception
+        return user
 
 @router.get("/me", response_model=User)
 def read_users_me(current_user: UserModel = Depends(get_current_user)):
@@ -1,13 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.core.database import get_db
+from app.core.http_cache import (
+    cached_response,
+    encoded_response,
+    AUTOCOMPLETE_CACHE_CONTROL,
+    NO_STORE_CACHE_CONTROL,
+    PRECEDENT_CACHE_CONTROL,
+    COURTS_CACHE_CONTROL,
+    RECENT_CASES_CACHE_CONTROL
+)
+from app.core.serialization import FastJSONResponse, dumps, parse_field_set, project
 from app.models.user import User as UserModel
 from app.api.auth import get_current_user
+from app.api.admission import admit
 from app.schemas.legal import (
     PrecedentSearchRequest, 
     PrecedentSearchResponse, 
+    PrecedentSearchResults,
     PrecedentDetail,
+    PrecedentTextRange,
+    CitationLinks,
+    AutocompleteResponse,
     ChatMessage,
     ChatResponse,
     DocumentAnalysisRequest,
@@ -15,47 +31,160 @@ from app.schemas.legal import (
 )
 from app.services.legal_service import LegalService
 from app.services.ai_service import AIService
+from app.services.prefetcher import prefetcher
+from app.services.text_store import text_store, paragraph_offsets
+from app.services.citation_graph import citation_graph
+from app.services.autocomplete import autocomplete_index
+from app.services.batch_analysis import BatchInputError, batch_analyzer, expand_uploads, read_uploads
+from app.core.config import settings
+import asyncio
 import json
 
-router = APIRouter(prefix="/api/legal", tags=["legal"])
+router = APIRouter(prefix="/api/legal", tags=["legal"], default_response_class=FastJSONResponse)
+
+FIELDS_DESCRIPTION = "Comma separated list of fields to return"
+EXCLUDE_DESCRIPTION = "Comma separated list of fields to omit"
 
-@router.post("/search-precedents", response_model=List[PrecedentSearchResponse])
+@router.post("/search-precedents", response_model=PrecedentSearchResults, dependencies=[Depends(admit("search"))])
 async def search_precedents(
     request: PrecedentSearchRequest,
+    http_request: Request,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    exclude: Optional[str] = Query(None, description=EXCLUDE_DESCRIPTION),
     current_user: UserModel = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Search for legal precedents based on case description"""
+    include_fields = parse_field_set(fields, PrecedentSearchResponse, "fields")
+    exclude_fields = parse_field_set(exclude, PrecedentSearchResponse, "exclude")
     try:
         legal_service = LegalService()
-        precedents = await legal_service.search_precedents(
+        search = await legal_service.search_precedents(
             query=request.query,
             court=request.court,
             year_from=request.year_from,
             year_to=request.year_to,
             limit=request.limit or 10
         )
-        return precedents
+        body = dumps({
+            "results": [project(p, include_fields, exclude_fields) for p in search.results],
+            "total": search.total,
+            "facets": search.facets.model_dump()
+        })
+        return encoded_response(http_request, body)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error searching precedents: {str(e)}")
 
-@router.get("/precedent/{precedent_id}", response_model=PrecedentDetail)
+@router.get("/precedent/{precedent_id}", response_model=PrecedentDetail, dependencies=[Depends(admit("precedent"))])
 async def get_precedent_detail(
     precedent_id: str,
+    http_request: Request,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    exclude: Optional[str] = Query(None, description=EXCLUDE_DESCRIPTION),
     current_user: UserModel = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get detailed information about a specific precedent"""
+    include_fields = parse_field_set(fields, PrecedentDetail, "fields")
+    exclude_fields = parse_field_set(exclude, PrecedentDetail, "exclude")
     try:
         legal_service = LegalService()
         precedent = await legal_service.get_precedent_detail(precedent_id)
         if not precedent:
             raise HTTPException(status_code=404, detail="Precedent not found")
-        return precedent
+        body = dumps(project(precedent, include_fields, exclude_fields))
+        if legal_service.fallback_used:
+            return encoded_response(http_request, body, headers={"Cache-Control": NO_STORE_CACHE_CONTROL})
+        return cached_response(http_request, body, PRECEDENT_CACHE_CONTROL)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching precedent: {str(e)}")
 
-@router.post("/chat", response_model=ChatResponse)
+@router.get("/precedent/{precedent_id}/text", response_model=PrecedentTextRange, dependencies=[Depends(admit("precedent"))])
+async def get_precedent_text(
+    precedent_id: str,
+    http_request: Request,
+    start: int = Query(0, alias="from", ge=0, description="First paragraph (inclusive)"),
+    end: Optional[int] = Query(None, alias="to", ge=0, description="Last paragraph (exclusive)"),
+    current_user: UserModel = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get a range of paragraphs from a precedent's full text"""
+    if end is None or end - start > settings.judgment_text_max_paragraphs:
+        end = start + settings.judgment_text_max_paragraphs
+    try:
+        precedent = None
+        stored = text_store.read_range(precedent_id, start, end)
+        if stored is None:
+            # Fetching the detail stores the judgment text on success
+            legal_service = LegalService()
+            precedent = await legal_service.get_precedent_detail(precedent_id)
+            if not precedent:
+                raise HTTPException(status_code=404, detail="Precedent not found")
+            stored = text_store.read_range(precedent_id, start, end)
+
+        if stored is not None:
+            paragraphs, total = stored
+        else:
+            # Upstream unavailable; slice the fallback text in memory without storing it
+            data = precedent.full_text.encode("utf-8")
+            offsets = paragraph_offsets(data)
+            total = len(offsets)
+            paragraphs = [data[a:b].decode("utf-8") for a, b in offsets[start:end]]
+
+        text_range = PrecedentTextRange(
+            id=precedent_id,
+            start=start,
+            end=min(end, total),
+            total_paragraphs=total,
+            paragraphs=paragraphs
+        )
+        body = dumps(project(text_range))
+        if stored is None:
+            return encoded_response(http_request, body, headers={"Cache-Control": NO_STORE_CACHE_CONTROL})
+        return cached_response(http_request, body, PRECEDENT_CACHE_CONTROL)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching precedent text: {str(e)}")
+
+@router.get("/precedent/{precedent_id}/cited-by", response_model=CitationLinks, dependencies=[Depends(admit("citations"))])
+async def get_precedent_cited_by(
+    precedent_id: str,
+    limit: int = Query(20, ge=1, le=500),
+    current_user: UserModel = Depends(get_current_user)
+):
+    """Get judgments in the local corpus that cite a precedent"""
+    links = citation_graph.cited_by(precedent_id, limit=limit)
+    if links is None:
+        raise HTTPException(status_code=404, detail="Precedent not in citation graph")
+    return links
+
+@router.get("/precedent/{precedent_id}/cites", response_model=CitationLinks, dependencies=[Depends(admit("citations"))])
+async def get_precedent_cites(
+    precedent_id: str,
+    limit: int = Query(20, ge=1, le=500),
+    current_user: UserModel = Depends(get_current_user)
+):
+    """Get judgments in the local corpus cited by a precedent"""
+    links = citation_graph.cites(precedent_id, limit=limit)
+    if links is None:
+        raise HTTPException(status_code=404, detail="Precedent not in citation graph")
+    return links
+
+@router.get("/autocomplete", response_model=AutocompleteResponse, dependencies=[Depends(admit("autocomplete"))])
+async def autocomplete(
+    http_request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(8, ge=1, le=settings.autocomplete_max_limit),
+    current_user: UserModel = Depends(get_current_user)
+):
+    """Suggest case titles, party names and citations starting with the typed text"""
+    body = dumps({"query": q, "results": autocomplete_index.complete(q, limit)})
+    return encoded_response(http_request, body, headers={"Cache-Control": AUTOCOMPLETE_CACHE_CONTROL})
+
+@router.post("/chat", response_model=ChatResponse, dependencies=[Depends(admit("chat"))])
 async def chat_with_ai(
     message: ChatMessage,
     current_user: UserModel = Depends(get_current_user),
@@ -76,7 +205,7 @@ async def chat_with_ai(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error in AI chat: {str(e)}")
 
-@router.post("/analyze-document", response_model=DocumentAnalysisResponse)
+@router.post("/analyze-document", response_model=DocumentAnalysisResponse, dependencies=[Depends(admit("analysis"))])
 async def analyze_document(
     file: UploadFile = File(...),
     analysis_type: str = Form("summary"),  # summary, key_points, legal_issues
@@ -98,27 +227,71 @@ async def analyze_document(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing document: {str(e)}")
 
-@router.get("/courts")
+@router.post("/analyze-batch", dependencies=[Depends(admit("batch_analysis"))])
+async def analyze_batch(
+    files: List[UploadFile] = File(...),
+    analysis_type: str = Form("summary"),
+    current_user: UserModel = Depends(get_current_user)
+):
+    """Analyze a case bundle of documents and zip archives.
+
+    Streams newline-delimited JSON: a start event, one document or error event
+    per file as it completes, then the merged bundle with citations
+    de-duplicated across documents.
+    """
+    try:
+        uploads = await read_uploads(files)
+        # Inflating zip members is CPU-bound; keep it off the event loop
+        documents = await asyncio.to_thread(expand_uploads, uploads)
+    except BatchInputError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        batch_analyzer.stream(documents, analysis_type),
+        media_type="application/x-ndjson"
+    )
+
+@router.get("/courts", dependencies=[Depends(admit("reference"))])
 async def get_available_courts(
+    http_request: Request,
     current_user: UserModel = Depends(get_current_user)
 ):
     """Get list of available courts"""
     try:
+        snapshot = prefetcher.snapshot
+        if snapshot is not None:
+            return cached_response(
+                http_request,
+                snapshot.courts_payload,
+                COURTS_CACHE_CONTROL,
+                etag=snapshot.courts_etag
+            )
         legal_service = LegalService()
         courts = await legal_service.get_available_courts()
-        return {"courts": courts}
+        body = dumps({"courts": [court.model_dump() for court in courts]})
+        return cached_response(http_request, body, COURTS_CACHE_CONTROL)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching courts: {str(e)}")
 
-@router.get("/recent-cases")
+@router.get("/recent-cases", dependencies=[Depends(admit("reference"))])
 async def get_recent_cases(
+    http_request: Request,
     limit: int = 10,
     current_user: UserModel = Depends(get_current_user)
 ):
     """Get recent legal cases"""
     try:
+        snapshot = prefetcher.snapshot
+        # The snapshot holds the first prefetch_limit cases; larger pages go upstream
+        if snapshot is not None and limit <= prefetcher.prefetch_limit:
+            return cached_response(
+                http_request,
+                snapshot.recent_cases_payload(limit),
+                RECENT_CASES_CACHE_CONTROL,
+                etag=snapshot.recent_cases_etag(limit)
+            )
         legal_service = LegalService()
         cases = await legal_service.get_recent_cases(limit=limit)
-        return {"cases": cases}
+        body = dumps({"cases": [case.model_dump() for case in cases]})
+        return cached_response(http_request, body, RECENT_CASES_CACHE_CONTROL)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching recent cases: {str(e)}")
@@ -10,6 +10,18 @@ class Settings(BaseSettings):
     
     # Database settings
     database_url: str = "sqlite:///./data/nyay_sarthi.db"
+    sqlite_busy_timeout_ms: int = 5000
+    
+    # Production server settings
+    server_host: str = "0.0.0.0"
+    server_port: int = 8000
+    server_workers: int = 0  # 0 = one worker per CPU core
+    server_request_timeout: float = 60.0  # seconds before a request gets 504
+    server_worker_timeout: int = 120  # seconds before a silent worker is restarted
+    server_graceful_timeout: int = 30
+    server_keepalive: int = 5
+    server_max_requests: int = 10000  # recycle workers after this many requests
+    server_max_requests_jitter: int = 1000
     
     # Security settings
     secret_key: str = "your-secret-key-here"
@@ -18,20 +30,123 @@ class Settings(BaseSettings):
     
     # Vector database settings
     chroma_persist_directory: str = "./vector_db"
+    chroma_host: str = ""  # Chroma server shared by all workers; empty = embedded, one process only
+    chroma_port: int = 8000
+    chroma_auth_credentials: str = ""  # user:password for a server using basic auth
+
+    # Answer cache for reworded chat questions, kept in Chroma
+    answer_cache_enabled: bool = True
+    answer_cache_similarity: float = 0.9  # cosine similarity needed to reuse an answer
+    answer_cache_ttl: int = 7 * 24 * 3600  # seconds
+    answer_cache_max_entries: int = 10000
+    answer_cache_dimensions: int = 1024
     
     # File upload settings
     upload_dir: str = "./uploads"
     max_file_size: int = 10 * 1024 * 1024  # 10MB
+
+    # Batch document analysis
+    batch_analysis_max_files: int = 100  # after unpacking zip archives
+    batch_analysis_max_bytes: int = 200 * 1024 * 1024
+    batch_analysis_max_concurrency: int = 4  # documents in flight per server process
+    batch_analysis_extract_workers: int = 2  # text extraction processes, 0 = one per CPU core
+    batch_analysis_timeout: float = 600.0  # seconds, replaces server_request_timeout
+    
+    # Judgment text store settings
+    judgment_text_dir: str = "./data/judgments"
+    judgment_text_max_open: int = 256  # documents kept memory-mapped
+    judgment_text_max_paragraphs: int = 200  # per range request
+    
+    # Local corpus store settings
+    corpus_dir: str = "./data/corpus"
+    corpus_compression: str = "zstd"  # zstd (falls back to zlib if not installed) or zlib
+    corpus_compression_level: int = 3
+    corpus_segment_max_bytes: int = 256 * 1024 * 1024
+    corpus_index_initial_capacity: int = 1 << 16  # slots, must be a power of two
+    corpus_compact_min_dead_bytes: int = 64 * 1024 * 1024
+    
+    # Citation graph settings
+    citation_graph_dir: str = "./data/citation_graph"
+    citation_graph_rebuild_threshold: int = 10000  # delta edges before merging into CSR
+    citation_graph_damping: float = 0.85
+    citation_graph_max_iterations: int = 100
+    citation_graph_refresh_interval: int = 60  # seconds between checks for a graph saved elsewhere
+    citation_authority_weight: float = 0.2  # share of authority in search ranking
+    
+    # Local search and facet index settings
+    metadata_index_dir: str = "./data/metadata_index"
+    metadata_index_refresh_interval: int = 60  # seconds between checks for an index saved elsewhere
+    metadata_index_text_chars: int = 2000  # leading judgment text indexed for search
+    
+    # Autocomplete settings
+    autocomplete_snapshot_path: str = "./data/autocomplete/index.npz"
+    autocomplete_max_limit: int = 20
+    autocomplete_scan_limit: int = 4096  # broader prefixes use precomputed results
+    autocomplete_delta_max: int = 10000  # keys added before merging into a new snapshot
+    autocomplete_refresh_interval: int = 60  # seconds between checks for a newer snapshot
+    autocomplete_cache_max_age: int = 300
+    
+    # Bulk ingestion settings
+    ingest_batch_size: int = 200
+    ingest_report_interval: float = 5.0  # seconds
+    ingest_checkpoint_interval: float = 60.0  # seconds between index saves and checkpoints
     
     # Logging settings
     log_dir: str = "./logs"
     log_level: str = "INFO"
+
+    # Request tracing and profiling
+    server_timing_enabled: bool = True  # per-span breakdown in the Server-Timing header
+    profiling_enabled: bool = False
+    profiling_threshold_ms: float = 2000.0  # requests slower than this leave a profile
+    profiling_interval_ms: float = 5.0  # stack sampling period
     
     # External API settings
     openai_api_key: Optional[str] = None
     indian_kanoon_api_key: Optional[str] = None
     huggingface_api_key: Optional[str] = None
     
+    # Inference backend settings
+    # local_first answers summaries and entity extraction locally, so the remote
+    # model is only called for them when the local backend returns nothing;
+    # use "remote" to have every task served by the API
+    inference_backend: str = "local_first"  # remote, local or local_first
+    local_summary_sentences: int = 5
+    local_summary_max_candidates: int = 1500  # sentences ranked per document
+    local_summary_max_terms: int = 2000  # shared terms kept when comparing sentences
+    
+    # Inference micro-batching settings
+    inference_max_batch_size: int = 8
+    inference_max_wait_ms: float = 20.0  # longest a request waits for its batch to fill
+    inference_max_concurrent_batches: int = 4  # in-flight calls per process
+    inference_timeout: float = 30.0
+    
+    # Background prefetch settings
+    recent_cases_refresh_interval: int = 300  # seconds
+    recent_cases_prefetch_limit: int = 50
+    
+    # HTTP caching settings (seconds)
+    precedent_cache_max_age: int = 3600
+    courts_cache_max_age: int = 86400
+    recent_cases_cache_max_age: int = 60
+    
+    # Response compression settings
+    compression_min_size: int = 1024  # bytes
+    gzip_level: int = 6
+    brotli_quality: int = 5
+    
+    # Admission control settings
+    admission_enabled: bool = True
+    admission_backend: str = "memory"  # memory or redis
+    admission_processes: int = 1  # processes splitting the memory backend's budget; set by gunicorn_conf.py
+    admission_bucket_capacity: float = 30.0  # tokens per user
+    admission_refill_rate: float = 0.5  # tokens per second
+    admission_max_concurrency: int = 32  # gated requests in flight per process
+    admission_max_queue: int = 64
+    admission_queue_timeout: float = 5.0  # seconds
+    admission_retry_after: int = 2  # seconds, sent with 503 responses
+    admission_max_tracked_users: int = 10000
+    
     # Redis settings
     redis_url: str = "redis://localhost:6379"
     
@@ -1,7 +1,10 @@
-from sqlalchemy import create_engine
+import os
+import time
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
+from .tracing import record
 
 # Create database engine
 engine = create_engine(
@@ -9,12 +12,56 @@ engine = create_engine(
     connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
 )
 
+if "sqlite" in settings.database_url:
+    @event.listens_for(engine, "connect")
+    def _configure_sqlite(dbapi_connection, connection_record):
+        # WAL lets readers run alongside a writer, and busy_timeout makes
+        # concurrent writers from several worker processes wait instead of failing
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+# Start times are keyed by cursor, so a failed query's entry can be found and dropped
+@event.listens_for(engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", {})[id(cursor)] = time.perf_counter()
+
+@event.listens_for(engine, "after_cursor_execute")
+def _record_query_time(conn, cursor, statement, parameters, context, executemany):
+    record("db", time.perf_counter() - conn.info["query_started"].pop(id(cursor)))
+
+@event.listens_for(engine, "handle_error")
+def _discard_query_timer(exception_context):
+    # Failed queries never reach after_cursor_execute
+    conn = exception_context.connection
+    context = exception_context.execution_context
+    if conn is not None and context is not None and context.cursor is not None:
+        conn.info.get("query_started", {}).pop(id(context.cursor), None)
+
+# Pooled connections must not be shared with forked worker processes
+os.register_at_fork(after_in_child=lambda: engine.dispose(close=False))
+
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Create Base class
 Base = declarative_base()
 
+_tables_created = False
+
+def create_tables():
+    """Create missing tables, once per process tree.
+
+    Under gunicorn the master calls this before forking (gunicorn_conf.on_starting),
+    so workers inherit the flag instead of racing to create the same tables.
+    """
+    global _tables_created
+    if not _tables_created:
+        Base.metadata.create_all(bind=engine)
+        _tables_created = True
+
 # Dependency to get database session
 def get_db():
     db = SessionLocal()
@@ -0,0 +1,130 @@
+# HTTP conditional caching and compression helpers
+import gzip
+import hashlib
+from typing import Dict, Optional
+from fastapi import Request, Response
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Cache-Control policies per endpoint. Every endpoint requires a bearer token,
+# so responses are private: the browser may reuse them, but shared caches (the
+# nginx tier) must not serve them to other clients, including unauthenticated ones.
+PRECEDENT_CACHE_CONTROL = f"private, max-age={settings.precedent_cache_max_age}"
+COURTS_CACHE_CONTROL = f"private, max-age={settings.courts_cache_max_age}"
+RECENT_CASES_CACHE_CONTROL = (
+    f"private, max-age={settings.recent_cases_cache_max_age}, "
+    f"stale-while-revalidate={settings.recent_cases_refresh_interval}"
+)
+
+AUTOCOMPLETE_CACHE_CONTROL = f"private, max-age={settings.autocomplete_cache_max_age}"
+
+# Placeholder data served when the upstream API fails must not be cached at all
+NO_STORE_CACHE_CONTROL = "no-store"
+
+DEFAULT_VARY = "Accept-Encoding"
+
+
+def compute_etag(body: bytes) -> str:
+    """Compute a strong ETag from the exact response bytes"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison, RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def negotiate_encoding(accept_encoding: Optional[str], size: int) -> Optional[str]:
+    """Pick a content encoding for a body of the given size, preferring brotli"""
+    if not accept_encoding or size < settings.compression_min_size:
+        return None
+
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a body with the negotiated encoding"""
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.brotli_quality)
+    return gzip.compress(body, compresslevel=settings.gzip_level)
+
+
+def encoded_response(
+    request: Request,
+    body: bytes,
+    headers: Optional[Dict[str, str]] = None,
+    media_type: str = "application/json"
+) -> Response:
+    """Build a response, compressing the body when the client accepts it"""
+    headers = dict(headers or {})
+    headers.setdefault("Vary", DEFAULT_VARY)
+
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"), len(body))
+    if encoding:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def cached_response(
+    request: Request,
+    body: bytes,
+    cache_control: str,
+    etag: Optional[str] = None,
+    vary: str = DEFAULT_VARY,
+    media_type: str = "application/json"
+) -> Response:
+    """Build a cacheable response, answering 304 when the client copy is current"""
+    etag = etag or compute_etag(body)
+
+    # Each content encoding is a distinct representation with its own strong ETag
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"), len(body))
+    if encoding:
+        etag = etag[:-1] + "-" + encoding + '"'
+
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "Vary": vary,
+    }
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if encoding:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -0,0 +1,80 @@
+# ASGI middleware shared by every worker process
+import asyncio
+from typing import Dict
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from .profiler import SamplingProfiler
+from .tracing import start_trace
+
+
+class RequestTimeoutMiddleware:
+    """Cancel HTTP requests that run longer than a deadline and answer 504.
+
+    If the response has already started streaming it cannot be replaced, so the
+    request is only cancelled and the connection closed by the server. Paths in
+    path_timeouts get their own deadline.
+    """
+
+    def __init__(self, app: ASGIApp, timeout: float, path_timeouts: Dict[str, float] = None):
+        self.app = app
+        self.timeout = timeout
+        self.path_timeouts = path_timeouts or {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        timeout = self.path_timeouts.get(scope.get("path"), self.timeout)
+        if scope["type"] != "http" or not timeout:
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await asyncio.wait_for(self.app(scope, receive, send_wrapper), timeout)
+        except asyncio.TimeoutError:
+            if response_started:
+                raise
+            response = JSONResponse({"detail": "Request timed out"}, status_code=504)
+            await response(scope, receive, send)
+
+
+class TracingMiddleware:
+    """Time each HTTP request's spans and report them in a Server-Timing header.
+
+    With the sampling profiler enabled, requests slower than its threshold also
+    leave a flame profile in the log directory.
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = True, profiler: SamplingProfiler = None):
+        self.app = app
+        self.server_timing = server_timing
+        self.profiler = profiler if profiler is not None and profiler.enabled else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not (self.server_timing or self.profiler):
+            await self.app(scope, receive, send)
+            return
+
+        trace = start_trace()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and self.server_timing:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        if self.profiler is None:
+            await self.app(scope, receive, send_wrapper)
+            return
+
+        token, started = self.profiler.begin()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            await asyncio.to_thread(self.profiler.end, token, started, scope["method"], scope["path"])
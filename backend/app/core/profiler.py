@@ -0,0 +1,132 @@
+# Opt-in sampling profiler that keeps flame profiles of slow requests
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, Optional, Tuple
+from .config import settings
+
+# Leaf frames of threads that are waiting rather than working
+IDLE_FRAMES = frozenset({
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("thread.py", "_worker"),  # idle executor thread blocked on its queue
+})
+
+
+class SamplingProfiler:
+    """Sample every thread's Python stack while requests are in flight.
+
+    A background thread records folded stacks every interval. When a request
+    finishes above the latency threshold, the samples taken during it are
+    written to the log directory in collapsed-stack format, which flamegraph.pl
+    and speedscope read directly. Samples cover the whole process, so a slow
+    request's profile also shows whatever ran concurrently with it.
+    """
+
+    def __init__(self, enabled: bool, interval: float, threshold: float, output_dir: str):
+        self.enabled = enabled
+        self.interval = interval
+        self.threshold = threshold
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+        self._samples: deque = deque()  # (timestamp, folded stack)
+        self._active: Dict[int, float] = {}  # request token -> start time
+        self._next_token = 0
+        self._labels: Dict[object, str] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if not self.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def begin(self) -> Tuple[int, float]:
+        """Mark a request as in flight so its stacks are sampled"""
+        started = time.perf_counter()
+        with self._lock:
+            token = self._next_token
+            self._next_token += 1
+            self._active[token] = started
+        return token, started
+
+    def end(self, token: int, started: float, method: str, path: str) -> Optional[str]:
+        """Finish a request, writing its profile if it was slow; returns the file written"""
+        finished = time.perf_counter()
+        with self._lock:
+            self._active.pop(token, None)
+            if finished - started < self.threshold:
+                return None
+            counts = Counter(stack for taken, stack in self._samples if started <= taken <= finished)
+        if not counts:
+            return None
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_")[:60] or "root"
+        elapsed_ms = int((finished - started) * 1000)
+        filename = os.path.join(
+            self.output_dir,
+            f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{method.lower()}-{slug}-{elapsed_ms}ms.folded"
+        )
+        with open(filename, "w", encoding="utf-8") as f:
+            for stack, count in counts.most_common():
+                f.write(f"{stack} {count}\n")
+        print(f"Slow request {method} {path} took {elapsed_ms}ms; profile written to {filename}")
+        return filename
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                if not self._active:
+                    self._samples.clear()
+                    continue
+                oldest = min(self._active.values())
+                while self._samples and self._samples[0][0] < oldest:
+                    self._samples.popleft()
+
+            taken = time.perf_counter()
+            stacks = [
+                self._fold(frame)
+                for ident, frame in sys._current_frames().items()
+                if ident != own
+            ]
+            with self._lock:
+                self._samples.extend((taken, stack) for stack in stacks if stack is not None)
+
+    def _fold(self, frame) -> Optional[str]:
+        """Semicolon-joined stack from the outermost frame, or None for idle threads"""
+        code = frame.f_code
+        if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+            return None
+        labels = []
+        while frame is not None:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = f"{os.path.basename(code.co_filename)}:{code.co_qualname}"
+            labels.append(label)
+            frame = frame.f_back
+        labels.reverse()
+        return ";".join(labels)
+
+
+profiler = SamplingProfiler(
+    enabled=settings.profiling_enabled,
+    interval=settings.profiling_interval_ms / 1000,
+    threshold=settings.profiling_threshold_ms / 1000,
+    output_dir=os.path.join(settings.log_dir, "profiles"),
+)
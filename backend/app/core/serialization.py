@@ -0,0 +1,46 @@
+# Fast JSON serialization and sparse fieldset helpers
+import json
+from typing import Any, Optional, Set, Type
+from fastapi import HTTPException
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the stdlib encoder
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize to compact JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str).encode()
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered with orjson instead of the stdlib encoder"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def parse_field_set(value: Optional[str], model: Type[BaseModel], param: str) -> Optional[Set[str]]:
+    """Parse a comma separated fields= / exclude= parameter against a model's fields"""
+    if not value:
+        return None
+
+    requested = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = requested - set(model.model_fields)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown field(s) in {param}: {', '.join(sorted(unknown))}"
+        )
+    return requested
+
+
+def project(model: BaseModel, include: Optional[Set[str]] = None, exclude: Optional[Set[str]] = None) -> dict:
+    """Dump a model restricted to the requested fields, skipping re-validation"""
+    return model.model_dump(include=include, exclude=exclude)
@@ -0,0 +1,75 @@
+# Per-request timing spans, reported in the Server-Timing response header
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+_current: ContextVar[Optional["Trace"]] = ContextVar("trace", default=None)
+
+
+class Trace:
+    """Time spent in each named span during one request.
+
+    Spans with the same name are summed, so repeated DB queries or upstream
+    calls show up as one entry with a count.
+    """
+
+    __slots__ = ("start", "spans")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans: Dict[str, List[float]] = {}
+
+    def record(self, name: str, seconds: float):
+        entry = self.spans.get(name)
+        if entry is None:
+            self.spans[name] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, durations in milliseconds"""
+        metrics = []
+        for name, (seconds, count) in self.spans.items():
+            if count > 1:
+                metrics.append(f'{name};desc="{count} calls";dur={seconds * 1000:.1f}')
+            else:
+                metrics.append(f"{name};dur={seconds * 1000:.1f}")
+        metrics.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+def start_trace() -> Trace:
+    """Begin tracing the current request; spans in tasks and threads it starts are included"""
+    trace = Trace()
+    _current.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+def record(name: str, seconds: float):
+    """Add a measured duration to the current request's trace, if any"""
+    trace = _current.get()
+    if trace is not None:
+        trace.record(name, seconds)
+
+
+@contextmanager
+def span(name: str):
+    """Time a block of sync or async code as a named span of the current request"""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.record(name, time.perf_counter() - started)
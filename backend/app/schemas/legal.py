@@ -21,6 +21,15 @@ class PrecedentSearchResponse(BaseModel):
     relevance: str
     how_it_helps: str
 
+class SearchFacets(BaseModel):
+    court: Dict[str, int]  # matching judgments per court
+    year: Dict[str, int]  # matching judgments per year
+
+class PrecedentSearchResults(BaseModel):
+    results: List[PrecedentSearchResponse]
+    total: int  # matching judgments in the local corpus
+    facets: SearchFacets
+
 class PrecedentDetail(BaseModel):
     id: str
     title: str
@@ -38,6 +47,36 @@ class PrecedentDetail(BaseModel):
     parties: Dict[str, str]
     citations: List[str]
 
+class PrecedentTextRange(BaseModel):
+    id: str
+    start: int
+    end: int
+    total_paragraphs: int
+    paragraphs: List[str]
+
+class CitationLink(BaseModel):
+    id: str
+    title: str
+    citation: str
+    authority: float
+
+class CitationLinks(BaseModel):
+    id: str
+    authority: Optional[float] = None
+    count: int
+    results: List[CitationLink]
+
+class AutocompleteSuggestion(BaseModel):
+    id: str
+    title: str
+    citation: str
+    matched: str  # title, party or citation
+    authority: float
+
+class AutocompleteResponse(BaseModel):
+    query: str
+    results: List[AutocompleteSuggestion]
+
 class ChatMessage(BaseModel):
     content: str
     context: Optional[Dict[str, Any]] = None
@@ -57,9 +96,23 @@ class DocumentAnalysisResponse(BaseModel):
     key_points: List[str]
     legal_issues: List[str]
     citations: List[str]
+    judges: List[str] = []
+    parties: Dict[str, str] = {}
     confidence_score: float
     processing_time: float
 
+class BundleCitation(BaseModel):
+    citation: str
+    documents: List[str]  # filenames citing it, in upload order
+
+class BatchAnalysisBundle(BaseModel):
+    documents: int
+    failed: int
+    citations: List[BundleCitation]
+    judges: List[str]
+    legal_issues: List[str]
+    processing_time: float
+
 class CourtInfo(BaseModel):
     name: str
     type: str
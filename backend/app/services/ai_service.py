@@ -1,8 +1,11 @@
-import httpx
 import asyncio
 from typing import List, Optional, Dict, Any
 from app.core.config import settings
+from app.core.tracing import span
 from app.schemas.legal import DocumentAnalysisResponse
+from app.services.inference_backends import create_inference_backend, local_summarizer, local_entities
+from app.services.answer_cache import answer_cache
+from app.services.segmenter import Sentences, keyword_pattern, segment
 import json
 import re
 from datetime import datetime
@@ -10,6 +13,16 @@ import PyPDF2
 import io
 from docx import Document
 
+KEY_POINT_KEYWORDS = keyword_pattern([
+    'held', 'ruled', 'decided', 'established', 'principle',
+    'court', 'judgment', 'order', 'directed', 'declared'
+])
+LEGAL_ISSUE_KEYWORDS = keyword_pattern([
+    'constitutional', 'fundamental rights', 'violation',
+    'breach', 'contract', 'tort', 'negligence', 'damages',
+    'injunction', 'specific performance', 'compensation'
+])
+
 class AIService:
     def __init__(self):
         self.huggingface_api_url = "https://api-inference.huggingface.co/models"
@@ -23,6 +36,11 @@ class AIService:
         self.legal_qa_model = "microsoft/DialoGPT-medium"  # For chat
         self.summarization_model = "facebook/bart-large-cnn"  # For document summarization
         self.ner_model = "dslim/bert-base-NER"  # For named entity recognition
+        
+        # Remote, local or local-first inference, selected by INFERENCE_BACKEND
+        self.backend = create_inference_backend(
+            settings.inference_backend, self.legal_qa_model, self.summarization_model
+        )
 
     async def chat_with_legal_assistant(
         self, 
@@ -32,37 +50,36 @@ class AIService:
     ) -> str:
         """Chat with AI legal assistant using Hugging Face models"""
         try:
+            # Paraphrases of general questions are answered from the semantic cache
+            cacheable = answer_cache.cacheable(context)
+            cache_scope = f"{self.backend.name}:{self.legal_qa_model}"
+            if cacheable:
+                with span("answer_cache"):
+                    cached = await answer_cache.lookup(user_message, cache_scope)
+                if cached:
+                    return cached
+
             # Prepare the prompt with legal context
             legal_prompt = self._create_legal_prompt(user_message, context)
             
             # Use Hugging Face API for text generation
-            payload = {
-                "inputs": legal_prompt,
-                "parameters": {
-                    "max_length": 500,
-                    "temperature": 0.7,
-                    "do_sample": True,
-                    "top_p": 0.9
-                }
-            }
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.huggingface_api_url}/{self.legal_qa_model}",
-                    headers=self.headers,
-                    json=payload,
-                    timeout=30.0
+            with span("inference.chat"):
+                reply = await self.backend.generate(
+                    legal_prompt,
+                    {
+                        "max_length": 500,
+                        "temperature": 0.7,
+                        "do_sample": True,
+                        "top_p": 0.9
+                    }
                 )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    if isinstance(result, list) and len(result) > 0:
-                        return result[0].get("generated_text", "")
-                    elif isinstance(result, dict):
-                        return result.get("generated_text", "")
-                
-                # Fallback to rule-based response
-                return self._generate_rule_based_response(user_message)
+            if reply:
+                if cacheable:
+                    await answer_cache.store(user_message, cache_scope, reply)
+                return reply
+            
+            # Fallback to rule-based response
+            return self._generate_rule_based_response(user_message)
                 
         except Exception as e:
             print(f"Error in AI chat: {e}")
@@ -77,51 +94,71 @@ class AIService:
         """Analyze uploaded legal document"""
         try:
             # Extract text from document
-            text = await self._extract_text_from_file(file)
-            
+            with span("extract"):
+                text = await self._extract_text_from_file(file)
+        except Exception as e:
+            print(f"Error analyzing document: {e}")
+            return self._failed_analysis()
+        return await self.analyze_text(text, analysis_type)
+
+    async def analyze_text(self, text: str, analysis_type: str = "summary") -> DocumentAnalysisResponse:
+        """Analyze the text of a legal document"""
+        try:
             if not text:
                 raise ValueError("Could not extract text from document")
             
+            # Segment once; every extractor reads the same sentence offsets
+            with span("segment"):
+                sentences = segment(text)
+            
             # Perform analysis based on type
             if analysis_type == "summary":
-                summary = await self._generate_summary(text)
-                key_points = await self._extract_key_points(text)
-                legal_issues = await self._identify_legal_issues(text)
+                summary = await self._generate_summary(text, sentences)
+                key_points = await self._extract_key_points(text, sentences)
+                legal_issues = await self._identify_legal_issues(text, sentences)
             elif analysis_type == "key_points":
                 summary = text[:200] + "..."
-                key_points = await self._extract_key_points(text)
+                key_points = await self._extract_key_points(text, sentences)
                 legal_issues = []
             elif analysis_type == "legal_issues":
                 summary = text[:200] + "..."
                 key_points = []
-                legal_issues = await self._identify_legal_issues(text)
+                legal_issues = await self._identify_legal_issues(text, sentences)
             else:
-                summary = await self._generate_summary(text)
-                key_points = await self._extract_key_points(text)
-                legal_issues = await self._identify_legal_issues(text)
+                summary = await self._generate_summary(text, sentences)
+                key_points = await self._extract_key_points(text, sentences)
+                legal_issues = await self._identify_legal_issues(text, sentences)
             
-            # Extract citations
-            citations = self._extract_citations(text)
+            # Extract citations and entities
+            with span("enrich"):
+                citations = self._extract_citations(text)
+            entities = await self._extract_entities(text)
             
             return DocumentAnalysisResponse(
                 summary=summary,
                 key_points=key_points,
                 legal_issues=legal_issues,
                 citations=citations,
+                judges=entities.get("judges", []),
+                parties=entities.get("parties", {}),
                 confidence_score=0.85,
                 processing_time=2.5
             )
             
         except Exception as e:
             print(f"Error analyzing document: {e}")
-            return DocumentAnalysisResponse(
-                summary="Error analyzing document",
-                key_points=[],
-                legal_issues=[],
-                citations=[],
-                confidence_score=0.0,
-                processing_time=0.0
-            )
+            return self._failed_analysis()
+
+    @staticmethod
+    def _failed_analysis() -> DocumentAnalysisResponse:
+        return DocumentAnalysisResponse(
+            summary="Error analyzing document",
+            key_points=[],
+            legal_issues=[],
+            citations=[],
+            confidence_score=0.0,
+            processing_time=0.0
+        )
 
     async def _extract_text_from_file(self, file) -> str:
         """Extract text from uploaded file"""
@@ -165,81 +202,55 @@ class AIService:
             print(f"Error extracting DOCX text: {e}")
             return ""
 
-    async def _generate_summary(self, text: str) -> str:
+    async def _generate_summary(self, text: str, sentences: Optional[Sentences] = None) -> str:
         """Generate summary using Hugging Face model"""
         try:
-            # Truncate text if too long
-            if len(text) > 1000:
-                text = text[:1000]
+            with span("inference.summary"):
+                summary = await self.backend.summarize(text, sentences)
+            if summary:
+                return summary
             
-            payload = {
-                "inputs": text,
-                "parameters": {
-                    "max_length": 150,
-                    "min_length": 50,
-                    "do_sample": False
-                }
-            }
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.huggingface_api_url}/{self.summarization_model}",
-                    headers=self.headers,
-                    json=payload,
-                    timeout=30.0
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    if isinstance(result, list) and len(result) > 0:
-                        return result[0].get("summary_text", "")
-                
-                # Fallback to simple summary
-                return self._generate_simple_summary(text)
+            # Fallback to simple summary
+            return self._generate_simple_summary(text, sentences)
                 
         except Exception as e:
             print(f"Error generating summary: {e}")
-            return self._generate_simple_summary(text)
+            return self._generate_simple_summary(text, sentences)
+
+    async def _extract_entities(self, text: str) -> Dict[str, Any]:
+        """Extract judges and parties, falling back to the local rules"""
+        try:
+            with span("inference.entities"):
+                entities = await self.backend.extract_entities(text)
+            if entities:
+                return entities
+        except Exception as e:
+            print(f"Error extracting entities: {e}")
+        return local_entities.extract(text)
 
-    async def _extract_key_points(self, text: str) -> List[str]:
+    async def _extract_key_points(self, text: str, sentences: Optional[Sentences] = None) -> List[str]:
         """Extract key legal points from text"""
         try:
-            # Use NER model to identify legal entities
-            sentences = text.split('.')
-            key_points = []
-            
-            for sentence in sentences[:20]:  # Check first 20 sentences
-                if any(keyword in sentence.lower() for keyword in [
-                    'held', 'ruled', 'decided', 'established', 'principle',
-                    'court', 'judgment', 'order', 'directed', 'declared'
-                ]):
-                    key_points.append(sentence.strip())
-            
-            return key_points[:5]  # Limit to 5 key points
+            sentences = sentences if sentences is not None else segment(text)
+            # Check first 20 sentences, limit to 5 key points
+            with span("enrich"):
+                return [sentences[number] for number in sentences.matching(KEY_POINT_KEYWORDS, limit=5, within=20)]
             
         except Exception as e:
             print(f"Error extracting key points: {e}")
             return []
 
-    async def _identify_legal_issues(self, text: str) -> List[str]:
+    async def _identify_legal_issues(self, text: str, sentences: Optional[Sentences] = None) -> List[str]:
         """Identify legal issues in the document"""
         try:
-            legal_issues = []
-            legal_keywords = [
-                'constitutional', 'fundamental rights', 'violation',
-                'breach', 'contract', 'tort', 'negligence', 'damages',
-                'injunction', 'specific performance', 'compensation'
-            ]
-            
-            sentences = text.split('.')
-            for sentence in sentences:
-                sentence_lower = sentence.lower()
-                for keyword in legal_keywords:
-                    if keyword in sentence_lower:
-                        legal_issues.append(sentence.strip())
+            sentences = sentences if sentences is not None else segment(text)
+            legal_issues = {}
+            with span("enrich"):
+                for number in sentences.iter_matching(LEGAL_ISSUE_KEYWORDS):
+                    legal_issues[sentences[number]] = None
+                    if len(legal_issues) == 5:  # Limit to 5 issues
                         break
-            
-            return list(set(legal_issues))[:5]  # Limit to 5 issues
+            return list(legal_issues)
             
         except Exception as e:
             print(f"Error identifying legal issues: {e}")
@@ -302,8 +313,10 @@ Response:"""
         
         return "I understand your legal query. Please provide more specific details about your case so I can give you more targeted legal guidance."
 
-    def _generate_simple_summary(self, text: str) -> str:
-        """Generate a simple summary when AI fails"""
-        sentences = text.split('.')
-        summary_sentences = sentences[:3]  # First 3 sentences
-        return '. '.join(summary_sentences) + "."
+    def _generate_simple_summary(self, text: str, sentences: Optional[Sentences] = None) -> str:
+        """Generate an extractive summary when AI fails"""
+        sentences = sentences if sentences is not None else segment(text)
+        summary = local_summarizer.summarize(text, sentences=sentences)
+        if summary:
+            return summary
+        return " ".join(sentences[number] for number in range(min(3, len(sentences))))  # First 3 sentences
@@ -0,0 +1,334 @@
+import asyncio
+import fcntl
+import hashlib
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+import numpy as np
+from app.core.config import settings
+from app.services.inference_backends import STOPWORDS
+
+WORD = re.compile(r"[a-z0-9]+")
+
+# Words that change how a question is phrased but not what it asks
+QUESTION_WORDS = frozenset("""
+    whats explain explanation define definition meaning mean means tell describe
+    please kindly know about how why give brief briefly concept understand
+    say says state states talk talks regarding relating
+""".split())
+
+# Negations are stopwords for search but flip the meaning of a question
+NEGATIONS = frozenset({"not", "no", "without", "never", "cannot"})
+CACHE_STOPWORDS = (STOPWORDS | QUESTION_WORDS) - NEGATIONS
+
+COLLECTION_NAME = "chat_answers"
+# Stored questions compared per lookup; the closest one may swap roles around a verb
+CANDIDATES = 5
+
+
+def _key_term(term: str) -> bool:
+    """Negations and section or article numbers, which a reworded question must keep"""
+    return term in NEGATIONS or any(char.isdigit() for char in term)
+
+
+def _positions(terms: List[str], shared: set) -> Dict[str, int]:
+    positions: Dict[str, int] = {}
+    for position, term in enumerate(terms):
+        if term in shared:
+            positions.setdefault(term, position)
+    return positions
+
+
+def _swaps_roles(asked: List[str], stored: List[str]) -> bool:
+    """Whether two shared terms sit on opposite sides of a third in the two questions.
+
+    That is how "landlord evict tenant" differs from "tenant evict landlord".
+    Moving a whole phrase ("basic structure doctrine", "doctrine of basic
+    structure") keeps every pair on the same side of the rest, so it passes.
+    """
+    shared = set(asked) & set(stored)
+    first, second = _positions(asked, shared), _positions(stored, shared)
+    for pivot in shared:
+        moved_back = moved_forward = False
+        for term in shared:
+            if first[term] < first[pivot] and second[term] > second[pivot]:
+                moved_back = True
+            elif first[term] > first[pivot] and second[term] < second[pivot]:
+                moved_forward = True
+        if moved_back and moved_forward:
+            return True
+    return False
+
+
+def same_question(asked: List[str], stored: List[str]) -> bool:
+    """Whether two questions with overlapping terms ask the same thing.
+
+    Both must have the same negations and numbers, and no two shared terms may
+    trade places around a third, so "can the landlord evict the tenant" does
+    not match "can the tenant evict the landlord". Other reordering is allowed.
+    """
+    if {term for term in asked if _key_term(term)} != {term for term in stored if _key_term(term)}:
+        return False
+    return not _swaps_roles(asked, stored)
+
+
+class QuestionEmbedder:
+    """Hashed bag-of-words embeddings of short questions, computed locally.
+
+    Content words are lightly stemmed and hashed into a fixed number of signed
+    buckets, so rewordings that share their key terms land close together
+    without a model download. Negations and tokens with digits (section and
+    article numbers) count double. The embedding ignores word order, so
+    candidates are confirmed with same_question() before an answer is reused.
+    """
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+
+    def terms(self, text: str) -> List[str]:
+        terms = []
+        for word in WORD.findall(text.lower()):
+            has_digit = any(char.isdigit() for char in word)
+            if (len(word) < 3 and not has_digit and word not in NEGATIONS) or word in CACHE_STOPWORDS:
+                continue
+            if not has_digit and len(word) > 4 and word.endswith("s") and not word.endswith("ss"):
+                word = word[:-1]
+            terms.append(word)
+        return terms
+
+    def embed(self, text: str) -> Optional[np.ndarray]:
+        """Unit-length embedding, or None if the text has no content words"""
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for term in set(self.terms(text)):
+            # crc32 rather than hash() so every worker process agrees
+            code = zlib.crc32(term.encode("utf-8"))
+            weight = 2.0 if _key_term(term) else 1.0
+            vector[code % self.dimensions] += weight if code & 0x80000000 else -weight
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            return None
+        return vector / norm
+
+
+class AnswerCache:
+    """Chat answers reused for reworded questions, stored in a Chroma collection.
+
+    A question is answered from the cache when a stored question for the same
+    model is at least `threshold` cosine-similar, passes same_question() and is
+    younger than the TTL. When the collection grows past `max_entries`,
+    expired entries and then the least recently used are evicted. Any Chroma
+    error is counted and treated as a miss, so the cache never fails a chat
+    request.
+
+    With `host` set, the collection lives on a Chroma server shared by every
+    worker process. Otherwise it is kept on disk under `persist_dir`, which
+    only one process may open, so other workers run without the cache.
+    """
+
+    def __init__(self, persist_dir: str, threshold: float, ttl: int, max_entries: int, dimensions: int,
+                 enabled: bool = True, host: str = "", port: int = 8000, credentials: str = ""):
+        self.persist_dir = persist_dir
+        self.host = host
+        self.port = port
+        self.credentials = credentials
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.embedder = QuestionEmbedder(dimensions)
+        self._collection = None
+        self._writer_lock = None
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.expired = 0
+        self.stores = 0
+        self.evictions = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # Chroma clients hold connections that must not cross a fork; the
+        # writer lock belongs to the parent
+        self._lock = threading.Lock()
+        self._collection = None
+        self._writer_lock = None
+
+    @staticmethod
+    def cacheable(context: Optional[Dict[str, Any]]) -> bool:
+        """Questions asked about a specific case or document get answers of their own"""
+        return not context or not any(context.values())
+
+    def _get_collection(self):
+        if self._collection is None:
+            with self._lock:
+                if self._collection is None:
+                    try:
+                        import chromadb
+                        from chromadb.config import Settings as ChromaSettings
+                    except ImportError:
+                        self.enabled = False  # chromadb not installed; stop trying
+                        raise
+
+                    client = self._connect(chromadb, ChromaSettings)
+                    self._collection = client.get_or_create_collection(
+                        COLLECTION_NAME, metadata={"hnsw:space": "cosine"}
+                    )
+        return self._collection
+
+    def _connect(self, chromadb, ChromaSettings):
+        if self.host:
+            options = {"anonymized_telemetry": False}
+            if self.credentials:
+                options.update(
+                    chroma_client_auth_provider="chromadb.auth.basic.BasicAuthClientProvider",
+                    chroma_client_auth_credentials=self.credentials,
+                )
+            return chromadb.HttpClient(host=self.host, port=self.port, settings=ChromaSettings(**options))
+
+        # The embedded client is not safe across processes: the first one to
+        # lock the directory owns the cache and the others go without
+        path = os.path.join(self.persist_dir, COLLECTION_NAME)
+        os.makedirs(path, exist_ok=True)
+        lock_file = open(os.path.join(path, "writer.lock"), "a")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            self.enabled = False
+            raise RuntimeError(f"{path} is in use by another process; set CHROMA_HOST to share the cache")
+        self._writer_lock = lock_file
+        return chromadb.PersistentClient(path=path, settings=ChromaSettings(anonymized_telemetry=False))
+
+    def _fail(self, error: Exception):
+        self.errors += 1
+        self.last_error = str(error)
+        print(f"Answer cache error: {error}")
+
+    async def lookup(self, question: str, scope: str) -> Optional[str]:
+        """Stored answer to the same question asked in other words, if any"""
+        if not self.enabled:
+            return None
+        embedding = self.embedder.embed(question)
+        if embedding is None:
+            return None
+        self.lookups += 1
+        try:
+            answer = await asyncio.to_thread(self._lookup, self.embedder.terms(question), embedding, scope)
+        except Exception as e:
+            self._fail(e)
+            return None
+        if answer is not None:
+            self.hits += 1
+        return answer
+
+    def _lookup(self, terms: List[str], embedding: np.ndarray, scope: str) -> Optional[str]:
+        collection = self._get_collection()
+        count = collection.count()
+        if count == 0:
+            return None
+        found = collection.query(
+            query_embeddings=[embedding.tolist()],
+            n_results=min(CANDIDATES, count),
+            where={"scope": scope},
+            include=["metadatas", "distances"]
+        )
+        if not found["ids"] or not found["ids"][0]:
+            return None
+        for entry_id, metadata, distance in zip(found["ids"][0], found["metadatas"][0], found["distances"][0]):
+            # Chroma reports cosine distance, 1 - similarity, closest first
+            if 1.0 - distance < self.threshold:
+                return None
+            # Entries stored before terms were recorded cannot be confirmed
+            if "terms" in metadata and same_question(terms, metadata["terms"].split()):
+                break
+        else:
+            return None
+
+        now = time.time()
+        if now - metadata["created_at"] > self.ttl:
+            self.expired += 1
+            collection.delete(ids=[entry_id])
+            return None
+        collection.update(ids=[entry_id], metadatas=[{**metadata, "last_used": now, "hits": metadata.get("hits", 0) + 1}])
+        return metadata["answer"]
+
+    async def store(self, question: str, scope: str, answer: str):
+        """Remember a model answer for later paraphrases of the question"""
+        if not self.enabled:
+            return
+        embedding = self.embedder.embed(question)
+        if embedding is None:
+            return
+        try:
+            await asyncio.to_thread(self._store, question, embedding, scope, answer)
+            self.stores += 1
+        except Exception as e:
+            self._fail(e)
+
+    def _store(self, question: str, embedding: np.ndarray, scope: str, answer: str):
+        collection = self._get_collection()
+        now = time.time()
+        # Kept in order: the same terms in another order may ask something else
+        terms = " ".join(self.embedder.terms(question))
+        collection.upsert(
+            ids=[hashlib.sha1(f"{scope}\0{terms}".encode("utf-8")).hexdigest()],
+            embeddings=[embedding.tolist()],
+            documents=[question],
+            metadatas=[{"scope": scope, "terms": terms, "answer": answer, "created_at": now, "last_used": now, "hits": 0}]
+        )
+        if collection.count() > self.max_entries:
+            self._evict(collection, now)
+
+    def _evict(self, collection, now: float):
+        entries = collection.get(include=["metadatas"])
+        expired = [
+            entry_id
+            for entry_id, metadata in zip(entries["ids"], entries["metadatas"])
+            if now - metadata["created_at"] > self.ttl
+        ]
+        excess = len(entries["ids"]) - len(expired) - self.max_entries
+        if excess > 0:
+            # Make room for a tenth of the cache at once rather than evicting on every store
+            excess += self.max_entries // 10
+            expired_ids = set(expired)
+            live = [
+                (metadata["last_used"], entry_id)
+                for entry_id, metadata in zip(entries["ids"], entries["metadatas"])
+                if entry_id not in expired_ids
+            ]
+            live.sort()
+            expired.extend(entry_id for _, entry_id in live[:excess])
+        if expired:
+            collection.delete(ids=expired)
+            self.evictions += len(expired)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+            "expired": self.expired,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+
+answer_cache = AnswerCache(
+    persist_dir=settings.chroma_persist_directory,
+    host=settings.chroma_host,
+    port=settings.chroma_port,
+    credentials=settings.chroma_auth_credentials,
+    threshold=settings.answer_cache_similarity,
+    ttl=settings.answer_cache_ttl,
+    max_entries=settings.answer_cache_max_entries,
+    dimensions=settings.answer_cache_dimensions,
+    enabled=settings.answer_cache_enabled,
+)
@@ -0,0 +1,450 @@
+import asyncio
+import bisect
+import fcntl
+import os
+import re
+import threading
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+from app.services.citation_graph import citation_graph, normalize_citation
+
+KEY_KINDS = ("title", "party", "citation")
+TITLE, PARTY, CITATION = range(3)
+
+NON_WORD = re.compile(r"[\W_]+")
+VERSUS = re.compile(r"\s+(?:v\.?|vs\.?|versus)\s+", re.IGNORECASE)
+
+# Upper bound for prefix ranges: 0xff never occurs in UTF-8
+PREFIX_END = b"\xff"
+
+
+def normalize_key(text: str) -> str:
+    """Lowercase and reduce punctuation to single spaces, for keys and queries alike"""
+    return NON_WORD.sub(" ", (text or "").lower()).strip()
+
+
+def document_keys(title: str, citation: str) -> List[Tuple[bytes, int]]:
+    """Typeahead keys for one judgment: its title, each party and its citation"""
+    keys: Dict[bytes, int] = {}
+    title_key = normalize_key(title)
+    if title_key:
+        keys[title_key.encode("utf-8")] = TITLE
+    parties = VERSUS.split(title or "")
+    if len(parties) > 1:
+        for party in parties:
+            party_key = normalize_key(party)
+            if party_key:
+                keys.setdefault(party_key.encode("utf-8"), PARTY)
+    citation_key = normalize_key(normalize_citation(citation) or citation)
+    if citation_key:
+        keys.setdefault(citation_key.encode("utf-8"), CITATION)
+    return list(keys.items())
+
+
+class _StringTable:
+    """Immutable strings packed into one byte buffer with an offsets array"""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        # Plain bytes and array.array index far faster than NumPy scalars;
+        # the NumPy views share their memory for saving
+        self._data = blob.tobytes()
+        self._offsets = array("q")
+        self._offsets.frombytes(offsets.astype(np.int64).tobytes())
+        self.blob = np.frombuffer(self._data, dtype=np.uint8)
+        self.offsets = np.frombuffer(self._offsets, dtype=np.int64)
+
+    @classmethod
+    def pack(cls, values: List[bytes]) -> "_StringTable":
+        offsets = np.zeros(len(values) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in values], out=offsets[1:])
+        return cls(np.frombuffer(b"".join(values), dtype=np.uint8), offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, number: int) -> bytes:
+        return self._data[self._offsets[number]:self._offsets[number + 1]]
+
+    def text(self, number: int) -> str:
+        return self[number].decode("utf-8")
+
+
+class _Snapshot:
+    """Sorted key arrays searched with binary search.
+
+    Short prefixes can match a large share of the corpus, so the best matches of
+    every prefix whose range exceeds scan_limit are precomputed ("heavy"
+    prefixes); all other ranges are small enough to rank on each request.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.keys = _StringTable(arrays["key_blob"], arrays["key_offsets"])
+        self.key_doc = arrays["key_doc"]
+        self.key_kind = arrays["key_kind"]
+        self.docids = _StringTable(arrays["docid_blob"], arrays["docid_offsets"])
+        self.titles = _StringTable(arrays["title_blob"], arrays["title_offsets"])
+        self.citations = _StringTable(arrays["citation_blob"], arrays["citation_offsets"])
+        self.authority = arrays["authority"]
+        self.key_authority = self.authority[self.key_doc] if len(self.key_doc) else self.authority[:0]
+        heavy = _StringTable(arrays["heavy_blob"], arrays["heavy_offsets"])
+        top = arrays["heavy_top"]
+        self.heavy = {heavy[number]: top[number][top[number] >= 0] for number in range(len(heavy))}
+
+    @classmethod
+    def empty(cls) -> "_Snapshot":
+        return cls(build_arrays([], lambda docid: 0.0))
+
+    def documents(self) -> Iterable[Tuple[str, str, str]]:
+        for number in range(len(self.docids)):
+            yield self.docids.text(number), self.titles.text(number), self.citations.text(number)
+
+    def search(self, prefix: bytes, limit: int) -> List[int]:
+        """Key numbers matching a prefix, best authority first"""
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + PREFIX_END, lo)
+        if lo >= hi:
+            return []
+        if hi - lo > settings.autocomplete_scan_limit:
+            top = self.heavy.get(prefix)
+            if top is not None:
+                return top[:limit].tolist()
+        return _top_keys(self.key_authority, self.key_doc, lo, hi, limit)
+
+
+def _top_keys(key_authority: np.ndarray, key_doc: np.ndarray, lo: int, hi: int, limit: int) -> List[int]:
+    """Best keys in [lo, hi) by authority, at most one per document"""
+    scores = key_authority[lo:hi]
+    # Over-select so duplicate documents (title and party keys) can be dropped
+    wanted = min(len(scores), limit * 4)
+    candidates = np.argpartition(-scores, wanted - 1)[:wanted] if wanted < len(scores) else np.arange(len(scores))
+    candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+    seen = set()
+    keys = []
+    for offset in candidates.tolist():
+        doc = int(key_doc[lo + offset])
+        if doc not in seen:
+            seen.add(doc)
+            keys.append(lo + offset)
+            if len(keys) == limit:
+                break
+    return keys
+
+
+def build_arrays(documents: Iterable[Tuple[str, str, str]], authority_of: Callable[[str], Optional[float]]) -> Dict[str, np.ndarray]:
+    """Build snapshot arrays from (docid, title, citation) tuples; later duplicates win"""
+    latest: Dict[str, Tuple[str, str]] = {}
+    for docid, title, citation in documents:
+        latest[docid] = (title or "", citation or "")
+
+    docids = list(latest)
+    entries = []
+    for doc, docid in enumerate(docids):
+        title, citation = latest[docid]
+        for key, kind in document_keys(title, citation):
+            entries.append((key, doc, kind))
+    entries.sort()
+
+    keys = _StringTable.pack([entry[0] for entry in entries])
+    key_doc = np.array([entry[1] for entry in entries], dtype=np.int32)
+    key_kind = np.array([entry[2] for entry in entries], dtype=np.int8)
+    authority = np.array([authority_of(docid) or 0.0 for docid in docids], dtype=np.float32)
+    key_authority = authority[key_doc] if len(key_doc) else authority[:0]
+
+    # Precompute the best matches of every prefix too broad to rank per request
+    limit = settings.autocomplete_max_limit
+    threshold = settings.autocomplete_scan_limit
+    heavy: Dict[bytes, np.ndarray] = {}
+    stack = [(b"", 0, len(keys))]
+    while stack:
+        prefix, lo, hi = stack.pop()
+        if prefix:
+            heavy[prefix] = np.array(_top_keys(key_authority, key_doc, lo, hi, limit), dtype=np.int32)
+        depth = len(prefix)
+        position = lo
+        while position < hi and len(keys[position]) == depth:
+            position += 1
+        while position < hi:
+            byte = keys[position][depth]
+            end = bisect.bisect_left(keys, prefix + bytes([byte + 1]), position, hi)
+            if end - position > threshold:
+                stack.append((prefix + bytes([byte]), position, end))
+            position = end
+
+    snapshot = {
+        "key_blob": keys.blob, "key_offsets": keys.offsets,
+        "key_doc": key_doc, "key_kind": key_kind,
+        "authority": authority,
+    }
+    for name, values in (("docid", docids), ("title", [latest[d][0] for d in docids]),
+                         ("citation", [latest[d][1] for d in docids])):
+        table = _StringTable.pack([value.encode("utf-8") for value in values])
+        snapshot[f"{name}_blob"] = table.blob
+        snapshot[f"{name}_offsets"] = table.offsets
+
+    heavy_prefixes = sorted(heavy)
+    heavy_table = _StringTable.pack(heavy_prefixes)
+    top = np.full((len(heavy_prefixes), limit), -1, dtype=np.int32)
+    for number, prefix in enumerate(heavy_prefixes):
+        top[number, :len(heavy[prefix])] = heavy[prefix]
+    snapshot["heavy_blob"] = heavy_table.blob
+    snapshot["heavy_offsets"] = heavy_table.offsets
+    snapshot["heavy_top"] = top
+    return snapshot
+
+
+class AutocompleteIndex:
+    """In-memory prefix index over case titles, party names and citations.
+
+    Lookups binary-search an immutable snapshot loaded from disk plus a small
+    sorted delta of judgments added since; the delta is merged into a new
+    snapshot in the background once it grows past autocomplete_delta_max.
+    Results are ranked by citation authority.
+
+    Like the citation graph, each process holds its own copy. Saving merges the
+    judgments this process added with the snapshot on disk, and refresh() picks
+    up snapshots written by other processes such as the ingest CLI.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or settings.autocomplete_snapshot_path
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._base = _Snapshot.empty()
+        self._disk_stamp = None
+        self._delta: List[Tuple[bytes, int, int]] = []  # sorted (key, sequence number, kind)
+        self._entries: Dict[int, Tuple[str, str, str, float]] = {}
+        self._sequence = 0
+        self._unsaved: List[Tuple[str, str, str]] = []
+        self._merging = False
+        self._task: Optional[asyncio.Task] = None
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._lock = threading.RLock()
+        self._merging = False
+        self._task = None
+
+    # ------------------------------------------------------------------
+    # Loading and saving
+
+    def _stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _read_snapshot(self) -> Tuple[_Snapshot, Any]:
+        stamp = self._stamp()
+        if stamp is None:
+            return _Snapshot.empty(), None
+        with np.load(self.path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+        return _Snapshot(arrays), stamp
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._base, self._disk_stamp = self._read_snapshot()
+            self._loaded = True
+
+    def _reset_delta(self, documents: List[Tuple[str, str, str]]):
+        self._delta = []
+        self._entries = {}
+        self._unsaved = []
+        for docid, title, citation in documents:
+            self._add(docid, title, citation)
+
+    def refresh(self) -> bool:
+        """Reload the snapshot if another process saved a newer one"""
+        self._ensure_loaded()
+        if self._stamp() == self._disk_stamp:
+            return False
+        snapshot, stamp = self._read_snapshot()
+        with self._lock:
+            self._base, self._disk_stamp = snapshot, stamp
+            # Judgments added here but not yet saved stay visible
+            self._reset_delta(self._unsaved)
+        return True
+
+    @property
+    def dirty(self) -> bool:
+        """Whether this process added judgments that are not on disk yet"""
+        return bool(self._unsaved)
+
+    def save(self):
+        """Merge this process's additions into the snapshot on disk and write it atomically"""
+        self._ensure_loaded()
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with self._lock, open(os.path.join(directory, "write.lock"), "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            if self._stamp() != self._disk_stamp:
+                self._base, self._disk_stamp = self._read_snapshot()
+                self._reset_delta(self._unsaved)
+            if not self._unsaved and self._disk_stamp is not None:
+                return
+            self._write(self._merged_documents())
+
+    def rebuild(self, documents: Iterable[Tuple[str, str, str]]):
+        """Replace the snapshot with one built from (docid, title, citation) tuples"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with self._lock, open(os.path.join(directory, "write.lock"), "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            self._loaded = True
+            self._write(documents)
+
+    def _write(self, documents: Iterable[Tuple[str, str, str]]):
+        arrays = build_arrays(documents, citation_graph.authority_of)
+        with open(self.path + ".tmp", "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(self.path + ".tmp", self.path)
+        self._base = _Snapshot(arrays)
+        self._disk_stamp = self._stamp()
+        self._delta = []
+        self._entries = {}
+        self._unsaved = []
+
+    def _merged_documents(self) -> List[Tuple[str, str, str]]:
+        documents = list(self._base.documents())
+        documents.extend(entry[:3] for _, entry in sorted(self._entries.items()))
+        return documents
+
+    # ------------------------------------------------------------------
+    # Updates
+
+    def _add(self, docid: str, title: str, citation: str):
+        sequence = self._sequence
+        self._sequence += 1
+        authority = citation_graph.authority_of(docid) or 0.0
+        self._entries[sequence] = (docid, title, citation, authority)
+        for key, kind in document_keys(title, citation):
+            bisect.insort(self._delta, (key, sequence, kind))
+        self._unsaved.append((docid, title, citation))
+
+    def add_documents(self, records: Iterable[Dict[str, Any]]):
+        """Index new judgments so they are suggested immediately"""
+        self._ensure_loaded()
+        with self._lock:
+            for record in records:
+                self._add(record["docid"], record.get("title", ""), record.get("citation", ""))
+            merge = len(self._delta) >= settings.autocomplete_delta_max and not self._merging
+            if merge:
+                self._merging = True
+        if merge:
+            threading.Thread(target=self._merge_delta, daemon=True).start()
+
+    def _merge_delta(self):
+        """Fold the delta into a new in-memory snapshot without blocking lookups"""
+        try:
+            with self._lock:
+                cutoff = self._sequence
+                base = self._base
+                documents = list(base.documents())
+                documents.extend(entry[:3] for _, entry in sorted(self._entries.items()))
+            snapshot = _Snapshot(build_arrays(documents, citation_graph.authority_of))
+            with self._lock:
+                if self._base is base:
+                    self._base = snapshot
+                    self._delta = [item for item in self._delta if item[1] >= cutoff]
+                    self._entries = {seq: entry for seq, entry in self._entries.items() if seq >= cutoff}
+        finally:
+            self._merging = False
+
+    # ------------------------------------------------------------------
+    # Queries
+
+    def complete(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Suggestions whose title, party or citation starts with the query"""
+        self._ensure_loaded()
+        prefix = normalize_key(query).encode("utf-8")
+        if not prefix:
+            return []
+        limit = min(limit, settings.autocomplete_max_limit)
+
+        base = self._base
+        delta = self._delta
+        entries = self._entries
+        candidates = []
+        for key in base.search(prefix, limit):
+            doc = int(base.key_doc[key])
+            candidates.append((
+                -float(base.authority[doc]), base.docids.text(doc), doc, key
+            ))
+        position = bisect.bisect_left(delta, (prefix,))
+        while position < len(delta) and delta[position][0].startswith(prefix):
+            _, sequence, kind = delta[position]
+            entry = entries.get(sequence)
+            if entry is not None:
+                candidates.append((-entry[3], entry[0], None, (sequence, kind)))
+            position += 1
+
+        suggestions = []
+        seen = set()
+        for score, docid, doc, key in sorted(candidates, key=lambda item: (item[0], item[1])):
+            if docid in seen:
+                continue
+            seen.add(docid)
+            if doc is None:
+                sequence, kind = key
+                _, title, citation, _ = entries[sequence]
+            else:
+                title, citation, kind = base.titles.text(doc), base.citations.text(doc), int(base.key_kind[key])
+            suggestions.append({
+                "id": docid,
+                "title": title,
+                "citation": citation,
+                "matched": KEY_KINDS[kind],
+                "authority": -score,
+            })
+            if len(suggestions) == limit:
+                break
+        return suggestions
+
+    def stats(self) -> Dict[str, Any]:
+        self._ensure_loaded()
+        return {
+            "documents": len(self._base.docids),
+            "keys": len(self._base.keys),
+            "heavy_prefixes": len(self._base.heavy),
+            "delta_keys": len(self._delta),
+            "unsaved": len(self._unsaved),
+        }
+
+    # ------------------------------------------------------------------
+    # Background refresh
+
+    async def start(self):
+        """Load the snapshot and watch for newer ones written by other processes"""
+        if self._task is not None:
+            return
+        await asyncio.to_thread(self._ensure_loaded)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.autocomplete_refresh_interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                print(f"Error refreshing autocomplete index: {e}")
+
+
+# Shared instance used by the services and API routes
+autocomplete_index = AutocompleteIndex()
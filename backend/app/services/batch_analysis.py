@@ -0,0 +1,279 @@
+import asyncio
+import io
+import multiprocessing
+import os
+import time
+import zipfile
+import zlib
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.serialization import dumps, project
+from app.schemas.legal import BatchAnalysisBundle, BundleCitation, DocumentAnalysisResponse
+from app.services.ai_service import AIService
+from app.services.citation_graph import extract_citation_keys
+from app.services.ingest_service import SUPPORTED_EXTENSIONS, extract_text
+
+# (filename, content, error) for each document in a batch
+BatchDocument = Tuple[str, Optional[bytes], Optional[str]]
+# (filename, content) for each uploaded file; content is None for files too large to read
+BatchUpload = Tuple[str, Optional[bytes]]
+
+# Raised reading a damaged (bad CRC), encrypted or unsupported-compression zip member
+ZIP_MEMBER_ERRORS = (zipfile.BadZipFile, RuntimeError, NotImplementedError, zlib.error)
+# (index, filename, analysis, normalized citations, error) for each completed document
+BatchResult = Tuple[int, str, Optional[DocumentAnalysisResponse], List[str], Optional[str]]
+
+
+class BatchInputError(ValueError):
+    """Raised when a batch upload exceeds the configured limits"""
+
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+async def read_uploads(files) -> List[BatchUpload]:
+    """Read uploaded files into memory without exceeding the batch limits.
+
+    Uploads arrive spooled to temporary files, so each is read in chunks and
+    the batch is rejected as soon as its total passes batch_analysis_max_bytes.
+    Files other than zip archives stop being read once they pass
+    max_file_size and are reported as too large.
+    """
+    if len(files) > settings.batch_analysis_max_files:
+        raise BatchInputError(f"Batch exceeds {settings.batch_analysis_max_files} files")
+    uploads: List[BatchUpload] = []
+    total = 0
+    for file in files:
+        filename = file.filename or ""
+        size = file.size or 0
+        if total + size > settings.batch_analysis_max_bytes:
+            raise BatchInputError(f"Batch exceeds {settings.batch_analysis_max_bytes} bytes")
+        limit = None if filename.lower().endswith(".zip") else settings.max_file_size
+        if limit is not None and size > limit:
+            uploads.append((filename, None))
+            continue
+
+        chunks = []
+        read = 0
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            read += len(chunk)
+            if total + read > settings.batch_analysis_max_bytes:
+                raise BatchInputError(f"Batch exceeds {settings.batch_analysis_max_bytes} bytes")
+            if limit is not None and read > limit:
+                chunks = None
+                break
+            chunks.append(chunk)
+        total += read
+        uploads.append((filename, b"".join(chunks) if chunks is not None else None))
+    return uploads
+
+
+def expand_uploads(uploads: List[BatchUpload]) -> List[BatchDocument]:
+    """Turn uploaded files into batch documents, unpacking zip archives member by member.
+
+    Unsupported, oversized or unreadable files become documents with an error
+    so they are reported alongside the rest instead of failing the whole batch.
+    Members are inflated here, so call it off the event loop.
+    """
+    documents: List[BatchDocument] = []
+    total = 0
+
+    def add(filename: str, size: Optional[int], read):
+        nonlocal total
+        if not filename.lower().endswith(SUPPORTED_EXTENSIONS):
+            documents.append((filename, None, "Unsupported file format"))
+        elif size is None or size > settings.max_file_size:
+            documents.append((filename, None, "File too large"))
+        else:
+            total += size
+            if total > settings.batch_analysis_max_bytes:
+                raise BatchInputError(f"Batch exceeds {settings.batch_analysis_max_bytes} bytes")
+            try:
+                documents.append((filename, read(), None))
+            except ZIP_MEMBER_ERRORS:
+                documents.append((filename, None, "Unreadable zip member"))
+        if len(documents) > settings.batch_analysis_max_files:
+            raise BatchInputError(f"Batch exceeds {settings.batch_analysis_max_files} files")
+
+    for filename, content in uploads:
+        if not filename.lower().endswith(".zip"):
+            add(filename, len(content) if content is not None else None, lambda: content)
+            continue
+        try:
+            archive = zipfile.ZipFile(io.BytesIO(content))
+        except zipfile.BadZipFile:
+            documents.append((filename, None, "Invalid zip archive"))
+            continue
+        with archive:
+            for info in archive.infolist():
+                name = info.filename
+                if info.is_dir() or name.startswith("__MACOSX/") or os.path.basename(name).startswith("."):
+                    continue
+                # Sizes come from the archive directory, checked before anything is inflated
+                add(f"{filename}/{name}", info.file_size, lambda: archive.read(info))
+    return documents
+
+
+class _Bundle:
+    """Accumulates the merged view of a batch as documents complete"""
+
+    def __init__(self):
+        self.documents = 0
+        self.failed = 0
+        self.citations: Dict[str, Dict[int, str]] = {}  # normalized citation -> index -> filename
+        self.judges: Dict[str, None] = {}
+        self.legal_issues: Dict[str, None] = {}
+
+    def add(self, index: int, filename: str, analysis: DocumentAnalysisResponse, citations: List[str]):
+        self.documents += 1
+        for citation in citations:
+            self.citations.setdefault(citation, {})[index] = filename
+        self.judges.update(dict.fromkeys(analysis.judges))
+        self.legal_issues.update(dict.fromkeys(analysis.legal_issues))
+
+    def fail(self):
+        self.failed += 1
+
+    def build(self, processing_time: float) -> BatchAnalysisBundle:
+        # Citations shared by the most documents first, documents in upload order
+        citations = sorted(self.citations.items(), key=lambda item: -len(item[1]))
+        return BatchAnalysisBundle(
+            documents=self.documents,
+            failed=self.failed,
+            citations=[
+                BundleCitation(citation=citation, documents=[documents[index] for index in sorted(documents)])
+                for citation, documents in citations
+            ],
+            judges=list(self.judges),
+            legal_issues=list(self.legal_issues),
+            processing_time=round(processing_time, 3)
+        )
+
+
+class BatchAnalyzer:
+    """Analyze case bundles with text extraction spread over a process pool.
+
+    PDF and DOCX parsing is CPU-bound pure Python, so it runs in separate
+    processes. At most `max_concurrency` documents are in flight per server
+    process, across all batch requests. When a client disconnects, its queued
+    extractions are cancelled, and if no other batch is using the pool, the
+    worker processes still parsing its documents are terminated.
+    """
+
+    def __init__(self, max_concurrency: int, extract_workers: int):
+        self.max_concurrency = max_concurrency
+        self.extract_workers = extract_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._active = 0  # batches currently running
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._pool = None
+        self._semaphore = None
+        self._active = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawn rather than fork: server processes run threads and an event loop
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.extract_workers or os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _terminate(self):
+        """Stop the pool, killing jobs in progress; the next batch starts a fresh one"""
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        # ProcessPoolExecutor has no public way to stop a running job
+        processes = list((getattr(pool, "_processes", None) or {}).values())
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+    async def _extract(self, filename: str, content: bytes, jobs: List[Future]) -> str:
+        job = self._get_pool().submit(extract_text, filename, content)
+        jobs.append(job)
+        try:
+            return await asyncio.wrap_future(job)
+        except BrokenProcessPool:
+            # A worker died (e.g. a malformed PDF crashed the parser); start a fresh pool next time
+            self._pool = None
+            raise
+
+    async def _analyze(self, ai_service: AIService, index: int, document: BatchDocument, analysis_type: str,
+                       jobs: List[Future]) -> BatchResult:
+        filename, content, error = document
+        del document
+        if error:
+            return index, filename, None, [], error
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            try:
+                text = await self._extract(filename, content, jobs)
+                del content  # free the upload while the text is analyzed
+                if not text.strip():
+                    return index, filename, None, [], "Could not extract text from document"
+                analysis = await ai_service.analyze_text(text, analysis_type)
+                # Normalized keys merge "AIR 1973 SC 1461" however each document spells it
+                return index, filename, analysis, extract_citation_keys(text), None
+            except Exception as e:
+                return index, filename, None, [], str(e) or e.__class__.__name__
+
+    async def run(self, documents: List[BatchDocument], analysis_type: str = "summary") -> AsyncIterator[Dict[str, Any]]:
+        """Yield a start event, one event per document as it completes, then the merged bundle"""
+        started = time.perf_counter()
+        ai_service = AIService()
+        bundle = _Bundle()
+        yield {"event": "start", "files": len(documents)}
+
+        jobs: List[Future] = []
+        tasks = [
+            asyncio.ensure_future(self._analyze(ai_service, index, document, analysis_type, jobs))
+            for index, document in enumerate(documents)
+        ]
+        # Each task holds its own document now, so its content can be freed once extracted
+        documents.clear()
+        self._active += 1
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, filename, analysis, citations, error = await next_done
+                if error:
+                    bundle.fail()
+                    yield {"event": "error", "index": index, "filename": filename, "detail": error}
+                else:
+                    bundle.add(index, filename, analysis, citations)
+                    yield {"event": "document", "index": index, "filename": filename, "analysis": project(analysis)}
+            yield {"event": "bundle", "bundle": project(bundle.build(time.perf_counter() - started))}
+        finally:
+            self._active -= 1
+            # The client went away mid-batch; stop analyzing for it
+            for task in tasks:
+                task.cancel()
+            running = [job for job in jobs if not job.cancel() and not job.done()]
+            if running and not self._active:
+                self._terminate()
+
+    async def stream(self, documents: List[BatchDocument], analysis_type: str = "summary") -> AsyncIterator[bytes]:
+        """Batch events as newline-delimited JSON"""
+        async for event in self.run(documents, analysis_type):
+            yield dumps(event) + b"\n"
+
+
+batch_analyzer = BatchAnalyzer(
+    max_concurrency=settings.batch_analysis_max_concurrency,
+    extract_workers=settings.batch_analysis_extract_workers,
+)
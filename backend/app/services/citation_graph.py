@@ -0,0 +1,477 @@
+import asyncio
+import fcntl
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+from app.core.config import settings
+
+# Reporter citations such as "AIR 1973 SC 1461" and "(1973) 4 SCC 225"
+REPORTER_CITATION = re.compile(r'\b([A-Z]{2,})\s+(\d{4})\s+([A-Z]{2,})\s+(\d+)\b')
+VOLUME_CITATION = re.compile(r'\((\d{4})\)\s*(\d+)\s+([A-Z]{2,})\s+(\d+)\b')
+
+
+def normalize_citation(citation: str) -> Optional[str]:
+    """Normalize a citation string to the key used to resolve graph edges"""
+    match = REPORTER_CITATION.search(citation or "")
+    if match:
+        return " ".join(match.groups())
+    match = VOLUME_CITATION.search(citation or "")
+    if match:
+        year, volume, reporter, page = match.groups()
+        return f"({year}) {volume} {reporter} {page}"
+    return None
+
+
+def extract_citation_keys(text: str) -> List[str]:
+    """Find every citation in a judgment, normalized and de-duplicated in order"""
+    keys = {}
+    for match in REPORTER_CITATION.finditer(text):
+        keys.setdefault(" ".join(match.groups()), None)
+    for match in VOLUME_CITATION.finditer(text):
+        year, volume, reporter, page = match.groups()
+        keys.setdefault(f"({year}) {volume} {reporter} {page}", None)
+    return list(keys)
+
+
+def _build_csr(src: np.ndarray, dst: np.ndarray, n: int, weight: np.ndarray):
+    """Build (indptr, indices) for the adjacency src -> dst, each row sorted by descending weight"""
+    order = np.lexsort((-weight[dst], src))
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return indptr, dst[order].astype(np.int32)
+
+
+def pagerank(src: np.ndarray, dst: np.ndarray, n: int, damping: float = 0.85,
+             max_iter: int = 100, tol: float = 1e-8) -> np.ndarray:
+    """PageRank by power iteration over an edge list, with dangling mass spread uniformly"""
+    if n == 0:
+        return np.zeros(0, dtype=np.float64)
+    out_degree = np.bincount(src, minlength=n).astype(np.float64)
+    dangling = out_degree == 0
+    safe_degree = np.where(dangling, 1.0, out_degree)
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        spread = np.bincount(dst, weights=(rank / safe_degree)[src], minlength=n)
+        updated = (1.0 - damping) / n + damping * (spread + rank[dangling].sum() / n)
+        converged = np.abs(updated - rank).sum() < tol
+        rank = updated
+        if converged:
+            break
+    return rank
+
+
+class CitationGraph:
+    """Citation graph over the local corpus stored as CSR arrays of node ids.
+
+    Nodes are corpus documents; an edge u -> v means u cites v. Citations are
+    resolved through each document's own normalized citation, and citations to
+    documents not yet in the corpus wait in a pending table until they arrive.
+    New edges go to a small delta that is merged into the CSR arrays, and
+    PageRank recomputed, once it grows past citation_graph_rebuild_threshold.
+    Inside the server that merge runs on a worker thread, off the event loop.
+
+    Each worker process holds its own copy. Saving merges the documents this
+    process added into whatever is on disk, so concurrent writers (server
+    workers and the ingest CLI) do not overwrite each other, and running
+    servers reload graphs saved by other processes.
+    """
+
+    def __init__(self, base_dir: str = None):
+        self.base_dir = base_dir or settings.citation_graph_dir
+        self._lock = threading.RLock()  # guards the graph state; held only briefly
+        self._rebuild_lock = threading.RLock()  # serializes rebuilds, saves and reloads
+        self._rebuilding = False
+        self._task: Optional[asyncio.Task] = None
+        self._reset()
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._lock = threading.RLock()
+        self._rebuild_lock = threading.RLock()
+        self._rebuilding = False
+        self._task = None
+
+    def _reset(self):
+        self._loaded = False
+        self._disk_stamp = None
+        self._unsaved: List[Dict[str, Any]] = []
+        self.docids: List[str] = []
+        self.titles: List[str] = []
+        self.citations: List[str] = []
+        self.node_of: Dict[str, int] = {}
+        self.node_of_citation: Dict[str, int] = {}
+        self.pending: Dict[str, List[int]] = {}
+        self.out_indptr = np.zeros(1, dtype=np.int64)
+        self.out_indices = np.zeros(0, dtype=np.int32)
+        self.in_indptr = np.zeros(1, dtype=np.int64)
+        self.in_indices = np.zeros(0, dtype=np.int32)
+        self.authority = np.zeros(0, dtype=np.float32)
+        self._delta_out: Dict[int, List[int]] = {}
+        self._delta_in: Dict[int, List[int]] = {}
+        self._delta_edges = 0
+
+    # ------------------------------------------------------------------
+    # Persistence
+
+    def _paths(self):
+        return os.path.join(self.base_dir, "graph.npz"), os.path.join(self.base_dir, "nodes.json")
+
+    def _read(self) -> Optional[Dict[str, Any]]:
+        """Graph state saved on disk, or None if nothing has been saved"""
+        arrays_path, nodes_path = self._paths()
+        if not (os.path.exists(arrays_path) and os.path.exists(nodes_path)):
+            return None
+        stamp = self._stamp()
+        with open(nodes_path, encoding="utf-8") as f:
+            nodes = json.load(f)
+        node_of_citation = {}
+        for node, citation in enumerate(nodes["citations"]):
+            if citation:
+                node_of_citation.setdefault(citation, node)
+        with np.load(arrays_path) as arrays:
+            state = {name: arrays[name] for name in ("out_indptr", "out_indices", "in_indptr", "in_indices", "authority")}
+        state.update(
+            _disk_stamp=stamp,
+            docids=nodes["docids"],
+            titles=nodes["titles"],
+            citations=nodes["citations"],
+            pending=nodes["pending"],
+            node_of={docid: node for node, docid in enumerate(nodes["docids"])},
+            node_of_citation=node_of_citation,
+        )
+        return state
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            state = self._read()
+            if state is not None:
+                self.__dict__.update(state)
+            self._loaded = True
+
+    def _stamp(self):
+        stat = os.stat(self._paths()[1])
+        return stat.st_ino, stat.st_mtime_ns
+
+    def refresh(self) -> bool:
+        """Reload the graph if another process (e.g. the ingest CLI) saved a newer one"""
+        self._ensure_loaded()
+        with self._rebuild_lock:
+            try:
+                if self._stamp() == self._disk_stamp:
+                    return False
+            except FileNotFoundError:
+                return False
+            # Parse the new files without holding the state lock, then swap them in
+            state = self._read()
+            if state is None:
+                return False
+            with self._lock:
+                unsaved = self._unsaved
+                self._reset()
+                self.__dict__.update(state)
+                self._loaded = True
+                # Documents added here but not yet saved stay in the graph
+                self._add(unsaved, merge=False)
+        return True
+
+    async def start(self):
+        """Load the graph and watch for newer ones written by other processes"""
+        if self._task is not None:
+            return
+        await asyncio.to_thread(self._ensure_loaded)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.citation_graph_refresh_interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                print(f"Error refreshing citation graph: {e}")
+
+    @property
+    def dirty(self) -> bool:
+        """Whether this process added judgments that are not on disk yet"""
+        return bool(self._unsaved)
+
+    def save(self):
+        """Merge this process's additions with the graph on disk and write it atomically"""
+        self._ensure_loaded()
+        os.makedirs(self.base_dir, exist_ok=True)
+        with self._rebuild_lock, self._lock, open(os.path.join(self.base_dir, "write.lock"), "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            arrays_path, nodes_path = self._paths()
+            if os.path.exists(nodes_path) and self._stamp() != self._disk_stamp:
+                # Another process saved since we loaded; replay our additions on top
+                unsaved = self._unsaved
+                self._reset()
+                self._ensure_loaded()
+                self._add(unsaved, merge=False)
+            if not self._unsaved and self._disk_stamp is not None and not self._delta_edges:
+                return
+            self._write()
+
+    def rebuild_from(self, records: Iterable[Dict[str, Any]]):
+        """Replace the graph with one built from corpus records"""
+        os.makedirs(self.base_dir, exist_ok=True)
+        with self._rebuild_lock, self._lock, open(os.path.join(self.base_dir, "write.lock"), "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            self._reset()
+            self._loaded = True
+            for record in records:
+                self._add([self._entry(record)], merge=False)
+            self._write()
+
+    def _write(self):
+        with self._lock:
+            arrays_path, nodes_path = self._paths()
+            if self._delta_edges or len(self.authority) != len(self.docids):
+                self.rebuild()
+            with open(arrays_path + ".tmp", "wb") as f:
+                np.savez(
+                    f,
+                    out_indptr=self.out_indptr,
+                    out_indices=self.out_indices,
+                    in_indptr=self.in_indptr,
+                    in_indices=self.in_indices,
+                    authority=self.authority,
+                )
+            with open(nodes_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({
+                    "docids": self.docids,
+                    "titles": self.titles,
+                    "citations": self.citations,
+                    "pending": self.pending,
+                }, f, ensure_ascii=False)
+            os.replace(arrays_path + ".tmp", arrays_path)
+            os.replace(nodes_path + ".tmp", nodes_path)
+            self._disk_stamp = self._stamp()
+            self._unsaved = []
+
+    # ------------------------------------------------------------------
+    # Updates
+
+    def _add_edge(self, source: int, target: int):
+        if source == target:
+            return
+        self._delta_out.setdefault(source, []).append(target)
+        self._delta_in.setdefault(target, []).append(source)
+        self._delta_edges += 1
+
+    def add_documents(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Add corpus records to the graph, resolving their citations; returns new nodes"""
+        self._ensure_loaded()
+        return self._add([self._entry(record) for record in records])
+
+    @staticmethod
+    def _entry(record: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "docid": record["docid"],
+            "title": record.get("title", ""),
+            "citation": normalize_citation(record.get("citation", "")) or "",
+            "keys": extract_citation_keys(record.get("text", "")),
+        }
+
+    def _add(self, entries: List[Dict[str, Any]], merge: bool = True) -> int:
+        added = 0
+        with self._lock:
+            for entry in entries:
+                docid = entry["docid"]
+                if docid in self.node_of:
+                    continue
+                self._unsaved.append(entry)
+                node = len(self.docids)
+                citation = entry["citation"]
+                self.docids.append(docid)
+                self.titles.append(entry["title"])
+                self.citations.append(citation)
+                self.node_of[docid] = node
+                added += 1
+
+                # Earlier documents that cited this one before it was in the corpus
+                if citation and citation not in self.node_of_citation:
+                    self.node_of_citation[citation] = node
+                    for source in self.pending.pop(citation, []):
+                        self._add_edge(source, node)
+
+                for key in entry["keys"]:
+                    if key == citation:
+                        continue
+                    target = self.node_of_citation.get(key)
+                    if target is not None:
+                        self._add_edge(node, target)
+                    else:
+                        self.pending.setdefault(key, []).append(node)
+
+            rebuild = merge and self._delta_edges >= settings.citation_graph_rebuild_threshold
+        if rebuild:
+            self._schedule_rebuild()
+        return added
+
+    def _schedule_rebuild(self):
+        """Merge the delta on a worker thread when called from the event loop, inline otherwise"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.rebuild()
+            return
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        loop.run_in_executor(None, self._background_rebuild)
+
+    def _background_rebuild(self):
+        try:
+            self.rebuild()
+        except Exception as e:
+            print(f"Error rebuilding citation graph: {e}")
+        finally:
+            self._rebuilding = False
+
+    def rebuild(self):
+        """Merge the delta into the CSR arrays and recompute authority scores.
+
+        The state lock is only held to snapshot the graph and to install the
+        result, so queries keep being answered while PageRank runs.
+        """
+        self._ensure_loaded()
+        with self._rebuild_lock:
+            with self._lock:
+                n = len(self.docids)
+                out_indptr, out_indices = self.out_indptr, self.out_indices
+                taken_out = {source: len(targets) for source, targets in self._delta_out.items()}
+                taken_in = {target: len(sources) for target, sources in self._delta_in.items()}
+                taken_edges = self._delta_edges
+                delta_src = [source for source, targets in self._delta_out.items() for _ in targets]
+                delta_dst = [target for targets in self._delta_out.values() for target in targets]
+
+            old_n = len(out_indptr) - 1
+            base_src = np.repeat(np.arange(old_n, dtype=np.int32), np.diff(out_indptr))
+            src = np.concatenate([base_src, np.asarray(delta_src, dtype=np.int32)])
+            dst = np.concatenate([out_indices, np.asarray(delta_dst, dtype=np.int32)])
+
+            # Drop duplicate edges, e.g. a citation resolved from both directions
+            if len(src):
+                edges = np.unique(src.astype(np.int64) * max(n, 1) + dst)
+                src = (edges // max(n, 1)).astype(np.int32)
+                dst = (edges % max(n, 1)).astype(np.int32)
+
+            rank = pagerank(
+                src, dst, n,
+                damping=settings.citation_graph_damping,
+                max_iter=settings.citation_graph_max_iterations
+            )
+            authority = (rank / rank.max()).astype(np.float32) if n else np.zeros(0, dtype=np.float32)
+            # Rows are stored most authoritative first, so top-k queries read k entries
+            out_csr = _build_csr(src, dst, n, authority)
+            in_csr = _build_csr(dst, src, n, authority)
+
+            with self._lock:
+                self.authority = authority
+                self.out_indptr, self.out_indices = out_csr
+                self.in_indptr, self.in_indices = in_csr
+                # Keep edges added while PageRank ran; they belong to the next rebuild
+                self._delta_out = self._remaining(self._delta_out, taken_out)
+                self._delta_in = self._remaining(self._delta_in, taken_in)
+                self._delta_edges -= taken_edges
+
+    @staticmethod
+    def _remaining(delta: Dict[int, List[int]], taken: Dict[int, int]) -> Dict[int, List[int]]:
+        remaining = {}
+        for node, edges in delta.items():
+            rest = edges[taken.get(node, 0):]
+            if rest:
+                remaining[node] = rest
+        return remaining
+
+    # ------------------------------------------------------------------
+    # Queries
+
+    def authority_of(self, docid: str) -> Optional[float]:
+        """Authority score in [0, 1] relative to the most authoritative judgment"""
+        self._ensure_loaded()
+        with self._lock:
+            node = self.node_of.get(docid)
+            if node is None or node >= len(self.authority):
+                return None
+            return float(self.authority[node])
+
+    def _links(self, docid: str, indptr: np.ndarray, indices: np.ndarray,
+               delta: Dict[int, List[int]], limit: int) -> Optional[Dict[str, Any]]:
+        node = self.node_of.get(docid)
+        if node is None:
+            return None
+
+        start, end = (int(indptr[node]), int(indptr[node + 1])) if node < len(indptr) - 1 else (0, 0)
+        count = end - start
+        candidates = indices[start:min(end, start + limit)]
+        extra = delta.get(node)
+        if extra:
+            # Delta edges always involve a node added since the last rebuild, so
+            # they never duplicate an edge already in the CSR arrays
+            extra = np.unique(np.asarray(extra, dtype=np.int32))
+            count += len(extra)
+            candidates = np.concatenate([candidates, extra])
+
+        # Nodes added since the last rebuild have no score yet
+        scored = candidates < len(self.authority)
+        scores = np.zeros(len(candidates), dtype=np.float32)
+        scores[scored] = self.authority[candidates[scored]]
+        order = np.argsort(-scores, kind="stable")[:limit]
+        return {
+            "id": docid,
+            "authority": self.authority_of(docid),
+            "count": count,
+            "results": [
+                {
+                    "id": self.docids[candidates[i]],
+                    "title": self.titles[candidates[i]],
+                    "citation": self.citations[candidates[i]],
+                    "authority": round(float(scores[i]), 6),
+                }
+                for i in order
+            ],
+        }
+
+    def cited_by(self, docid: str, limit: int = 20) -> Optional[Dict[str, Any]]:
+        """Judgments that cite the given one, most authoritative first"""
+        self._ensure_loaded()
+        with self._lock:
+            return self._links(docid, self.in_indptr, self.in_indices, self._delta_in, limit)
+
+    def cites(self, docid: str, limit: int = 20) -> Optional[Dict[str, Any]]:
+        """Judgments cited by the given one, most authoritative first"""
+        self._ensure_loaded()
+        with self._lock:
+            return self._links(docid, self.out_indptr, self.out_indices, self._delta_out, limit)
+
+    def stats(self) -> Dict[str, Any]:
+        self._ensure_loaded()
+        with self._lock:
+            return {
+                "nodes": len(self.docids),
+                "edges": int(len(self.out_indices)) + self._delta_edges,
+                "pending_citations": len(self.pending),
+            }
+
+
+# Shared instance updated as documents enter the corpus
+citation_graph = CitationGraph()
@@ -0,0 +1,457 @@
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from app.core.config import settings
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional, zlib is always available
+    zstandard = None
+
+# Record layout in segment files: header, docid bytes, compressed JSON payload
+RECORD_MAGIC = b"NSCR"
+RECORD_HEADER = struct.Struct("<4sBHII")  # magic, codec, docid length, payload length, crc32
+
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+# Index layout: header followed by open-addressing slots keyed on a 64-bit docid hash
+INDEX_MAGIC = b"NSHX"
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct("<4sIQQQ")  # magic, version, capacity, count, dead bytes
+INDEX_SLOT = struct.Struct("<QIIQ")  # docid hash, segment, record length, offset
+MAX_LOAD_FACTOR = 0.7
+
+SEGMENT_NAME = re.compile(r"^segment-(\d{6})\.dat$")
+
+def _docid_hash(docid: str) -> int:
+    value = int.from_bytes(hashlib.blake2b(docid.encode("utf-8"), digest_size=8).digest(), "little")
+    return value or 1  # zero marks an empty slot
+
+
+def _segment_name(segment: int) -> str:
+    return f"segment-{segment:06d}.dat"
+
+
+class CorpusStore:
+    """Append-only store of compressed judgment records with an on-disk docid index.
+
+    Records are appended to segment files and located through a memory-mapped
+    hash index, so a lookup is one index probe plus one read regardless of
+    corpus size. Overwritten records become dead space that is reclaimed by
+    compaction, which runs in a background thread once enough has accumulated.
+
+    Several processes may share a store: writers serialize on a lock file, and
+    readers remap the index when another process has replaced it. Locking uses
+    fcntl, so the store is POSIX-only. All methods do blocking disk I/O; call
+    them from async code through asyncio.to_thread.
+    """
+
+    def __init__(self, base_dir: str = None):
+        self.base_dir = base_dir or settings.corpus_dir
+        self.segment_max_bytes = settings.corpus_segment_max_bytes
+        self.codec = CODEC_ZSTD if settings.corpus_compression == "zstd" and zstandard else CODEC_ZLIB
+        self._lock = threading.RLock()
+        self._read_fds: Dict[int, int] = {}
+        self._retired_fds: List[int] = []
+        self._index: Optional[mmap.mmap] = None
+        self._index_inode: Optional[int] = None
+        self._active_segment: Optional[int] = None
+        self._active_file = None
+        self._compaction_thread: Optional[threading.Thread] = None
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # Start the child with its own lock and handles; the parent's are left untouched
+        self._lock = threading.RLock()
+        self._read_fds = {}
+        self._retired_fds = []
+        self._index = None
+        self._index_inode = None
+        self._active_segment = None
+        self._active_file = None
+        self._compaction_thread = None
+
+    # ------------------------------------------------------------------
+    # Setup
+
+    def _ensure_open(self):
+        if self._index is not None:
+            if os.stat(self._index_path()).st_ino != self._index_inode:
+                # Another process grew or compacted the index
+                with self._lock:
+                    self._map_index(self._index_path())
+            return
+        with self._lock:
+            if self._index is not None:
+                return
+            os.makedirs(self.base_dir, exist_ok=True)
+            with self._process_lock():
+                index_path = self._index_path()
+                if not os.path.exists(index_path):
+                    self._write_empty_index(index_path, settings.corpus_index_initial_capacity)
+                self._map_index(index_path)
+                segments = self._segments()
+                self._open_active_segment(segments[-1] if segments else 1)
+
+    @contextmanager
+    def _process_lock(self):
+        """Exclusive lock shared by every process writing to this store"""
+        with open(os.path.join(self.base_dir, "write.lock"), "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _sync_with_other_writers(self):
+        """Pick up index swaps and segment rollovers made by other processes (lock held)"""
+        if os.stat(self._index_path()).st_ino != self._index_inode:
+            self._map_index(self._index_path())
+        segments = self._segments()
+        if segments and segments[-1] != self._active_segment:
+            self._open_active_segment(segments[-1])
+
+    def _index_path(self) -> str:
+        return os.path.join(self.base_dir, "index.bin")
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.base_dir, _segment_name(segment))
+
+    def _segments(self) -> List[int]:
+        segments = []
+        for name in os.listdir(self.base_dir):
+            match = SEGMENT_NAME.match(name)
+            if match:
+                segments.append(int(match.group(1)))
+        return sorted(segments)
+
+    @staticmethod
+    def _write_empty_index(path: str, capacity: int):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, capacity, 0, 0))
+            f.truncate(INDEX_HEADER.size + capacity * INDEX_SLOT.size)
+        os.replace(tmp_path, path)
+
+    def _map_index(self, path: str):
+        # The previous map is not closed here: concurrent readers may still hold
+        # it, and it is released once the last of them drops its reference
+        with open(path, "r+b") as f:
+            index = mmap.mmap(f.fileno(), 0)
+            inode = os.fstat(f.fileno()).st_ino
+        magic, version, *_ = INDEX_HEADER.unpack_from(index, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError(f"Corrupt corpus index: {path}")
+        self._index = index
+        self._index_inode = inode
+
+    def _open_active_segment(self, segment: int):
+        if self._active_file is not None:
+            self._active_file.close()
+        self._active_segment = segment
+        self._active_file = open(self._segment_path(segment), "ab")
+
+    # ------------------------------------------------------------------
+    # Index
+
+    def _header(self, index: mmap.mmap = None) -> Tuple[int, int, int]:
+        _, _, capacity, count, dead_bytes = INDEX_HEADER.unpack_from(index if index is not None else self._index, 0)
+        return capacity, count, dead_bytes
+
+    def _set_header(self, capacity: int, count: int, dead_bytes: int):
+        INDEX_HEADER.pack_into(self._index, 0, INDEX_MAGIC, INDEX_VERSION, capacity, count, dead_bytes)
+
+    def _find_slot(self, docid: str, docid_hash: int) -> Tuple[int, Optional[Tuple[int, int, int]]]:
+        """Probe for a docid, returning its slot number and location (or the free slot and None)"""
+        index = self._index  # probe a single map even if it is swapped concurrently
+        mask = self._header(index)[0] - 1
+        slot = docid_hash & mask
+        while True:
+            stored_hash, segment, length, offset = INDEX_SLOT.unpack_from(
+                index, INDEX_HEADER.size + slot * INDEX_SLOT.size
+            )
+            if stored_hash == 0:
+                return slot, None
+            if stored_hash == docid_hash and self._read_docid(segment, offset) == docid:
+                return slot, (segment, offset, length)
+            slot = (slot + 1) & mask
+
+    def _lookup(self, docid: str) -> Optional[Tuple[int, int, int]]:
+        self._ensure_open()
+        try:
+            return self._find_slot(docid, _docid_hash(docid))[1]
+        except FileNotFoundError:
+            # A concurrent compaction removed the segment; probe the new index
+            return self._find_slot(docid, _docid_hash(docid))[1]
+
+    def _index_put(self, docid: str, segment: int, offset: int, length: int):
+        capacity, count, dead_bytes = self._header()
+        if (count + 1) > capacity * MAX_LOAD_FACTOR:
+            self._grow_index(capacity * 2)
+            capacity, count, dead_bytes = self._header()
+
+        docid_hash = _docid_hash(docid)
+        slot, existing = self._find_slot(docid, docid_hash)
+        INDEX_SLOT.pack_into(
+            self._index, INDEX_HEADER.size + slot * INDEX_SLOT.size,
+            docid_hash, segment, length, offset
+        )
+        if existing is None:
+            count += 1
+        else:
+            dead_bytes += existing[2]
+        self._set_header(capacity, count, dead_bytes)
+
+    def _slots(self) -> Iterator[Tuple[int, int, int, int]]:
+        capacity = self._header()[0]
+        for slot in range(capacity):
+            entry = INDEX_SLOT.unpack_from(self._index, INDEX_HEADER.size + slot * INDEX_SLOT.size)
+            if entry[0] != 0:
+                yield entry
+
+    def _replace_index(self, suffix: str, capacity: int, count: int, dead_bytes: int, entries):
+        """Write a new index from (hash, segment, length, offset) entries with unique docids and swap it in.
+
+        Slots are placed by hash alone, so no records need to be read.
+        """
+        tmp_path = self._index_path() + suffix
+        self._write_empty_index(tmp_path, capacity)
+        with open(tmp_path, "r+b") as f:
+            new_index = mmap.mmap(f.fileno(), 0)
+        mask = capacity - 1
+        for docid_hash, segment, length, offset in entries:
+            slot = docid_hash & mask
+            while INDEX_SLOT.unpack_from(new_index, INDEX_HEADER.size + slot * INDEX_SLOT.size)[0] != 0:
+                slot = (slot + 1) & mask
+            INDEX_SLOT.pack_into(
+                new_index, INDEX_HEADER.size + slot * INDEX_SLOT.size,
+                docid_hash, segment, length, offset
+            )
+        INDEX_HEADER.pack_into(new_index, 0, INDEX_MAGIC, INDEX_VERSION, capacity, count, dead_bytes)
+        new_index.flush()
+        new_index.close()
+        os.replace(tmp_path, self._index_path())
+        self._map_index(self._index_path())
+
+    def _grow_index(self, capacity: int):
+        """Rehash into an index with more slots"""
+        _, count, dead_bytes = self._header()
+        self._replace_index(".grow", capacity, count, dead_bytes, list(self._slots()))
+
+    # ------------------------------------------------------------------
+    # Segments
+
+    def _read_fd(self, segment: int) -> int:
+        fd = self._read_fds.get(segment)
+        if fd is None:
+            fd = os.open(self._segment_path(segment), os.O_RDONLY)
+            self._read_fds[segment] = fd
+        return fd
+
+    def _read_docid(self, segment: int, offset: int) -> Optional[str]:
+        fd = self._read_fd(segment)
+        header = os.pread(fd, RECORD_HEADER.size, offset)
+        if len(header) < RECORD_HEADER.size:
+            return None
+        magic, _, docid_length, _, _ = RECORD_HEADER.unpack(header)
+        if magic != RECORD_MAGIC:
+            return None
+        return os.pread(fd, docid_length, offset + RECORD_HEADER.size).decode("utf-8")
+
+    def _read_record(self, segment: int, offset: int, length: int) -> Dict[str, Any]:
+        raw = os.pread(self._read_fd(segment), length, offset)
+        return self._decode(raw)
+
+    def _encode(self, record: Dict[str, Any]) -> bytes:
+        docid = record["docid"].encode("utf-8")
+        payload = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if self.codec == CODEC_ZSTD:
+            payload = zstandard.ZstdCompressor(level=settings.corpus_compression_level).compress(payload)
+        else:
+            payload = zlib.compress(payload, settings.corpus_compression_level)
+        header = RECORD_HEADER.pack(RECORD_MAGIC, self.codec, len(docid), len(payload), zlib.crc32(payload))
+        return header + docid + payload
+
+    @staticmethod
+    def _decode(raw: bytes) -> Dict[str, Any]:
+        magic, codec, docid_length, payload_length, crc = RECORD_HEADER.unpack_from(raw, 0)
+        start = RECORD_HEADER.size + docid_length
+        payload = raw[start:start + payload_length]
+        if magic != RECORD_MAGIC or len(payload) != payload_length or zlib.crc32(payload) != crc:
+            raise ValueError("Corrupt corpus record")
+        if codec == CODEC_ZSTD:
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read this corpus record")
+            payload = zstandard.ZstdDecompressor().decompress(payload)
+        else:
+            payload = zlib.decompress(payload)
+        return json.loads(payload)
+
+    def _append(self, data: bytes) -> Tuple[int, int]:
+        # Other processes may have appended since our last write
+        self._active_file.seek(0, os.SEEK_END)
+        if self._active_file.tell() >= self.segment_max_bytes:
+            self._active_file.flush()
+            self._open_active_segment(self._active_segment + 1)
+        offset = self._active_file.tell()
+        self._active_file.write(data)
+        return self._active_segment, offset
+
+    def _scan_segment(self, segment: int) -> Iterator[Tuple[int, int, str, bytes]]:
+        """Yield (offset, length, docid, raw record) for every record in a segment"""
+        with open(self._segment_path(segment), "rb") as f:
+            offset = 0
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    return
+                magic, _, docid_length, payload_length, _ = RECORD_HEADER.unpack(header)
+                if magic != RECORD_MAGIC:
+                    return  # torn write at the tail of a segment
+                body = f.read(docid_length + payload_length)
+                if len(body) < docid_length + payload_length:
+                    return
+                length = RECORD_HEADER.size + len(body)
+                yield offset, length, body[:docid_length].decode("utf-8"), header + body
+                offset += length
+
+    # ------------------------------------------------------------------
+    # Public API
+
+    def get(self, docid: str) -> Optional[Dict[str, Any]]:
+        """Read a record by docid"""
+        location = self._lookup(docid)
+        if location is None:
+            return None
+        segment, offset, length = location
+        try:
+            return self._read_record(segment, offset, length)
+        except FileNotFoundError:
+            # A concurrent compaction removed the segment; retry against the new index
+            location = self._lookup(docid)
+            return self._read_record(*location) if location else None
+
+    def contains(self, docid: str) -> bool:
+        """Check whether a docid is stored"""
+        return self._lookup(docid) is not None
+
+    def put(self, record: Dict[str, Any]):
+        """Append a record, replacing any earlier version with the same docid"""
+        self.put_many([record])
+
+    def put_many(self, records: Iterable[Dict[str, Any]], sync: bool = False) -> int:
+        """Append a batch of records under one lock and a single flush"""
+        self._ensure_open()
+        encoded = [(record["docid"], self._encode(record)) for record in records]
+        if not encoded:
+            return 0
+
+        with self._lock, self._process_lock():
+            self._sync_with_other_writers()
+            locations = []
+            for docid, data in encoded:
+                segment, offset = self._append(data)
+                locations.append((docid, segment, offset, len(data)))
+            # Records must be readable before the index points at them
+            self._active_file.flush()
+            if sync:
+                os.fsync(self._active_file.fileno())
+            for docid, segment, offset, length in locations:
+                self._index_put(docid, segment, offset, length)
+            if sync:
+                self._index.flush()
+
+        self.maybe_compact()
+        return len(encoded)
+
+    def __len__(self) -> int:
+        self._ensure_open()
+        return self._header()[1]
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over the live records in storage order"""
+        self._ensure_open()
+        for segment in self._segments():
+            for offset, length, docid, raw in self._scan_segment(segment):
+                if self._lookup(docid) == (segment, offset, length):
+                    yield self._decode(raw)
+
+    def stats(self) -> Dict[str, Any]:
+        """Report record count, disk usage and dead space"""
+        self._ensure_open()
+        capacity, count, dead_bytes = self._header()
+        segments = self._segments()
+        total_bytes = sum(os.path.getsize(self._segment_path(segment)) for segment in segments)
+        return {
+            "documents": count,
+            "segments": len(segments),
+            "total_bytes": total_bytes,
+            "dead_bytes": dead_bytes,
+            "index_capacity": capacity,
+            "compacting": self._compaction_thread is not None and self._compaction_thread.is_alive(),
+        }
+
+    # ------------------------------------------------------------------
+    # Compaction
+
+    def maybe_compact(self):
+        """Start a background compaction when dead space crosses the configured threshold"""
+        _, _, dead_bytes = self._header()
+        if dead_bytes < settings.corpus_compact_min_dead_bytes:
+            return
+        with self._lock:
+            if self._compaction_thread is not None and self._compaction_thread.is_alive():
+                return
+            self._compaction_thread = threading.Thread(target=self.compact, name="corpus-compaction", daemon=True)
+            self._compaction_thread.start()
+
+    def compact(self):
+        """Rewrite live records into fresh segments and drop the old ones"""
+        self._ensure_open()
+        with self._lock, self._process_lock():
+            self._sync_with_other_writers()
+            old_segments = self._segments()
+            _, count, _ = self._header()
+            self._active_file.flush()
+
+            # New segments are numbered after the old ones so names are never reused
+            self._open_active_segment(old_segments[-1] + 1 if old_segments else 1)
+            capacity = settings.corpus_index_initial_capacity
+            while count + 1 > capacity * MAX_LOAD_FACTOR:
+                capacity *= 2
+
+            live = []
+            for segment in old_segments:
+                for offset, length, docid, raw in self._scan_segment(segment):
+                    if self._lookup(docid) == (segment, offset, length):
+                        new_segment, new_offset = self._append(raw)
+                        live.append((_docid_hash(docid), new_segment, length, new_offset))
+            self._active_file.flush()
+            os.fsync(self._active_file.fileno())
+
+            # Readers keep using the old index until the new one is complete
+            self._replace_index(".compact", capacity, len(live), 0, live)
+
+            # Descriptors of the old segments may still be in use by readers, so
+            # they are closed one compaction later rather than immediately
+            for fd in self._retired_fds:
+                os.close(fd)
+            self._retired_fds = []
+            for segment in old_segments:
+                fd = self._read_fds.pop(segment, None)
+                if fd is not None:
+                    self._retired_fds.append(fd)
+                os.remove(self._segment_path(segment))
+
+
+# Shared instance filled as judgments are fetched
+corpus_store = CorpusStore()
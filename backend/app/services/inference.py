@@ -0,0 +1,167 @@
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import httpx
+from app.core.config import settings
+
+
+class InferenceError(Exception):
+    """A batched inference call failed; every caller in the batch receives it"""
+
+
+class _Batch:
+    def __init__(self, model: str, parameters: Dict[str, Any]):
+        self.model = model
+        self.parameters = parameters
+        self.inputs: List[Any] = []
+        self.futures: List[asyncio.Future] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class InferenceDispatcher:
+    """Collect concurrent inference requests into micro-batches per model.
+
+    Requests for the same model and generation parameters are queued until the
+    batch is full or the oldest request has waited max_wait_ms, then sent as a
+    single call with a list of inputs. Results are fanned back to each caller in
+    input order.
+    """
+
+    def __init__(
+        self,
+        api_url: str = "https://api-inference.huggingface.co/models",
+        max_batch_size: int = None,
+        max_wait_ms: float = None,
+        max_concurrent_batches: int = None,
+        timeout: float = None,
+    ):
+        self.api_url = api_url
+        self.max_batch_size = max_batch_size or settings.inference_max_batch_size
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else settings.inference_max_wait_ms) / 1000
+        self.max_concurrent_batches = max_concurrent_batches or settings.inference_max_concurrent_batches
+        self.timeout = timeout or settings.inference_timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._open: Dict[Tuple[str, str], _Batch] = {}
+        self._tasks = set()
+        self.requests = 0
+        self.batches = 0
+        self.batched_inputs = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self._last_error_at: Optional[float] = None
+
+    def _bind_loop(self) -> asyncio.AbstractEventLoop:
+        # The client and semaphore belong to the loop they were created on
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._client = httpx.AsyncClient(
+                headers={
+                    "Authorization": f"Bearer {settings.huggingface_api_key}",
+                    "Content-Type": "application/json"
+                },
+                timeout=self.timeout,
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_batches)
+            self._open = {}
+            self._tasks = set()
+        return loop
+
+    async def infer(self, model: str, inputs: Any, parameters: Optional[Dict[str, Any]] = None) -> Any:
+        """Queue one input for a model and wait for its result from the batched call"""
+        loop = self._bind_loop()
+        parameters = parameters or {}
+        # Only requests with identical parameters can share a call
+        key = (model, json.dumps(parameters, sort_keys=True))
+
+        batch = self._open.get(key)
+        if batch is None:
+            batch = self._open[key] = _Batch(model, parameters)
+            batch.timer = loop.call_later(self.max_wait, self._flush, key)
+
+        future = loop.create_future()
+        batch.inputs.append(inputs)
+        batch.futures.append(future)
+        self.requests += 1
+        if len(batch.inputs) >= self.max_batch_size:
+            self._flush(key)
+        return await future
+
+    def _flush(self, key: Tuple[str, str]):
+        batch = self._open.pop(key, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+        task = self._loop.create_task(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: _Batch):
+        try:
+            async with self._semaphore:
+                results = await self._call(batch)
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e) or type(e).__name__
+            self._last_error_at = time.time()
+            error = e if isinstance(e, InferenceError) else InferenceError(self.last_error)
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for future, result in zip(batch.futures, results):
+            # Callers that gave up (cancelled or timed out) are skipped
+            if not future.done():
+                future.set_result(result)
+
+    async def _call(self, batch: _Batch) -> List[Any]:
+        self.batches += 1
+        self.batched_inputs += len(batch.inputs)
+        single = len(batch.inputs) == 1
+        payload = {
+            "inputs": batch.inputs[0] if single else batch.inputs,
+            "parameters": batch.parameters
+        }
+        response = await self._client.post(f"{self.api_url}/{batch.model}", json=payload)
+        if response.status_code != 200:
+            raise InferenceError(f"{batch.model} returned {response.status_code}")
+
+        result = response.json()
+        if single:
+            return [result]
+        if not isinstance(result, list) or len(result) != len(batch.inputs):
+            raise InferenceError(f"{batch.model} returned an unexpected batch result")
+        return result
+
+    async def close(self):
+        """Send queued batches, wait for in-flight calls and close the HTTP client"""
+        if self._loop is None:
+            return
+        for key in list(self._open):
+            self._flush(key)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._client.aclose()
+        self._loop = None
+
+    def status(self) -> Dict[str, Any]:
+        """Batching statistics for the health endpoint"""
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": round(self.batched_inputs / self.batches, 2) if self.batches else None,
+            "queued": sum(len(batch.inputs) for batch in self._open.values()),
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "last_error_age_seconds": (
+                round(time.time() - self._last_error_at, 1) if self._last_error_at else None
+            ),
+        }
+
+
+# Shared instance so requests from every AIService in this process batch together
+inference_dispatcher = InferenceDispatcher()
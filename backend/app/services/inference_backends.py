@@ -0,0 +1,262 @@
+import asyncio
+import re
+from typing import Any, Dict, List, Optional
+import numpy as np
+from app.core.config import settings
+from app.services.inference import InferenceDispatcher, inference_dispatcher
+from app.services.segmenter import Sentences, segment
+
+INFERENCE_BACKENDS = ("remote", "local", "local_first")
+
+WORD = re.compile(r"[a-z][a-z']{2,}")
+STOPWORDS = frozenset("""
+    the and for that with this from was were are has have had not but which
+    his her its their they them there been being into upon such any all also
+    shall may would could should said under other than then where when
+    who whom whose what these those only very more most some same each both
+    our out own per via did does done can will him she you your
+""".split())
+
+# Judges: "Justice H.R. Khanna", "Hon'ble Mr. Justice Sikri", "Khanna, J.", "Sikri, C.J."
+JUSTICE_PREFIX = re.compile(
+    r"\bJustice\s+((?:[A-Z]\.\s*){0,3}[A-Z][a-z]+(?:\s+(?:[A-Z]\.\s*)*[A-Z][a-z]+){0,3})"
+)
+JUDGE_SUFFIX = re.compile(
+    r"\b((?:[A-Z]\.\s*){0,3}[A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,2}),?\s+(?:C\.\s?J\.(?:I\.)?|J\.|JJ\.)(?=[\s,;)]|$)"
+)
+HONORIFIC = re.compile(r"\b(?:Hon'?ble|Honou?rable)\s+(?:Mr\.|Mrs\.|Ms\.|Dr\.)?\s*([A-Z][a-z]+\s+[A-Z][a-z]+)")
+NOT_A_NAME = frozenset({"The", "This", "That", "Court", "Supreme", "High", "Chief", "Justice", "Learned", "Hon", "Mr", "Mrs", "Ms"})
+
+# Parties: "A ... Appellant" / "B ... Respondent" lines, or an "A v. B" title
+PARTY_ROLE = re.compile(
+    r"^\s*(.{3,120}?)\s*(?:\.{2,}|…|:|-{2,})\s*(Petitioner|Appellant|Plaintiff|Complainant|Respondent|Defendant|Accused)s?\b",
+    re.IGNORECASE | re.MULTILINE
+)
+VERSUS = re.compile(r"^\s*(.{3,120}?)\s+(?:v\.|vs\.?|versus)\s+(.{3,120}?)\s*(?:on\s+\d|\(|$)", re.IGNORECASE | re.MULTILINE)
+PETITIONER_ROLES = ("petitioner", "appellant", "plaintiff", "complainant")
+
+
+class TextRankSummarizer:
+    """Extractive summarizer ranking sentences by TF-IDF similarity centrality"""
+
+    def __init__(self, max_sentences: int = None, max_candidates: int = None, max_terms: int = None,
+                 damping: float = 0.85):
+        self.max_sentences = max_sentences or settings.local_summary_sentences
+        self.max_candidates = max_candidates or settings.local_summary_max_candidates
+        self.max_terms = max_terms or settings.local_summary_max_terms
+        self.damping = damping
+
+    def rank(self, sentences: List[str]) -> np.ndarray:
+        """TextRank score per sentence"""
+        vocabulary: Dict[str, int] = {}
+        rows, cols = [], []
+        for row, sentence in enumerate(sentences):
+            for word in WORD.findall(sentence.lower()):
+                if word not in STOPWORDS:
+                    rows.append(row)
+                    cols.append(vocabulary.setdefault(word, len(vocabulary)))
+
+        n = len(sentences)
+        if not vocabulary:
+            return np.full(n, 1.0 / n, dtype=np.float32)
+
+        # Term frequencies as (sentence, term, count) triples; most cells of a
+        # sentence-by-vocabulary matrix would be zero
+        size = len(vocabulary)
+        cells, counts = np.unique(np.array(rows, dtype=np.int64) * size + np.array(cols), return_counts=True)
+        rows, cols = cells // size, cells % size
+        document_frequency = np.bincount(cols, minlength=size)
+        values = (np.log1p(counts) * (np.log(n / document_frequency[cols]) + 1.0)).astype(np.float32)
+        norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=n)).astype(np.float32)
+        values /= np.where(norms == 0, 1.0, norms)[rows]
+
+        # Terms in a single sentence add nothing between sentences, so only shared
+        # terms get a dense column, capped at the most widespread max_terms
+        shared = np.flatnonzero(document_frequency > 1)
+        if len(shared) > self.max_terms:
+            shared = shared[np.argsort(-document_frequency[shared], kind="stable")[:self.max_terms]]
+        column = np.full(size, -1, dtype=np.int64)
+        column[shared] = np.arange(len(shared))
+        keep = column[cols] >= 0
+        vectors = np.zeros((n, len(shared)), dtype=np.float32)
+        vectors[rows[keep], column[cols[keep]]] = values[keep]
+
+        transition = vectors @ vectors.T
+        del vectors
+        np.fill_diagonal(transition, 0.0)
+        weights = transition.sum(axis=1, keepdims=True)
+        # Rows without any similar sentence are all zero and stay that way
+        np.divide(transition, weights, out=transition, where=weights > 0)
+
+        scores = np.full(n, 1.0 / n, dtype=np.float32)
+        for _ in range(50):
+            updated = (1 - self.damping) / n + self.damping * (transition.T @ scores)
+            if np.abs(updated - scores).sum() < 1e-6:
+                return updated
+            scores = updated
+        return scores
+
+    def summarize(self, text: str, max_sentences: int = None, sentences: Optional[Sentences] = None) -> str:
+        """Pick the most central sentences and return them in document order"""
+        limit = max_sentences or self.max_sentences
+        # Repeated sentences (headers, boilerplate) would otherwise win every slot
+        sentences = list(dict.fromkeys(
+            sentence for sentence in (sentences if sentences is not None else segment(text))
+            if 5 <= len(sentence.split()) <= 120
+        ))[:self.max_candidates]
+        if len(sentences) <= limit:
+            return " ".join(sentences)
+        scores = self.rank(sentences)
+        chosen = sorted(np.argsort(-scores, kind="stable")[:limit])
+        return " ".join(sentences[i] for i in chosen)
+
+
+class RegexEntityExtractor:
+    """Rule-based extraction of judges and parties from judgment text"""
+
+    def __init__(self, max_judges: int = 5, head_chars: int = 8000):
+        self.max_judges = max_judges
+        self.head_chars = head_chars
+
+    def judges(self, text: str) -> List[str]:
+        head = text[:self.head_chars]
+        judges: List[str] = []
+        seen = set()
+        for pattern in (JUSTICE_PREFIX, JUDGE_SUFFIX, HONORIFIC):
+            for match in pattern.finditer(head):
+                name = " ".join(match.group(1).split())
+                surname = name.split()[-1].strip(".")
+                if name.split()[0] in NOT_A_NAME or surname in NOT_A_NAME:
+                    continue
+                # "Justice H.R. Khanna" and "Khanna, J." are the same judge
+                if surname.lower() in seen:
+                    continue
+                seen.add(surname.lower())
+                judges.append(name)
+        return judges[:self.max_judges]
+
+    def parties(self, text: str) -> Dict[str, str]:
+        head = text[:self.head_chars]
+        parties: Dict[str, str] = {}
+        for match in PARTY_ROLE.finditer(head):
+            role = "petitioner" if match.group(2).lower() in PETITIONER_ROLES else "respondent"
+            parties.setdefault(role, " ".join(match.group(1).split()).strip(" .,:"))
+        if len(parties) < 2:
+            match = VERSUS.search(head)
+            if match:
+                parties.setdefault("petitioner", " ".join(match.group(1).split()).strip(" .,:"))
+                parties.setdefault("respondent", " ".join(match.group(2).split()).strip(" .,:"))
+        return parties
+
+    def extract(self, text: str) -> Dict[str, Any]:
+        return {"judges": self.judges(text), "parties": self.parties(text)}
+
+
+class InferenceBackend:
+    """Interface for model inference behind AIService.
+
+    Each method returns None when the backend cannot serve the task, so callers
+    can fall back; remote failures raise InferenceError.
+    """
+
+    name = "base"
+
+    async def generate(self, prompt: str, parameters: Dict[str, Any]) -> Optional[str]:
+        return None
+
+    async def summarize(self, text: str, sentences: Optional[Sentences] = None) -> Optional[str]:
+        return None
+
+    async def extract_entities(self, text: str) -> Optional[Dict[str, Any]]:
+        return None
+
+
+class RemoteBackend(InferenceBackend):
+    """Hugging Face inference API, called through the micro-batching dispatcher"""
+
+    name = "remote"
+
+    def __init__(self, dispatcher: InferenceDispatcher, chat_model: str, summarization_model: str):
+        self.dispatcher = dispatcher
+        self.chat_model = chat_model
+        self.summarization_model = summarization_model
+
+    @staticmethod
+    def _field(result: Any, field: str) -> Optional[str]:
+        if isinstance(result, list) and len(result) > 0:
+            result = result[0]
+        if isinstance(result, dict):
+            return result.get(field) or None
+        return None
+
+    async def generate(self, prompt: str, parameters: Dict[str, Any]) -> Optional[str]:
+        result = await self.dispatcher.infer(self.chat_model, prompt, parameters)
+        return self._field(result, "generated_text")
+
+    async def summarize(self, text: str, sentences: Optional[Sentences] = None) -> Optional[str]:
+        # Truncate text if too long
+        result = await self.dispatcher.infer(
+            self.summarization_model,
+            text[:1000],
+            {
+                "max_length": 150,
+                "min_length": 50,
+                "do_sample": False
+            }
+        )
+        return self._field(result, "summary_text")
+
+
+class LocalBackend(InferenceBackend):
+    """In-process CPU backend: TextRank summaries and regex entities, no text generation"""
+
+    name = "local"
+
+    def __init__(self, summarizer: TextRankSummarizer = None, entities: RegexEntityExtractor = None):
+        self.summarizer = summarizer or local_summarizer
+        self.entities = entities or local_entities
+
+    async def summarize(self, text: str, sentences: Optional[Sentences] = None) -> Optional[str]:
+        # Ranking is CPU bound, keep it off the event loop
+        summary = await asyncio.to_thread(self.summarizer.summarize, text, None, sentences)
+        return summary or None
+
+    async def extract_entities(self, text: str) -> Optional[Dict[str, Any]]:
+        return self.entities.extract(text)
+
+
+class LocalFirstBackend(InferenceBackend):
+    """Serve each task locally where possible and call the remote API otherwise"""
+
+    name = "local_first"
+
+    def __init__(self, local: InferenceBackend, remote: InferenceBackend):
+        self.local = local
+        self.remote = remote
+
+    async def generate(self, prompt: str, parameters: Dict[str, Any]) -> Optional[str]:
+        return await self.local.generate(prompt, parameters) or await self.remote.generate(prompt, parameters)
+
+    async def summarize(self, text: str, sentences: Optional[Sentences] = None) -> Optional[str]:
+        return await self.local.summarize(text, sentences) or await self.remote.summarize(text, sentences)
+
+    async def extract_entities(self, text: str) -> Optional[Dict[str, Any]]:
+        return await self.local.extract_entities(text) or await self.remote.extract_entities(text)
+
+
+def create_inference_backend(mode: str, chat_model: str, summarization_model: str) -> InferenceBackend:
+    """Build the backend selected by INFERENCE_BACKEND"""
+    if mode not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend {mode!r}, expected one of {', '.join(INFERENCE_BACKENDS)}")
+    remote = RemoteBackend(inference_dispatcher, chat_model, summarization_model)
+    if mode == "remote":
+        return remote
+    local = LocalBackend()
+    if mode == "local":
+        return local
+    return LocalFirstBackend(local, remote)
+
+
+# Shared local components, also used as the fallback when the remote API fails
+local_summarizer = TextRankSummarizer()
+local_entities = RegexEntityExtractor()
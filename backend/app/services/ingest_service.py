@@ -0,0 +1,315 @@
+import hashlib
+import os
+import re
+import tarfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from app.core.config import settings
+from app.services.ai_service import AIService
+from app.services.legal_service import LegalService, AVAILABLE_COURTS
+from app.services.corpus_store import corpus_store
+from app.services.text_store import text_store
+from app.services.citation_graph import citation_graph
+from app.services.autocomplete import autocomplete_index
+from app.services.metadata_index import metadata_index
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt')
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz')
+
+MONTHS = {
+    name: number for number, name in enumerate(
+        ["january", "february", "march", "april", "may", "june", "july",
+         "august", "september", "october", "november", "december"], start=1
+    )
+}
+NUMERIC_DATE = re.compile(r'\b(\d{1,2})[./-](\d{1,2})[./-]((?:19|20)\d{2})\b')
+WRITTEN_DATE = re.compile(
+    r'\b(\d{1,2})(?:st|nd|rd|th)?\s+(' + '|'.join(MONTHS) + r'),?\s+((?:19|20)\d{2})\b',
+    re.IGNORECASE
+)
+CASE_TITLE = re.compile(r'\b(?:v\.|vs\.?|versus)\s', re.IGNORECASE)
+CITATION = re.compile(r'[A-Z]{2,}\s+\d{4}\s+[A-Z]{2,}\s+\d+')
+
+# Per-process services, created once by the pool initializer
+_ai_service: Optional[AIService] = None
+_legal_service: Optional[LegalService] = None
+
+
+def _init_worker():
+    global _ai_service, _legal_service
+    _ai_service = AIService()
+    _legal_service = LegalService()
+
+
+def extract_text(filename: str, content: bytes) -> str:
+    """Extract text from a PDF, DOCX or TXT file using the AIService extractors"""
+    ai_service = _ai_service or AIService()
+    name = filename.lower()
+    if name.endswith('.pdf'):
+        return ai_service._extract_text_from_pdf(content)
+    if name.endswith('.docx'):
+        return ai_service._extract_text_from_docx(content)
+    if name.endswith('.txt'):
+        return content.decode('utf-8', errors='replace')
+    return ""
+
+
+def _guess_title(text: str, filename: str) -> str:
+    lines = [line.strip() for line in text.splitlines()[:50] if line.strip()]
+    for line in lines:
+        if CASE_TITLE.search(line) and len(line) <= 200:
+            return line
+    return os.path.splitext(os.path.basename(filename))[0]
+
+
+def _guess_court(text: str) -> str:
+    head = text[:5000].lower()
+    for court in AVAILABLE_COURTS:
+        if court.name.lower() in head:
+            return court.name
+    return "Unknown Court"
+
+
+def _guess_date(text: str) -> str:
+    head = text[:5000]
+    match = WRITTEN_DATE.search(head)
+    if match:
+        day, month, year = match.groups()
+        return f"{year}-{MONTHS[month.lower()]:02d}-{int(day):02d}"
+    match = NUMERIC_DATE.search(head)
+    if match:
+        day, month, year = match.groups()
+        if 1 <= int(month) <= 12 and 1 <= int(day) <= 31:
+            return f"{year}-{int(month):02d}-{int(day):02d}"
+    return ""
+
+
+def extract_document(filename: str, content: bytes) -> Optional[Dict[str, Any]]:
+    """Extract text and metadata from one judgment file, returning a corpus record"""
+    text = extract_text(filename, content)
+    if not text.strip():
+        return None
+
+    ai_service = _ai_service or AIService()
+    legal_service = _legal_service or LegalService()
+    citation = CITATION.search(text)
+    return {
+        # Content-addressed ids make re-ingesting the same file idempotent
+        "docid": "local-" + hashlib.sha1(content).hexdigest()[:20],
+        "title": _guess_title(text, filename),
+        "court": _guess_court(text),
+        "date": _guess_date(text),
+        "citation": citation.group(0) if citation else "",
+        "summary": "",
+        "text": text,
+        "tags": legal_service._extract_tags(text),
+        "judges": legal_service._extract_judges(text),
+        "citations": ai_service._extract_citations(text),
+        "source": filename,
+    }
+
+
+def _extract_job(job: Tuple[str, str, Optional[bytes]]) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+    """Process pool entry point: (source key, filename, content or None to read from disk)"""
+    key, filename, content = job
+    try:
+        if content is None:
+            with open(filename, 'rb') as f:
+                content = f.read()
+        return key, extract_document(filename, content), None
+    except Exception as e:
+        return key, None, str(e)
+
+
+def _is_archive(path: str) -> bool:
+    return path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def iter_sources(path: str) -> Iterator[Tuple[str, str, Optional[bytes]]]:
+    """Yield (source key, filename, content) jobs for a directory, archive or single file.
+
+    Files on disk are read by the workers; archive members are read here.
+    """
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                if _is_archive(name):
+                    yield from iter_sources(file_path)
+                elif name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    stat = os.stat(file_path)
+                    yield f"{file_path}:{stat.st_size}:{int(stat.st_mtime)}", file_path, None
+    elif path.lower().endswith('.zip'):
+        with zipfile.ZipFile(path) as archive:
+            for member in archive.infolist():
+                if not member.is_dir() and member.filename.lower().endswith(SUPPORTED_EXTENSIONS):
+                    key = f"{path}!{member.filename}:{member.file_size}:{member.CRC}"
+                    yield key, member.filename, archive.read(member)
+    elif _is_archive(path):
+        with tarfile.open(path) as archive:
+            for member in archive:
+                if member.isfile() and member.name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    key = f"{path}!{member.name}:{member.size}:{member.mtime}"
+                    yield key, member.name, archive.extractfile(member).read()
+    elif path.lower().endswith(SUPPORTED_EXTENSIONS):
+        stat = os.stat(path)
+        yield f"{path}:{stat.st_size}:{int(stat.st_mtime)}", path, None
+
+
+def rebuild_indexes() -> int:
+    """Rebuild the citation graph, search and autocomplete indexes from every judgment in the local corpus"""
+    # The graph goes first: autocomplete ranks suggestions by its authority scores
+    citation_graph.rebuild_from(corpus_store.iter_records())
+    documents = []
+
+    def records():
+        for record in corpus_store.iter_records():
+            documents.append((record["docid"], record.get("title", ""), record.get("citation", "")))
+            yield record
+
+    metadata_index.rebuild(records())
+    autocomplete_index.rebuild(documents)
+    return len(documents)
+
+
+class IngestCheckpoint:
+    """Append-only log of source keys already committed, so runs can resume"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.done = {line.rstrip('\n') for line in f if line.strip()}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.done
+
+    def mark(self, keys: List[str]):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for key in keys:
+                f.write(key + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.done.update(keys)
+
+
+class BulkIngestor:
+    """Extract judgments across a process pool and commit them to the local store in batches"""
+
+    def __init__(self, workers: int = None, batch_size: int = None, checkpoint_path: str = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size or settings.ingest_batch_size
+        os.makedirs(settings.corpus_dir, exist_ok=True)
+        self.checkpoint = IngestCheckpoint(
+            checkpoint_path or os.path.join(settings.corpus_dir, "ingest.checkpoint")
+        )
+        self.processed = 0
+        self.ingested = 0
+        self.skipped = 0
+        self.failed = 0
+        self.bytes_in = 0
+        self._started = 0.0
+        self._last_report = 0.0
+        self._last_save = 0.0
+        self._unmarked: List[str] = []  # committed sources whose index updates are not saved yet
+
+    def commit(self, records: List[Dict[str, Any]], keys: List[str]):
+        """Write one batch to the corpus, text store and in-memory indexes"""
+        if records:
+            corpus_store.put_many(records, sync=True)
+            for record in records:
+                text_store.put(record["docid"], record["text"])
+            citation_graph.add_documents(records)
+            autocomplete_index.add_documents(records)
+            metadata_index.add_documents(records)
+        self._unmarked.extend(keys)
+        if time.time() - self._last_save >= settings.ingest_checkpoint_interval:
+            self.save()
+
+    def save(self):
+        """Save the indexes, then checkpoint the sources they now include.
+
+        Sources are only checkpointed once every index holding them is on disk,
+        so an interrupted run re-ingests anything the indexes might have lost.
+        """
+        citation_graph.save()
+        metadata_index.save()
+        # Saved after the graph so suggestions are ranked by the updated authority
+        autocomplete_index.save()
+        if self._unmarked:
+            self.checkpoint.mark(self._unmarked)
+            self._unmarked = []
+        self._last_save = time.time()
+
+    def report(self, force: bool = False):
+        now = time.time()
+        if not force and now - self._last_report < settings.ingest_report_interval:
+            return
+        self._last_report = now
+        elapsed = max(now - self._started, 1e-6)
+        print(
+            f"processed={self.processed} ingested={self.ingested} skipped={self.skipped} "
+            f"failed={self.failed} elapsed={elapsed:.1f}s "
+            f"rate={self.processed / elapsed:.1f} docs/s "
+            f"throughput={self.bytes_in / elapsed / 1e6:.2f} MB/s",
+            flush=True
+        )
+
+    def run(self, path: str):
+        """Ingest every supported file under a directory, archive or single file"""
+        self._started = self._last_save = time.time()
+        pending_records: List[Dict[str, Any]] = []
+        pending_keys: List[str] = []
+        max_in_flight = self.workers * 4
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) as pool:
+            in_flight = set()
+            sources = iter_sources(path)
+            exhausted = False
+
+            while in_flight or not exhausted:
+                # Keep the pool busy without reading the whole archive into memory
+                while not exhausted and len(in_flight) < max_in_flight:
+                    job = next(sources, None)
+                    if job is None:
+                        exhausted = True
+                        break
+                    if job[0] in self.checkpoint:
+                        self.skipped += 1
+                        continue
+                    if job[2] is not None:
+                        self.bytes_in += len(job[2])
+                    else:
+                        self.bytes_in += os.path.getsize(job[1])
+                    in_flight.add(pool.submit(_extract_job, job))
+
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key, record, error = future.result()
+                    self.processed += 1
+                    if record is not None:
+                        pending_records.append(record)
+                        self.ingested += 1
+                    else:
+                        self.failed += 1
+                        if error:
+                            # Not checkpointed, so the file is retried on the next run
+                            print(f"Error ingesting {key}: {error}")
+                            continue
+                    pending_keys.append(key)
+
+                if len(pending_keys) >= self.batch_size:
+                    self.commit(pending_records, pending_keys)
+                    pending_records, pending_keys = [], []
+                self.report()
+
+        if pending_keys:
+            self.commit(pending_records, pending_keys)
+        self.save()
+        self.report(force=True)
@@ -2,11 +2,35 @@ import httpx
 import asyncio
 from typing import List, Optional, Dict, Any
 from app.core.config import settings
-from app.schemas.legal import PrecedentSearchResponse, PrecedentDetail, CourtInfo, RecentCase
+from app.core.tracing import span
+from app.schemas.legal import (
+    PrecedentSearchResponse, PrecedentSearchResults, SearchFacets, PrecedentDetail, CourtInfo, RecentCase
+)
+from app.services.text_store import text_store
+from app.services.corpus_store import corpus_store
+from app.services.citation_graph import citation_graph
+from app.services.autocomplete import autocomplete_index
+from app.services.metadata_index import metadata_index
+from app.services.inference_backends import local_entities
+from app.services.segmenter import Sentences, keyword_pattern, segment
 import json
 import re
 from datetime import datetime
 
+# Courts are static reference data, so build them once at import time
+AVAILABLE_COURTS = (
+    CourtInfo(name="Supreme Court of India", type="Supreme Court", jurisdiction="National", location="New Delhi"),
+    CourtInfo(name="Delhi High Court", type="High Court", jurisdiction="Delhi", location="New Delhi"),
+    CourtInfo(name="Bombay High Court", type="High Court", jurisdiction="Maharashtra", location="Mumbai"),
+    CourtInfo(name="Calcutta High Court", type="High Court", jurisdiction="West Bengal", location="Kolkata"),
+    CourtInfo(name="Madras High Court", type="High Court", jurisdiction="Tamil Nadu", location="Chennai"),
+    CourtInfo(name="Karnataka High Court", type="High Court", jurisdiction="Karnataka", location="Bangalore"),
+    CourtInfo(name="Gujarat High Court", type="High Court", jurisdiction="Gujarat", location="Ahmedabad"),
+    CourtInfo(name="Punjab and Haryana High Court", type="High Court", jurisdiction="Punjab, Haryana", location="Chandigarh"),
+)
+
+HOLDING_KEYWORDS = keyword_pattern(['held', 'ruled', 'decided', 'established', 'principle'])
+
 class LegalService:
     def __init__(self):
         self.indian_kanoon_base_url = "https://api.indiankanoon.org"
@@ -15,6 +39,8 @@ class LegalService:
             "Authorization": f"Token {self.api_token}",
             "Content-Type": "application/json"
         }
+        # Set when mock data stood in for a failed upstream call
+        self.fallback_used = False
 
     async def search_precedents(
         self, 
@@ -23,8 +49,65 @@ class LegalService:
         year_from: Optional[int] = None,
         year_to: Optional[int] = None,
         limit: int = 10
-    ) -> List[PrecedentSearchResponse]:
-        """Search for legal precedents using Indian Kanoon API"""
+    ) -> PrecedentSearchResults:
+        """Search the local corpus and Indian Kanoon, with court and year facet counts"""
+        with span("local_search"):
+            # Bitmap work under the index lock; keep it off the event loop
+            local = await asyncio.to_thread(metadata_index.search, query, court, year_from, year_to, limit)
+        with span("enrich"):
+            # Corpus reads are blocking file I/O; keep them off the event loop
+            precedents = await asyncio.to_thread(self._local_precedents, query, local.hits)
+
+        remote = await self._search_remote(query, court, year_from, year_to, limit)
+        if remote is None:
+            # Fallback to mock data only when nothing is available locally either
+            remote = [] if precedents else await self._get_mock_precedents(query, limit)
+        seen = {precedent.id for precedent in precedents}
+        precedents.extend(precedent for precedent in remote if precedent.id not in seen)
+
+        with span("rank"):
+            results = self._rank_by_authority(precedents)[:limit]
+        return PrecedentSearchResults(
+            results=results,
+            total=local.total,
+            facets=SearchFacets(**local.facets)
+        )
+
+    def _local_precedents(self, query: str, hits: List[tuple]) -> List[PrecedentSearchResponse]:
+        """Build search results for local index hits from their corpus records"""
+        precedents = []
+        for docid, similarity in hits:
+            try:
+                record = corpus_store.get(docid)
+            except Exception as e:
+                print(f"Error reading local corpus: {e}")
+                continue
+            if record is None:
+                continue
+            snippet = record.get("summary") or record.get("text", "")[:500]
+            precedents.append(PrecedentSearchResponse(
+                id=docid,
+                title=record.get("title", "Unknown Case"),
+                court=record.get("court", "Unknown Court"),
+                date=record.get("date", ""),
+                citation=record.get("citation", ""),
+                summary=snippet[:200] + "...",
+                similarity=similarity,
+                tags=record.get("tags") or self._extract_tags(snippet),
+                relevance=self._generate_relevance(query, snippet),
+                how_it_helps=self._generate_how_it_helps(query, snippet)
+            ))
+        return precedents
+
+    async def _search_remote(
+        self,
+        query: str,
+        court: Optional[str],
+        year_from: Optional[int],
+        year_to: Optional[int],
+        limit: int
+    ) -> Optional[List[PrecedentSearchResponse]]:
+        """Search Indian Kanoon, returning None if the API is unavailable"""
         try:
             # Build search parameters
             search_params = {
@@ -41,16 +124,16 @@ class LegalService:
                 search_params["todate"] = f"{year_to}-12-31"
 
             async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.indian_kanoon_base_url}/search/",
-                    params=search_params,
-                    headers=self.headers,
-                    timeout=30.0
-                )
+                with span("upstream.search"):
+                    response = await client.get(
+                        f"{self.indian_kanoon_base_url}/search/",
+                        params=search_params,
+                        headers=self.headers,
+                        timeout=30.0
+                    )
                 
                 if response.status_code != 200:
-                    # Fallback to mock data if API fails
-                    return await self._get_mock_precedents(query, limit)
+                    return None
                 
                 data = response.json()
                 precedents = []
@@ -70,98 +153,142 @@ class LegalService:
                     )
                     precedents.append(precedent)
                 
-                return precedents[:limit]
+                return precedents
                 
         except Exception as e:
             print(f"Error searching precedents: {e}")
-            # Return mock data as fallback
-            return await self._get_mock_precedents(query, limit)
+            return None
 
     async def get_precedent_detail(self, precedent_id: str) -> Optional[PrecedentDetail]:
         """Get detailed information about a specific precedent"""
+        # Judgments already in the local corpus are served without an upstream call
+        try:
+            with span("corpus"):
+                record = await asyncio.to_thread(corpus_store.get, precedent_id)
+        except Exception as e:
+            print(f"Error reading local corpus: {e}")
+            record = None
+        if record is not None:
+            if record["text"] and not text_store.has(precedent_id):
+                await asyncio.to_thread(text_store.put, precedent_id, record["text"])
+            return self._detail_from_record(record)
+
         try:
             async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.indian_kanoon_base_url}/doc/{precedent_id}/",
-                    headers=self.headers,
-                    timeout=30.0
-                )
+                with span("upstream.detail"):
+                    response = await client.get(
+                        f"{self.indian_kanoon_base_url}/doc/{precedent_id}/",
+                        headers=self.headers,
+                        timeout=30.0
+                    )
                 
                 if response.status_code != 200:
+                    self.fallback_used = True
                     return await self._get_mock_precedent_detail(precedent_id)
                 
                 data = response.json()
-                
-                return PrecedentDetail(
-                    id=precedent_id,
-                    title=data.get("title", "Unknown Case"),
-                    court=data.get("court", "Unknown Court"),
-                    date=data.get("date", ""),
-                    citation=data.get("citation", ""),
-                    summary=data.get("summary", ""),
-                    key_points=self._extract_key_points(data.get("content", "")),
-                    full_text=data.get("content", ""),
-                    tags=self._extract_tags(data.get("content", "")),
-                    similarity=0.95,  # Default for detailed view
-                    relevance="This case provides important legal principles relevant to your query.",
-                    how_it_helps="You can use this precedent to support your legal arguments.",
-                    judges=self._extract_judges(data.get("content", "")),
-                    parties=self._extract_parties(data.get("content", "")),
-                    citations=self._extract_citations(data.get("content", ""))
-                )
+                record = {
+                    "docid": precedent_id,
+                    "title": data.get("title", "Unknown Case"),
+                    "court": data.get("court", "Unknown Court"),
+                    "date": data.get("date", ""),
+                    "citation": data.get("citation", ""),
+                    "summary": data.get("summary", ""),
+                    "text": data.get("content", ""),
+                }
+                await asyncio.to_thread(self._store_judgment, record)
+                return self._detail_from_record(record)
                 
         except Exception as e:
             print(f"Error fetching precedent detail: {e}")
+            self.fallback_used = True
             return await self._get_mock_precedent_detail(precedent_id)
 
+    def _store_judgment(self, record: Dict[str, Any]):
+        """Keep a fetched judgment in the local corpus and the paragraph text store"""
+        try:
+            corpus_store.put(record)
+            citation_graph.add_documents([record])
+            autocomplete_index.add_documents([record])
+            metadata_index.add_documents([record])
+            # Keep the judgment text on disk for paragraph-ranged reads
+            if record["text"]:
+                text_store.put(record["docid"], record["text"])
+        except OSError as e:
+            print(f"Error storing judgment: {e}")
+
+    def _detail_from_record(self, record: Dict[str, Any]) -> PrecedentDetail:
+        """Build a precedent detail from a corpus record"""
+        text = record.get("text", "")
+        return PrecedentDetail(
+            id=record["docid"],
+            title=record.get("title", "Unknown Case"),
+            court=record.get("court", "Unknown Court"),
+            date=record.get("date", ""),
+            citation=record.get("citation", ""),
+            summary=record.get("summary", ""),
+            key_points=self._extract_key_points(text),
+            full_text=text,
+            tags=self._extract_tags(text),
+            similarity=0.95,  # Default for detailed view
+            relevance="This case provides important legal principles relevant to your query.",
+            how_it_helps="You can use this precedent to support your legal arguments.",
+            judges=self._extract_judges(text),
+            parties=self._extract_parties(text),
+            citations=self._extract_citations(text)
+        )
+
     async def get_available_courts(self) -> List[CourtInfo]:
         """Get list of available courts"""
-        courts = [
-            CourtInfo(name="Supreme Court of India", type="Supreme Court", jurisdiction="National", location="New Delhi"),
-            CourtInfo(name="Delhi High Court", type="High Court", jurisdiction="Delhi", location="New Delhi"),
-            CourtInfo(name="Bombay High Court", type="High Court", jurisdiction="Maharashtra", location="Mumbai"),
-            CourtInfo(name="Calcutta High Court", type="High Court", jurisdiction="West Bengal", location="Kolkata"),
-            CourtInfo(name="Madras High Court", type="High Court", jurisdiction="Tamil Nadu", location="Chennai"),
-            CourtInfo(name="Karnataka High Court", type="High Court", jurisdiction="Karnataka", location="Bangalore"),
-            CourtInfo(name="Gujarat High Court", type="High Court", jurisdiction="Gujarat", location="Ahmedabad"),
-            CourtInfo(name="Punjab and Haryana High Court", type="High Court", jurisdiction="Punjab, Haryana", location="Chandigarh"),
-        ]
-        return courts
+        return list(AVAILABLE_COURTS)
 
     async def get_recent_cases(self, limit: int = 10) -> List[RecentCase]:
         """Get recent legal cases"""
         try:
-            async with httpx.AsyncClient() as client:
+            return await self.fetch_recent_cases(limit)
+        except Exception as e:
+            print(f"Error fetching recent cases: {e}")
+            return await self._get_mock_recent_cases(limit)
+
+    async def fetch_recent_cases(self, limit: int = 10) -> List[RecentCase]:
+        """Fetch recent cases from Indian Kanoon, raising instead of falling back to mock data"""
+        async with httpx.AsyncClient() as client:
+            with span("upstream.recent"):
                 response = await client.get(
                     f"{self.indian_kanoon_base_url}/recent/",
                     params={"limit": limit},
                     headers=self.headers,
                     timeout=30.0
                 )
-                
-                if response.status_code != 200:
-                    return await self._get_mock_recent_cases(limit)
-                
-                data = response.json()
-                cases = []
-                
-                for case in data.get("cases", []):
-                    recent_case = RecentCase(
-                        id=case.get("docid", ""),
-                        title=case.get("title", "Unknown Case"),
-                        court=case.get("court", "Unknown Court"),
-                        date=case.get("date", ""),
-                        citation=case.get("citation", ""),
-                        summary=case.get("summary", "")[:150] + "...",
-                        tags=self._extract_tags(case.get("summary", ""))
-                    )
-                    cases.append(recent_case)
-                
-                return cases[:limit]
-                
-        except Exception as e:
-            print(f"Error fetching recent cases: {e}")
-            return await self._get_mock_recent_cases(limit)
+            response.raise_for_status()
+
+            data = response.json()
+            cases = []
+
+            for case in data.get("cases", []):
+                recent_case = RecentCase(
+                    id=case.get("docid", ""),
+                    title=case.get("title", "Unknown Case"),
+                    court=case.get("court", "Unknown Court"),
+                    date=case.get("date", ""),
+                    citation=case.get("citation", ""),
+                    summary=case.get("summary", "")[:150] + "...",
+                    tags=self._extract_tags(case.get("summary", ""))
+                )
+                cases.append(recent_case)
+
+            return cases[:limit]
+
+    def _rank_by_authority(self, precedents: List[PrecedentSearchResponse]) -> List[PrecedentSearchResponse]:
+        """Blend citation authority into the similarity score and re-sort"""
+        weight = settings.citation_authority_weight
+        if weight <= 0:
+            return precedents
+        for precedent in precedents:
+            # Judgments outside the graph count as uncited, so every result is on one scale
+            authority = citation_graph.authority_of(precedent.id) or 0.0
+            precedent.similarity = round((1 - weight) * precedent.similarity + weight * authority, 4)
+        return sorted(precedents, key=lambda precedent: precedent.similarity, reverse=True)
 
     def _calculate_similarity(self, query: str, text: str) -> float:
         """Calculate similarity between query and text"""
@@ -202,31 +329,22 @@ class LegalService:
         """Generate how the case helps"""
         return f"You can use this precedent to strengthen your legal arguments related to '{query}' and establish similar legal principles."
 
-    def _extract_key_points(self, text: str) -> List[str]:
+    def _extract_key_points(self, text: str, sentences: Optional[Sentences] = None) -> List[str]:
         """Extract key legal points from text"""
-        # Simple extraction - in production, use NLP
-        sentences = text.split('.')
-        key_points = []
-        
-        for sentence in sentences[:10]:  # First 10 sentences
-            if any(keyword in sentence.lower() for keyword in ['held', 'ruled', 'decided', 'established', 'principle']):
-                key_points.append(sentence.strip())
-        
-        return key_points[:5]  # Limit to 5 key points
+        sentences = sentences if sentences is not None else segment(text)
+        # First 10 sentences, limit to 5 key points
+        return [sentences[number] for number in sentences.matching(HOLDING_KEYWORDS, limit=5, within=10)]
 
     def _extract_judges(self, text: str) -> List[str]:
         """Extract judge names from text"""
-        # Simple extraction - in production, use NER
-        judge_pattern = r'(?:Hon\'ble|Honorable)\s+([A-Z][a-z]+\s+[A-Z][a-z]+)'
-        judges = re.findall(judge_pattern, text)
-        return list(set(judges))[:3]  # Limit to 3 judges
+        return local_entities.judges(text)[:3]  # Limit to 3 judges
 
     def _extract_parties(self, text: str) -> Dict[str, str]:
         """Extract party information"""
-        # Simple extraction
+        parties = local_entities.parties(text)
         return {
-            "petitioner": "Petitioner",
-            "respondent": "Respondent"
+            "petitioner": parties.get("petitioner", "Petitioner"),
+            "respondent": parties.get("respondent", "Respondent")
         }
 
     def _extract_citations(self, text: str) -> List[str]:
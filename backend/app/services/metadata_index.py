@@ -0,0 +1,417 @@
+import asyncio
+import fcntl
+import json
+import math
+import os
+import re
+import threading
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+from app.services.inference_backends import STOPWORDS
+
+TERM = re.compile(r"[a-z0-9]{2,}")
+YEAR = re.compile(r"\b(1[89]\d{2}|20\d{2})\b")
+
+# Set bits per byte value, for counting bitmap intersections
+POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def index_terms(record: Dict[str, Any]) -> List[str]:
+    """Distinct search terms of a record: title, citation, summary, tags and the head of the text"""
+    text = " ".join([
+        record.get("title", ""),
+        record.get("citation", ""),
+        record.get("summary", ""),
+        " ".join(record.get("tags", [])),
+        record.get("text", "")[:settings.metadata_index_text_chars],
+    ]).lower()
+    return sorted({term for term in TERM.findall(text) if term not in STOPWORDS})
+
+
+def record_year(record: Dict[str, Any]) -> int:
+    """Decision year from the record date, or 0 if unknown"""
+    match = YEAR.search(record.get("date", "") or "")
+    return int(match.group(1)) if match else 0
+
+
+def popcount(bits: np.ndarray) -> int:
+    return int(POPCOUNT[bits].sum(dtype=np.int64))
+
+
+class _Bitmaps:
+    """Growable packed bit arrays (one bit per document) keyed by facet value"""
+
+    def __init__(self):
+        self.bits: Dict[Any, np.ndarray] = {}
+        self.capacity = 0  # bytes per bitmap
+
+    @classmethod
+    def from_values(cls, values: np.ndarray, keys: Iterable[Any]) -> "_Bitmaps":
+        bitmaps = cls()
+        bitmaps.capacity = max(64, (len(values) + 7) // 8)
+        for key in keys:
+            packed = np.packbits(values == key)
+            bits = np.zeros(bitmaps.capacity, dtype=np.uint8)
+            bits[:len(packed)] = packed
+            bitmaps.bits[key] = bits
+        return bitmaps
+
+    def add(self, key: Any, doc: int):
+        byte = doc >> 3
+        if byte >= self.capacity:
+            self.capacity = max(64, self.capacity * 2, byte + 1)
+            for name, bits in self.bits.items():
+                grown = np.zeros(self.capacity, dtype=np.uint8)
+                grown[:len(bits)] = bits
+                self.bits[name] = grown
+        bits = self.bits.get(key)
+        if bits is None:
+            bits = self.bits[key] = np.zeros(self.capacity, dtype=np.uint8)
+        # np.packbits order: the first document is the high bit of each byte
+        bits[byte] |= 0x80 >> (doc & 7)
+
+    def get(self, key: Any, nbytes: int) -> np.ndarray:
+        bits = self.bits.get(key)
+        if bits is None:
+            return np.zeros(nbytes, dtype=np.uint8)
+        return bits[:nbytes]
+
+
+class SearchResult:
+    """Hits, match count and facet counts of one local search"""
+
+    def __init__(self, hits: List[Tuple[str, float]], total: int, facets: Dict[str, Dict[str, int]]):
+        self.hits = hits
+        self.total = total
+        self.facets = facets
+
+
+class MetadataIndex:
+    """Local search index with per-court and per-year document bitmaps.
+
+    Documents are numbered in insertion order. Each court and year has a packed
+    bit array with one bit per document, and each term a posting list. Filters
+    are resolved by intersecting bitmaps before any document is scored, and the
+    facet counts of a search are popcounts of the same bitmaps.
+
+    Like the citation graph, each process holds its own copy, saving merges
+    this process's additions into the index on disk, and running servers
+    reload indexes saved by other processes such as the ingest CLI.
+    """
+
+    def __init__(self, base_dir: str = None):
+        self.base_dir = base_dir or settings.metadata_index_dir
+        self._lock = threading.RLock()
+        self._task: Optional[asyncio.Task] = None
+        self._reset()
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._lock = threading.RLock()
+        self._task = None
+
+    def _reset(self):
+        self._loaded = False
+        self._disk_stamp = None
+        self._unsaved: List[Dict[str, Any]] = []
+        self.docids: List[str] = []
+        self.node_of: Dict[str, int] = {}
+        self.courts: List[str] = []
+        self.court_code: Dict[str, int] = {}
+        self.doc_court = array("h")
+        self.doc_year = array("h")
+        self.postings: Dict[str, array] = {}
+        self.court_bits = _Bitmaps()
+        self.year_bits = _Bitmaps()
+
+    # ------------------------------------------------------------------
+    # Persistence
+
+    def _paths(self):
+        return os.path.join(self.base_dir, "index.npz"), os.path.join(self.base_dir, "meta.json")
+
+    def _stamp(self):
+        stat = os.stat(self._paths()[1])
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _read(self) -> Optional[Dict[str, Any]]:
+        """Index state saved on disk, or None if nothing has been saved"""
+        arrays_path, meta_path = self._paths()
+        if not (os.path.exists(arrays_path) and os.path.exists(meta_path)):
+            return None
+        stamp = self._stamp()
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        with np.load(arrays_path) as arrays:
+            doc_court = arrays["doc_court"].astype(np.int16)
+            doc_year = arrays["doc_year"].astype(np.int16)
+            indptr = arrays["term_indptr"]
+            docs = arrays["term_docs"].astype(np.int32)
+        return {
+            "_disk_stamp": stamp,
+            "docids": meta["docids"],
+            "node_of": {docid: doc for doc, docid in enumerate(meta["docids"])},
+            "courts": meta["courts"],
+            "court_code": {court: code for code, court in enumerate(meta["courts"])},
+            "doc_court": array("h", doc_court.tobytes()),
+            "doc_year": array("h", doc_year.tobytes()),
+            "postings": {
+                term: array("i", docs[indptr[number]:indptr[number + 1]].tobytes())
+                for number, term in enumerate(meta["terms"])
+            },
+            "court_bits": _Bitmaps.from_values(doc_court, range(len(meta["courts"]))),
+            "year_bits": _Bitmaps.from_values(doc_year, np.unique(doc_year).tolist()),
+        }
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            state = self._read()
+            if state is not None:
+                self.__dict__.update(state)
+            self._loaded = True
+
+    def refresh(self) -> bool:
+        """Reload the index if another process (e.g. the ingest CLI) saved a newer one"""
+        self._ensure_loaded()
+        try:
+            if self._stamp() == self._disk_stamp:
+                return False
+        except FileNotFoundError:
+            return False
+        # Parse the new files without holding the lock, then swap them in
+        state = self._read()
+        if state is None:
+            return False
+        with self._lock:
+            unsaved = self._unsaved
+            self._reset()
+            self.__dict__.update(state)
+            self._loaded = True
+            # Documents added here but not yet saved stay searchable
+            self._add(unsaved)
+        return True
+
+    async def start(self):
+        """Load the index and watch for newer ones written by other processes"""
+        if self._task is not None:
+            return
+        await asyncio.to_thread(self._ensure_loaded)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.metadata_index_refresh_interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                print(f"Error refreshing metadata index: {e}")
+
+    @property
+    def dirty(self) -> bool:
+        """Whether this process added judgments that are not on disk yet"""
+        return bool(self._unsaved)
+
+    def save(self):
+        """Merge this process's additions with the index on disk and write it atomically"""
+        self._ensure_loaded()
+        os.makedirs(self.base_dir, exist_ok=True)
+        with self._lock, open(os.path.join(self.base_dir, "write.lock"), "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            arrays_path, meta_path = self._paths()
+            if os.path.exists(meta_path) and self._stamp() != self._disk_stamp:
+                # Another process saved since we loaded; replay our additions on top
+                unsaved = self._unsaved
+                self._reset()
+                self._ensure_loaded()
+                self._add(unsaved)
+            if not self._unsaved and self._disk_stamp is not None:
+                return
+            self._write()
+
+    def rebuild(self, records: Iterable[Dict[str, Any]]):
+        """Replace the index with one built from corpus records"""
+        os.makedirs(self.base_dir, exist_ok=True)
+        with self._lock, open(os.path.join(self.base_dir, "write.lock"), "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            self._reset()
+            self._loaded = True
+            for record in records:
+                self._add([self._entry(record)])
+            self._write()
+
+    def _write(self):
+        with self._lock:
+            arrays_path, meta_path = self._paths()
+            terms = sorted(self.postings)
+            lengths = [len(self.postings[term]) for term in terms]
+            indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=indptr[1:])
+            docs = np.zeros(int(indptr[-1]), dtype=np.int32)
+            for number, term in enumerate(terms):
+                docs[indptr[number]:indptr[number + 1]] = np.frombuffer(self.postings[term], dtype=np.int32)
+
+            with open(arrays_path + ".tmp", "wb") as f:
+                np.savez(
+                    f,
+                    doc_court=np.frombuffer(self.doc_court, dtype=np.int16),
+                    doc_year=np.frombuffer(self.doc_year, dtype=np.int16),
+                    term_indptr=indptr,
+                    term_docs=docs,
+                )
+            with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"docids": self.docids, "courts": self.courts, "terms": terms}, f, ensure_ascii=False)
+            os.replace(arrays_path + ".tmp", arrays_path)
+            os.replace(meta_path + ".tmp", meta_path)
+            self._disk_stamp = self._stamp()
+            self._unsaved = []
+
+    # ------------------------------------------------------------------
+    # Updates
+
+    def add_documents(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Index corpus records by court, year and terms; returns new documents"""
+        self._ensure_loaded()
+        return self._add([self._entry(record) for record in records])
+
+    @staticmethod
+    def _entry(record: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "docid": record["docid"],
+            "court": record.get("court", "") or "Unknown Court",
+            "year": record_year(record),
+            "terms": index_terms(record),
+        }
+
+    def _add(self, entries: List[Dict[str, Any]]) -> int:
+        added = 0
+        with self._lock:
+            for entry in entries:
+                docid = entry["docid"]
+                if docid in self.node_of:
+                    continue
+                self._unsaved.append(entry)
+                doc = len(self.docids)
+                self.docids.append(docid)
+                self.node_of[docid] = doc
+
+                court = self.court_code.get(entry["court"])
+                if court is None:
+                    court = self.court_code[entry["court"]] = len(self.courts)
+                    self.courts.append(entry["court"])
+                self.doc_court.append(court)
+                self.doc_year.append(entry["year"])
+                self.court_bits.add(court, doc)
+                self.year_bits.add(entry["year"], doc)
+                for term in entry["terms"]:
+                    posting = self.postings.get(term)
+                    if posting is None:
+                        posting = self.postings[term] = array("i")
+                    posting.append(doc)
+                added += 1
+        return added
+
+    # ------------------------------------------------------------------
+    # Queries
+
+    def _court_filter(self, court: Optional[str], nbytes: int) -> Optional[np.ndarray]:
+        if not court:
+            return None
+        wanted = court.strip().lower()
+        bits = np.zeros(nbytes, dtype=np.uint8)
+        for code, name in enumerate(self.courts):
+            if name.lower() == wanted:
+                bits |= self.court_bits.get(code, nbytes)
+        return bits
+
+    def _year_filter(self, year_from: Optional[int], year_to: Optional[int], nbytes: int) -> Optional[np.ndarray]:
+        if not year_from and not year_to:
+            return None
+        low, high = year_from or 1, year_to or 9999
+        bits = np.zeros(nbytes, dtype=np.uint8)
+        for year in self.year_bits.bits:
+            if year and low <= year <= high:
+                bits |= self.year_bits.get(year, nbytes)
+        return bits
+
+    def search(self, query: str, court: Optional[str] = None, year_from: Optional[int] = None,
+               year_to: Optional[int] = None, limit: int = 10) -> SearchResult:
+        """Score documents matching the query within the filters, with facet counts"""
+        self._ensure_loaded()
+        with self._lock:
+            n = len(self.docids)
+            terms = [
+                term for term in dict.fromkeys(TERM.findall(query.lower()))
+                if term not in STOPWORDS and term in self.postings
+            ]
+            if not n or not terms:
+                return SearchResult([], 0, {"court": {}, "year": {}})
+
+            nbytes = (n + 7) // 8
+            postings = [np.frombuffer(self.postings[term], dtype=np.int32) for term in terms]
+            court_bits = self._court_filter(court, nbytes)
+            year_bits = self._year_filter(year_from, year_to, nbytes)
+
+            # Documents matching any query term, as a bitmap
+            docs = np.concatenate(postings)
+            matched = np.zeros(nbytes * 8, dtype=bool)
+            matched[docs] = True
+            match_bits = np.packbits(matched)
+
+            # Each facet is counted with the other facet's filter applied, so
+            # users see how many results choosing another court or year gives
+            by_year = match_bits if year_bits is None else match_bits & year_bits
+            by_court = match_bits if court_bits is None else match_bits & court_bits
+            facets = {"court": {}, "year": {}}
+            for code, name in enumerate(self.courts):
+                count = popcount(by_year & self.court_bits.get(code, nbytes))
+                if count:
+                    facets["court"][name] = facets["court"].get(name, 0) + count
+            for year in sorted(self.year_bits.bits):
+                count = popcount(by_court & self.year_bits.get(year, nbytes)) if year else 0
+                if count:
+                    facets["year"][str(year)] = count
+
+            filtered = by_year if court_bits is None else by_year & court_bits
+            total = popcount(filtered)
+            if not total:
+                return SearchResult([], 0, facets)
+
+            # Score only documents that passed the filters
+            weights = [math.log(1 + n / len(posting)) for posting in postings]
+            term_weights = np.repeat(np.array(weights, dtype=np.float64), [len(posting) for posting in postings])
+            if court_bits is not None or year_bits is not None:
+                allowed = np.unpackbits(filtered).view(bool)[docs]
+                docs, term_weights = docs[allowed], term_weights[allowed]
+            scores = np.bincount(docs, weights=term_weights, minlength=n)
+
+            candidates = np.flatnonzero(scores)
+            if len(candidates) > limit:
+                candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+            candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+            best = sum(weights)
+            hits = [(self.docids[doc], round(float(scores[doc]) / best, 4)) for doc in candidates.tolist()]
+            return SearchResult(hits, total, facets)
+
+    def stats(self) -> Dict[str, Any]:
+        self._ensure_loaded()
+        return {"documents": len(self.docids), "courts": len(self.courts), "terms": len(self.postings)}
+
+
+# Shared instance used by the services and ingestion
+metadata_index = MetadataIndex()
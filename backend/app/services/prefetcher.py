@@ -0,0 +1,153 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Dict, Any
+from app.core.config import settings
+from app.core.http_cache import compute_etag
+from app.services.legal_service import LegalService, AVAILABLE_COURTS
+
+
+def _serialize_list(key: str, items: List[bytes]) -> bytes:
+    """Join pre-serialized JSON items into a {"key": [...]} payload"""
+    return b'{"' + key.encode() + b'":[' + b",".join(items) + b"]}"
+
+
+@dataclass(frozen=True)
+class PrefetchSnapshot:
+    """Immutable set of pre-serialized responses swapped in by the prefetcher"""
+    courts_payload: bytes
+    courts_etag: str
+    case_items: tuple  # one JSON-encoded RecentCase per entry
+    default_cases_payload: bytes
+    default_cases_etag: str
+    courts_refreshed_at: float
+    cases_refreshed_at: Optional[float]
+
+    def recent_cases_payload(self, limit: int) -> bytes:
+        """Return the {"cases": [...]} payload for a limit up to the prefetch limit"""
+        limit = max(0, limit)
+        if limit == 10:
+            return self.default_cases_payload
+        return _serialize_list("cases", list(self.case_items[:limit]))
+
+    def recent_cases_etag(self, limit: int) -> str:
+        """Return the ETag of the recent cases payload for the given limit"""
+        if max(0, limit) == 10:
+            return self.default_cases_etag
+        return compute_etag(self.recent_cases_payload(limit))
+
+
+class ReferenceDataPrefetcher:
+    """Keeps courts and recent cases in memory, refreshed in the background"""
+
+    def __init__(self):
+        self.refresh_interval = settings.recent_cases_refresh_interval
+        self.prefetch_limit = settings.recent_cases_prefetch_limit
+        self._task: Optional[asyncio.Task] = None
+        self._snapshot: Optional[PrefetchSnapshot] = None
+        self._last_error: Optional[str] = None
+        self._last_error_at: Optional[float] = None
+        self._consecutive_failures = 0
+        self._total_failures = 0
+        self._refresh_count = 0
+
+    @property
+    def snapshot(self) -> Optional[PrefetchSnapshot]:
+        """Current snapshot, or None until the first refresh has completed"""
+        return self._snapshot
+
+    async def start(self):
+        """Start the refresh loop; the first refresh runs immediately in the background"""
+        if self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Cancel the refresh loop"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.refresh_interval)
+
+    async def refresh(self):
+        """Fetch recent cases and atomically swap in a freshly serialized snapshot"""
+        legal_service = LegalService()
+        previous = self._snapshot
+        now = time.time()
+
+        try:
+            cases = await legal_service.fetch_recent_cases(limit=self.prefetch_limit)
+            case_items = tuple(case.model_dump_json().encode() for case in cases)
+            cases_refreshed_at = now
+            self._consecutive_failures = 0
+        except Exception as e:
+            print(f"Error prefetching recent cases: {e}")
+            self._last_error = str(e) or e.__class__.__name__
+            self._last_error_at = now
+            self._consecutive_failures += 1
+            self._total_failures += 1
+            if previous is not None and previous.cases_refreshed_at is not None:
+                # Keep serving the last good data rather than the mock fallback
+                case_items = previous.case_items
+                cases_refreshed_at = previous.cases_refreshed_at
+            else:
+                cases = await legal_service._get_mock_recent_cases(self.prefetch_limit)
+                case_items = tuple(case.model_dump_json().encode() for case in cases)
+                cases_refreshed_at = None
+
+        if previous is not None:
+            courts_payload = previous.courts_payload
+            courts_etag = previous.courts_etag
+            courts_refreshed_at = previous.courts_refreshed_at
+        else:
+            courts_payload = _serialize_list(
+                "courts", [court.model_dump_json().encode() for court in AVAILABLE_COURTS]
+            )
+            courts_etag = compute_etag(courts_payload)
+            courts_refreshed_at = now
+
+        default_cases_payload = _serialize_list("cases", list(case_items[:10]))
+        self._snapshot = PrefetchSnapshot(
+            courts_payload=courts_payload,
+            courts_etag=courts_etag,
+            case_items=case_items,
+            default_cases_payload=default_cases_payload,
+            default_cases_etag=compute_etag(default_cases_payload),
+            courts_refreshed_at=courts_refreshed_at,
+            cases_refreshed_at=cases_refreshed_at,
+        )
+        self._refresh_count += 1
+
+    def status(self) -> Dict[str, Any]:
+        """Report data age and refresh failures"""
+        snapshot = self._snapshot
+        now = time.time()
+
+        def age(timestamp: Optional[float]) -> Optional[float]:
+            return round(now - timestamp, 1) if timestamp is not None else None
+
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "refresh_interval": self.refresh_interval,
+            "refresh_count": self._refresh_count,
+            "courts_age_seconds": age(snapshot.courts_refreshed_at) if snapshot else None,
+            "recent_cases_age_seconds": age(snapshot.cases_refreshed_at) if snapshot else None,
+            "recent_cases_count": len(snapshot.case_items) if snapshot else 0,
+            "consecutive_failures": self._consecutive_failures,
+            "total_failures": self._total_failures,
+            "last_error": self._last_error,
+            "last_error_age_seconds": age(self._last_error_at),
+        }
+
+
+# Shared instance started from the application lifespan
+prefetcher = ReferenceDataPrefetcher()
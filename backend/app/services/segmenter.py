@@ -0,0 +1,172 @@
+import re
+from typing import Iterator, List, Optional
+import numpy as np
+
+# Candidate boundaries: terminal punctuation (with closing quotes or brackets)
+# followed by whitespace or the end of text, and blank lines
+CANDIDATE = re.compile(r"[.!?]+[\"'”’)\]]*(?=\s|$)|\n[ \t\r]*\n")
+TOKEN_BEFORE = re.compile(r"([A-Za-z0-9'’/&]+)\.?$")
+
+# Words that end with a period without ending the sentence in Indian judgments
+ABBREVIATIONS = frozenset("""
+    v vs no nos hon'ble honble hon mr mrs ms dr sr jr st smt shri sh
+    jj cj ld addl asstt govt dept ltd pvt co corp inc bros anr ors
+    art arts sec secs ss cl cls ch chap para paras pp vol vols ed eds
+    rs r/w u/s viz etc cf ibid approx misc crl cri civ
+    appl app spl slp wp crp rfa sa fa mfa cma ia
+""".split())
+
+WHITESPACE = " \t\r\n"
+
+
+def _is_boundary(text: str, start: int, end: int) -> bool:
+    """Decide whether the punctuation at text[start:end] ends a sentence"""
+    if text[start] == "\n":
+        return True
+    if text[start] in "!?":
+        return True
+
+    # Look at the next non-space character
+    position = end
+    length = len(text)
+    while position < length and text[position] in WHITESPACE:
+        position += 1
+    if position >= length:
+        return True
+    following = text[position]
+    if following.islower() or following in ",;:)":
+        return False
+
+    match = TOKEN_BEFORE.search(text, max(0, start - 24), start)
+    if match is None:
+        return True
+    token = match.group(1)
+    lowered = token.lower()
+    if lowered in ABBREVIATIONS:
+        return False
+    # Initials in names and reporters: "H.R. Khanna", "A.I.R. 1973 S.C. 1461"
+    if len(token) == 1 and token.isalpha():
+        return False
+    # Paragraph and list numbering at the start of a line: "12. The appellant ..."
+    if token.isdigit() and len(token) <= 3:
+        position = match.start() - 1
+        while position >= 0 and text[position] in " \t":
+            position -= 1
+        if position < 0 or text[position] == "\n":
+            return False
+    # Numbers followed by more digits are decimals or section numbers, not ends
+    if token.isdigit() and following.isdigit():
+        return False
+    return True
+
+
+def segment_spans(text: str) -> np.ndarray:
+    """Sentence (start, end) character offsets, trimmed of surrounding whitespace"""
+    spans: List[int] = []
+    position = 0
+    length = len(text)
+    for match in CANDIDATE.finditer(text):
+        if not _is_boundary(text, match.start(), match.end()):
+            continue
+        start, end = position, match.end()
+        position = end
+        while start < end and text[start] in WHITESPACE:
+            start += 1
+        while end > start and text[end - 1] in WHITESPACE:
+            end -= 1
+        if start < end:
+            spans.append(start)
+            spans.append(end)
+
+    start, end = position, length
+    while start < end and text[start] in WHITESPACE:
+        start += 1
+    while end > start and text[end - 1] in WHITESPACE:
+        end -= 1
+    if start < end:
+        spans.append(start)
+        spans.append(end)
+    return np.array(spans, dtype=np.int32 if length < 2 ** 31 else np.int64).reshape(-1, 2)
+
+
+class Sentences:
+    """One document's sentence segmentation, shared by every extractor.
+
+    Sentences are kept as offsets into the original text and only sliced out
+    when read. Keyword scans run once over the lowercased text and map matches
+    back to sentence numbers.
+    """
+
+    __slots__ = ("text", "spans", "_lower")
+
+    def __init__(self, text: str, spans: Optional[np.ndarray] = None):
+        self.text = text
+        self.spans = segment_spans(text) if spans is None else spans
+        self._lower: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def __getitem__(self, number: int) -> str:
+        start, end = self.spans[number]
+        return self.text[start:end]
+
+    def __iter__(self) -> Iterator[str]:
+        text = self.text
+        for start, end in self.spans.tolist():
+            yield text[start:end]
+
+    @property
+    def lower(self) -> str:
+        """Lowercased document, computed once"""
+        if self._lower is None:
+            lower = self.text.lower()
+            if len(lower) != len(self.text):
+                # A few characters lowercase to two code points; keep offsets aligned
+                lower = "".join(char.lower()[0] for char in self.text)
+            self._lower = lower
+        return self._lower
+
+    def matching(self, pattern: "re.Pattern", limit: Optional[int] = None, within: Optional[int] = None) -> List[int]:
+        """Numbers of sentences whose lowercased text matches a pattern, in order.
+
+        within restricts the scan to the first N sentences.
+        """
+        numbers = []
+        for number in self.iter_matching(pattern, within):
+            numbers.append(number)
+            if len(numbers) == limit:
+                break
+        return numbers
+
+    def iter_matching(self, pattern: "re.Pattern", within: Optional[int] = None, chunk: int = 256) -> Iterator[int]:
+        """Lazily yield the numbers of sentences matching a pattern.
+
+        Matches are found a chunk of sentences at a time and mapped to sentence
+        numbers with one vectorised search per chunk.
+        """
+        spans = self.spans if within is None else self.spans[:within]
+        lower = self.lower
+        for first in range(0, len(spans), chunk):
+            block = spans[first:first + chunk]
+            positions = [
+                match.start()
+                for match in pattern.finditer(lower, int(block[0, 0]), int(block[-1, 1]))
+            ]
+            if not positions:
+                continue
+            positions = np.array(positions)
+            numbers = np.searchsorted(block[:, 1], positions, side="right")
+            # Drop matches that start in the whitespace between sentences
+            inside = positions >= block[np.minimum(numbers, len(block) - 1), 0]
+            for number in np.unique(numbers[inside & (numbers < len(block))]).tolist():
+                yield first + number
+
+def segment(text: str) -> Sentences:
+    """Segment a document into sentences"""
+    return Sentences(text)
+
+
+def keyword_pattern(keywords) -> "re.Pattern":
+    """Compile lowercase keywords into one alternation for Sentences.matching"""
+    return re.compile("|".join(re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True)))
@@ -0,0 +1,163 @@
+import hashlib
+import mmap
+import os
+import re
+import struct
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from app.core.config import settings
+
+# Index file layout: magic, paragraph count, text length in bytes, then
+# (start, end) byte offsets per paragraph
+INDEX_MAGIC = b"NSP2"
+INDEX_HEADER = struct.Struct("<4sIQ")
+INDEX_ENTRY = struct.Struct("<QQ")
+
+BLANK_LINE = re.compile(rb"\n[ \t\r]*\n")
+NEWLINE = re.compile(rb"\n")
+
+
+def paragraph_offsets(data: bytes) -> List[Tuple[int, int]]:
+    """Compute (start, end) byte offsets of the non-empty paragraphs in a document"""
+    separator = BLANK_LINE if BLANK_LINE.search(data) else NEWLINE
+    offsets = []
+    position = 0
+    for match in separator.finditer(data):
+        offsets.append((position, match.start()))
+        position = match.end()
+    offsets.append((position, len(data)))
+
+    paragraphs = []
+    for start, end in offsets:
+        # Trim surrounding whitespace without copying the paragraph
+        while start < end and data[start] in b" \t\r\n":
+            start += 1
+        while end > start and data[end - 1] in b" \t\r\n":
+            end -= 1
+        if start < end:
+            paragraphs.append((start, end))
+    return paragraphs
+
+
+class _MappedDocument:
+    """Read-only memory maps over a document's text and paragraph index"""
+
+    def __init__(self, text_path: str, index_path: str):
+        with open(index_path, "rb") as index_file:
+            self.index = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, text_size = INDEX_HEADER.unpack_from(self.index, 0)
+        # A crash between replacing the text and its index can leave a mismatched pair
+        if magic != INDEX_MAGIC or os.path.getsize(text_path) != text_size:
+            self.index.close()
+            raise ValueError(f"Stale or corrupt paragraph index: {index_path}")
+
+        self.text = None
+        if os.path.getsize(text_path) > 0:
+            with open(text_path, "rb") as text_file:
+                self.text = mmap.mmap(text_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def paragraph(self, number: int) -> str:
+        start, end = INDEX_ENTRY.unpack_from(self.index, INDEX_HEADER.size + number * INDEX_ENTRY.size)
+        return self.text[start:end].decode("utf-8", errors="replace")
+
+    def close(self):
+        self.index.close()
+        if self.text is not None:
+            self.text.close()
+
+
+class JudgmentTextStore:
+    """On-disk judgment text with a paragraph offset index, read through mmap"""
+
+    def __init__(self, base_dir: str = None, max_open: int = None):
+        self.base_dir = base_dir or settings.judgment_text_dir
+        self.max_open = max_open or settings.judgment_text_max_open
+        self._open: "OrderedDict[str, _MappedDocument]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _paths(self, docid: str) -> Tuple[str, str]:
+        # Hash the docid so arbitrary ids map to safe, evenly spread file names
+        digest = hashlib.sha1(docid.encode("utf-8")).hexdigest()
+        directory = os.path.join(self.base_dir, digest[:2])
+        return os.path.join(directory, digest + ".txt"), os.path.join(directory, digest + ".idx")
+
+    def has(self, docid: str) -> bool:
+        """Check whether a document is stored with a valid paragraph index"""
+        return self._document(docid) is not None
+
+    def put(self, docid: str, text: str) -> int:
+        """Store a document and its paragraph index, returning the paragraph count"""
+        text_path, index_path = self._paths(docid)
+        os.makedirs(os.path.dirname(text_path), exist_ok=True)
+
+        data = text.encode("utf-8")
+        paragraphs = paragraph_offsets(data)
+        index = bytearray(INDEX_HEADER.pack(INDEX_MAGIC, len(paragraphs), len(data)))
+        for start, end in paragraphs:
+            index += INDEX_ENTRY.pack(start, end)
+
+        # Write both temporary files before publishing either, so readers never
+        # see partial data. The index goes last because its presence marks the
+        # document as stored; it records the text length, so a crash between the
+        # two renames leaves a pair that readers reject rather than misread.
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        pairs = ((text_path, data), (index_path, bytes(index)))
+        for path, payload in pairs:
+            with open(path + suffix, "wb") as f:
+                f.write(payload)
+        for path, _ in pairs:
+            os.replace(path + suffix, path)
+
+        # Drop the mapping of the replaced version; it is unmapped once no reader holds it
+        with self._lock:
+            self._open.pop(docid, None)
+        return len(paragraphs)
+
+    def _document(self, docid: str) -> Optional[_MappedDocument]:
+        with self._lock:
+            document = self._open.get(docid)
+            if document is not None:
+                self._open.move_to_end(docid)
+                return document
+
+        text_path, index_path = self._paths(docid)
+        if not os.path.exists(index_path):
+            return None
+        try:
+            document = _MappedDocument(text_path, index_path)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring stored judgment text: {e}")
+            return None
+
+        with self._lock:
+            existing = self._open.get(docid)
+            if existing is not None:
+                document.close()
+                return existing
+            self._open[docid] = document
+            # Only keep a bounded number of hot documents mapped; evicted maps are
+            # released when the last in-flight reader drops its reference
+            while len(self._open) > self.max_open:
+                self._open.popitem(last=False)
+        return document
+
+    def paragraph_count(self, docid: str) -> Optional[int]:
+        """Number of paragraphs in a stored document, or None if it is not stored"""
+        document = self._document(docid)
+        return document.count if document is not None else None
+
+    def read_range(self, docid: str, start: int, end: Optional[int] = None) -> Optional[Tuple[List[str], int]]:
+        """Read paragraphs [start, end) of a document, returning them with the total count"""
+        document = self._document(docid)
+        if document is None:
+            return None
+
+        end = document.count if end is None else min(end, document.count)
+        start = max(0, start)
+        paragraphs = [document.paragraph(number) for number in range(start, end)]
+        return paragraphs, document.count
+
+
+# Shared instance used by the services and API routes
+text_store = JudgmentTextStore()
@@ -0,0 +1,70 @@
+"""Payload size and serialization time for precedent responses.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_payloads
+"""
+import gzip
+import json
+import time
+from app.core.serialization import dumps, project, orjson
+from app.core.http_cache import brotli
+from app.core.config import settings
+from app.schemas.legal import PrecedentDetail
+
+PARAGRAPH = (
+    "The Court held that the power of Parliament to amend the Constitution under "
+    "Article 368 does not extend to altering its basic structure. "
+) * 8
+
+
+def make_precedent(paragraphs: int) -> PrecedentDetail:
+    return PrecedentDetail(
+        id="bench",
+        title="Kesavananda Bharati v. State of Kerala",
+        court="Supreme Court of India",
+        date="1973-04-24",
+        citation="AIR 1973 SC 1461",
+        summary="Landmark case establishing the basic structure doctrine.",
+        key_points=["Basic structure doctrine established"] * 5,
+        full_text="\n\n".join(PARAGRAPH for _ in range(paragraphs)),
+        tags=["Constitutional Law", "Basic Structure"],
+        similarity=0.95,
+        relevance="Highly relevant.",
+        how_it_helps="Supports arguments on limits of amendment.",
+        judges=["S. M. Sikri", "J. M. Shelat"],
+        parties={"petitioner": "Kesavananda Bharati", "respondent": "State of Kerala"},
+        citations=["AIR 1973 SC 1461"] * 10,
+    )
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    print(f"orjson: {'yes' if orjson else 'no'}, brotli: {'yes' if brotli else 'no'}")
+    print(f"{'case':<28}{'bytes':>12}{'gzip':>12}{'br':>12}{'stdlib ms':>12}{'fast ms':>12}")
+
+    for paragraphs in (10, 1000, 10000):
+        precedent = make_precedent(paragraphs)
+        repeat = max(3, 2000 // paragraphs)
+        for label, exclude in (("full", None), ("exclude=full_text", {"full_text"})):
+            body = dumps(project(precedent, exclude=exclude))
+            gzip_size = len(gzip.compress(body, compresslevel=settings.gzip_level))
+            br_size = (
+                len(brotli.compress(body, quality=settings.brotli_quality)) if brotli else "-"
+            )
+            stdlib_ms = timed(
+                lambda: json.dumps(precedent.model_dump(exclude=exclude)).encode(), repeat
+            )
+            fast_ms = timed(lambda: dumps(project(precedent, exclude=exclude)), repeat)
+            name = f"{paragraphs} paras {label}"
+            print(f"{name:<28}{len(body):>12}{gzip_size:>12}{br_size:>12}{stdlib_ms:>12.3f}{fast_ms:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# Production server configuration: gunicorn -c gunicorn_conf.py main:app
+import multiprocessing
+from app.core.config import settings
+
+bind = f"{settings.server_host}:{settings.server_port}"
+workers = settings.server_workers or multiprocessing.cpu_count()
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Workers fork from this process and inherit the setting, so the in-memory
+# admission buckets in each one get a 1/workers share of every user's budget
+settings.admission_processes = workers
+
+# Workers that stop heartbeating are killed and replaced; on SIGHUP or
+# shutdown, workers get graceful_timeout seconds to finish in-flight requests
+timeout = settings.server_worker_timeout
+graceful_timeout = settings.server_graceful_timeout
+keepalive = settings.server_keepalive
+
+# Recycle workers periodically to bound memory growth; the jitter keeps
+# them from all restarting at once
+max_requests = settings.server_max_requests
+max_requests_jitter = settings.server_max_requests_jitter
+
+# Import the app in each worker after fork, so caches, connection pools,
+# memory maps and background tasks are created per process
+preload_app = False
+
+accesslog = "-"
+errorlog = "-"
+loglevel = settings.log_level.lower()
+
+
+def on_starting(server):
+    # Create tables once in the master instead of racing from every worker;
+    # workers fork from the master and skip create_tables() in main.py
+    from app.core.database import create_tables
+    create_tables()
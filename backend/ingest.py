@@ -0,0 +1,36 @@
+"""Bulk-ingest judgment archives into the local corpus.
+
+Usage:
+    python ingest.py PATH [--workers N] [--batch-size N]
+    python ingest.py --rebuild-indexes
+
+PATH may be a directory, a .zip/.tar/.tar.gz archive or a single file.
+Already ingested files are skipped, so an interrupted run can be resumed
+by running the same command again.
+"""
+import argparse
+from app.services.ingest_service import BulkIngestor, rebuild_indexes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-ingest judgment PDF, DOCX and TXT files")
+    parser.add_argument("path", nargs="?", help="Directory, archive or file to ingest")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=None, help="Documents per committed batch")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file used to resume runs")
+    parser.add_argument("--rebuild-indexes", action="store_true",
+                        help="Rebuild the citation graph, search and autocomplete indexes from the whole corpus")
+    args = parser.parse_args()
+
+    if args.rebuild_indexes:
+        print(f"Indexed {rebuild_indexes()} judgments")
+        return
+    if args.path is None:
+        parser.error("PATH is required unless --rebuild-indexes is given")
+
+    ingestor = BulkIngestor(workers=args.workers, batch_size=args.batch_size, checkpoint_path=args.checkpoint)
+    ingestor.run(args.path)
+
+
+if __name__ == "__main__":
+    main()
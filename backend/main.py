@@ -1,18 +1,60 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import uvicorn
 from app.core.config import settings
 from app.api import auth, legal
-from app.core.database import engine, Base
+from app.core.database import create_tables
+from app.core.middleware import RequestTimeoutMiddleware, TracingMiddleware
+from app.core.profiler import profiler
+from app.services.prefetcher import prefetcher
+from app.services.citation_graph import citation_graph
+from app.services.inference import inference_dispatcher
+from app.services.answer_cache import answer_cache
+from app.services.autocomplete import autocomplete_index
+from app.services.metadata_index import metadata_index
+from app.services.batch_analysis import batch_analyzer
+from app.api.admission import admission
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Create database tables (a no-op in gunicorn workers, whose master already did)
+create_tables()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Keep reference data warm in memory for the lifetime of the app
+    await prefetcher.start()
+    await autocomplete_index.start()
+    await citation_graph.start()
+    await metadata_index.start()
+    profiler.start()
+    yield
+    profiler.stop()
+    await prefetcher.stop()
+    await autocomplete_index.stop()
+    await citation_graph.stop()
+    await metadata_index.stop()
+    await inference_dispatcher.close()
+    batch_analyzer.close()
+    # Only workers that added judgments write; the graph goes before the
+    # autocomplete index, which ranks by its authority
+    for store in (citation_graph, metadata_index, autocomplete_index):
+        if store.dirty:
+            store.save()
 
 app = FastAPI(
     title=settings.app_name,
     description="AI-powered legal assistance platform",
-    version=settings.app_version
+    version=settings.app_version,
+    lifespan=lifespan
+)
+
+# Answer 504 instead of holding a worker on a stuck request; added before
+# CORS so it runs inside it and its 504s carry CORS headers
+app.add_middleware(
+    RequestTimeoutMiddleware,
+    timeout=settings.server_request_timeout,
+    path_timeouts={"/api/legal/analyze-batch": settings.batch_analysis_timeout}
 )
 
 # CORS middleware
@@ -24,6 +66,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so the timing covers every other middleware
+app.add_middleware(TracingMiddleware, server_timing=settings.server_timing_enabled, profiler=profiler)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -37,7 +82,15 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "version": settings.app_version}
+    return {
+        "status": "healthy",
+        "version": settings.app_version,
+        "prefetch": prefetcher.status(),
+        "admission": admission.status(),
+        "inference": inference_dispatcher.status(),
+        "answer_cache": answer_cache.status()
+    }
 
 if __name__ == "__main__":
+    # Development server; use gunicorn_conf.py for production
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,13 @@
+import os
+import tempfile
+
+# Point every store at a scratch directory before the app reads its settings
+_data_dir = tempfile.mkdtemp(prefix="nyay-sarthi-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_data_dir}/test.db")
+os.environ.setdefault("CORPUS_DIR", os.path.join(_data_dir, "corpus"))
+os.environ.setdefault("CITATION_GRAPH_DIR", os.path.join(_data_dir, "citation_graph"))
+os.environ.setdefault("METADATA_INDEX_DIR", os.path.join(_data_dir, "metadata_index"))
+os.environ.setdefault("AUTOCOMPLETE_SNAPSHOT_PATH", os.path.join(_data_dir, "autocomplete", "index.npz"))
+os.environ.setdefault("JUDGMENT_TEXT_DIR", os.path.join(_data_dir, "judgments"))
+os.environ.setdefault("CHROMA_PERSIST_DIRECTORY", os.path.join(_data_dir, "vector_db"))
+os.environ.setdefault("LOG_DIR", os.path.join(_data_dir, "logs"))
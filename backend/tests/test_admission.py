@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from app.api import admission as admission_module
+from app.api.admission import InMemoryTokenBuckets, Overloaded, PriorityGate, admit
+from app.api.auth import get_current_user
+
+
+class User:
+    def __init__(self, user_id: int):
+        self.id = user_id
+
+
+def test_bucket_rejects_when_empty():
+    buckets = InMemoryTokenBuckets(capacity=3, refill_rate=1.0)
+    results = [asyncio.run(buckets.take("user", 1.0)) for _ in range(4)]
+    assert [allowed for allowed, _ in results] == [True, True, True, False]
+    assert 0 < results[-1][1] <= 1.0
+    # Other users have buckets of their own
+    assert asyncio.run(buckets.take("other", 1.0)) == (True, 0.0)
+
+
+def test_gate_sheds_when_queue_is_full():
+    async def scenario():
+        gate = PriorityGate(max_concurrency=1, max_queue=1, queue_timeout=0.05)
+        await gate.acquire(0)
+        waiter = asyncio.ensure_future(gate.acquire(0))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded):
+            await gate.acquire(0)
+        with pytest.raises(Overloaded):
+            await waiter  # timed out waiting for the slot
+        gate.release()
+        assert gate.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_dependency_answers_429_with_retry_after(monkeypatch):
+    monkeypatch.setattr(admission_module.settings, "admission_enabled", True)
+    monkeypatch.setattr(admission_module.admission, "buckets", InMemoryTokenBuckets(capacity=4, refill_rate=0.01))
+    app = FastAPI()
+
+    @app.get("/chat", dependencies=[Depends(admit("chat"))])
+    async def chat():
+        return {"ok": True}
+
+    app.dependency_overrides[get_current_user] = lambda: User(1)
+    client = TestClient(app)
+    assert [client.get("/chat").status_code for _ in range(3)] == [200, 200, 429]
+    response = client.get("/chat")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+    app.dependency_overrides[get_current_user] = lambda: User(2)
+    assert client.get("/chat").status_code == 200
+
+
+def test_memory_buckets_are_split_between_workers(monkeypatch):
+    monkeypatch.setattr(admission_module.settings, "admission_backend", "memory")
+    monkeypatch.setattr(admission_module.settings, "admission_bucket_capacity", 100.0)
+    monkeypatch.setattr(admission_module.settings, "admission_refill_rate", 1.0)
+    monkeypatch.setattr(admission_module.settings, "admission_processes", 4)
+    controller = admission_module.AdmissionController()
+    assert controller.buckets.capacity == 25.0
+    assert controller.buckets.refill_rate == 0.25
+
+    # A share never drops below the most expensive request
+    monkeypatch.setattr(admission_module.settings, "admission_processes", 50)
+    assert admission_module.AdmissionController().buckets.capacity == 20.0
@@ -0,0 +1,120 @@
+import asyncio
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.services.answer_cache import AnswerCache, same_question
+
+
+class FakeCollection:
+    """In-memory stand-in for the parts of a Chroma collection the cache uses"""
+
+    def __init__(self):
+        self.entries = {}
+
+    def count(self):
+        return len(self.entries)
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        for entry_id, embedding, metadata in zip(ids, embeddings, metadatas):
+            self.entries[entry_id] = (np.asarray(embedding), dict(metadata))
+
+    def update(self, ids, metadatas):
+        for entry_id, metadata in zip(ids, metadatas):
+            self.entries[entry_id] = (self.entries[entry_id][0], dict(metadata))
+
+    def delete(self, ids):
+        for entry_id in ids:
+            self.entries.pop(entry_id, None)
+
+    def get(self, include):
+        return {
+            "ids": list(self.entries),
+            "metadatas": [metadata for _, metadata in self.entries.values()],
+        }
+
+    def query(self, query_embeddings, n_results, where, include):
+        query = np.asarray(query_embeddings[0])
+        matches = sorted(
+            (1.0 - float(embedding @ query), entry_id, metadata)
+            for entry_id, (embedding, metadata) in self.entries.items()
+            if metadata["scope"] == where["scope"]
+        )[:n_results]
+        return {
+            "ids": [[entry_id for _, entry_id, _ in matches]],
+            "metadatas": [[metadata for _, _, metadata in matches]],
+            "distances": [[distance for distance, _, _ in matches]],
+        }
+
+
+def make_cache(**options) -> AnswerCache:
+    cache = AnswerCache(
+        persist_dir="unused",
+        threshold=settings.answer_cache_similarity,
+        ttl=3600,
+        max_entries=100,
+        dimensions=settings.answer_cache_dimensions,
+        **options
+    )
+    cache._collection = FakeCollection()
+    return cache
+
+
+def test_reworded_question_hits():
+    cache = make_cache()
+    asyncio.run(cache.store("What is the punishment for murder under section 302?", "model", "Death or life imprisonment"))
+    answer = asyncio.run(cache.lookup("Explain the punishment for murder under Section 302", "model"))
+    assert answer == "Death or life imprisonment"
+    assert cache.hits == 1
+
+
+@pytest.mark.parametrize("paraphrase", [
+    "What is the doctrine of basic structure?",
+    "Explain the doctrine of basic structure",
+    "What does the basic structure doctrine say?",
+    "basic structure doctrine - please explain",
+])
+def test_reordered_and_noun_phrase_paraphrases_hit(paraphrase):
+    cache = make_cache()
+    asyncio.run(cache.store("What is the basic structure doctrine?", "model", "Parliament cannot alter the basic structure"))
+    assert asyncio.run(cache.lookup(paraphrase, "model")) == "Parliament cannot alter the basic structure"
+
+
+def test_reordered_clauses_hit():
+    cache = make_cache()
+    asyncio.run(cache.store("Is anticipatory bail available for offences under section 498A?", "model", "answer"))
+    assert asyncio.run(cache.lookup("For offences under section 498A, is anticipatory bail available?", "model")) == "answer"
+
+
+def test_other_section_misses():
+    cache = make_cache()
+    asyncio.run(cache.store("What is the punishment for murder under section 302?", "model", "answer"))
+    assert asyncio.run(cache.lookup("What is the punishment for murder under section 304?", "model")) is None
+
+
+def test_reversed_roles_miss():
+    cache = make_cache()
+    asyncio.run(cache.store("Can the landlord evict the tenant?", "model", "answer"))
+    assert asyncio.run(cache.lookup("Can the tenant evict the landlord?", "model")) is None
+    assert cache.hits == 0
+
+
+def test_other_scope_misses():
+    cache = make_cache()
+    asyncio.run(cache.store("Can the landlord evict the tenant?", "model-a", "answer"))
+    assert asyncio.run(cache.lookup("Can the landlord evict the tenant?", "model-b")) is None
+
+
+def test_expired_answer_misses_and_is_removed():
+    cache = make_cache()
+    cache.ttl = -1
+    asyncio.run(cache.store("Can the landlord evict the tenant?", "model", "answer"))
+    assert asyncio.run(cache.lookup("Can the landlord evict the tenant?", "model")) is None
+    assert cache.expired == 1
+    assert cache._collection.count() == 0
+
+
+def test_same_question_checks_negation_and_order():
+    assert same_question(["landlord", "evict", "tenant"], ["landlord", "need", "evict", "tenant"])
+    assert same_question(["basic", "structure", "doctrine"], ["doctrine", "basic", "structure"])
+    assert not same_question(["landlord", "evict", "tenant"], ["tenant", "evict", "landlord"])
+    assert not same_question(["tenant", "evicted"], ["tenant", "not", "evicted"])
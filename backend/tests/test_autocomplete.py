@@ -0,0 +1,124 @@
+import time
+
+import pytest
+
+from app.services import autocomplete as autocomplete_module
+from app.services.autocomplete import AutocompleteIndex, document_keys, normalize_key
+
+AUTHORITY = {"doc1": 0.9, "doc2": 0.5, "doc3": 0.7, "doc4": 0.1, "doc5": 0.3}
+
+DOCUMENTS = [
+    ("doc1", "Kesavananda Bharati v. State of Kerala", "AIR 1973 SC 1461"),
+    ("doc2", "State of Madras v. Champakam Dorairajan", "AIR 1951 SC 226"),
+    ("doc3", "Maneka Gandhi v. Union of India", "AIR 1978 SC 597"),
+    ("doc4", "State of Kerala v. N. M. Thomas", "AIR 1976 SC 490"),
+    ("doc5", "Minerva Mills v. Union of India", "AIR 1980 SC 1789"),
+]
+
+
+@pytest.fixture(autouse=True)
+def authority(monkeypatch):
+    monkeypatch.setattr(autocomplete_module.citation_graph, "authority_of", AUTHORITY.get)
+
+
+def build(tmp_path, documents=DOCUMENTS) -> AutocompleteIndex:
+    index = AutocompleteIndex(str(tmp_path / "index.npz"))
+    index.rebuild(documents)
+    return index
+
+
+def ids(suggestions) -> list:
+    return [suggestion["id"] for suggestion in suggestions]
+
+
+def test_document_keys():
+    keys = dict(document_keys("Maneka Gandhi v. Union of India", "AIR 1978 SC 597"))
+    assert keys == {
+        b"maneka gandhi v union of india": autocomplete_module.TITLE,
+        b"maneka gandhi": autocomplete_module.PARTY,
+        b"union of india": autocomplete_module.PARTY,
+        b"air 1978 sc 597": autocomplete_module.CITATION,
+    }
+    assert normalize_key("  State-of  KERALA. ") == "state of kerala"
+
+
+def test_prefix_search_is_ranked_by_authority(tmp_path):
+    index = build(tmp_path)
+    # doc4 matches through its title and its first party but is suggested once
+    assert ids(index.complete("state")) == ["doc1", "doc2", "doc4"]
+    assert ids(index.complete("state of kerala")) == ["doc1", "doc4"]
+    assert ids(index.complete("union of")) == ["doc3", "doc5"]
+    assert ids(index.complete("m")) == ["doc3", "doc5"]
+    assert ids(index.complete("m", limit=1)) == ["doc3"]
+
+    suggestion = index.complete("air 1973")[0]
+    assert suggestion["id"] == "doc1"
+    assert suggestion["matched"] == "citation"
+    assert suggestion["authority"] == pytest.approx(0.9)
+    assert index.complete("zz") == []
+    assert index.complete("  ") == []
+
+
+def test_heavy_prefixes_use_precomputed_results(tmp_path, monkeypatch):
+    monkeypatch.setattr(autocomplete_module.settings, "autocomplete_scan_limit", 2)
+    index = build(tmp_path)
+
+    heavy = index._base.heavy
+    # "state of kerala" covers three keys, more than the scan limit
+    assert b"s" in heavy and b"state of kerala" in heavy
+    assert b"state of m" not in heavy
+    expected = ids(index.complete("state"))
+    assert expected == ["doc1", "doc2", "doc4"]
+    assert ids(index.complete("state of m")) == ["doc2"]
+
+    # Lookups read the precomputed list rather than ranking the range again
+    index._base.heavy[b"state"] = heavy[b"state"][:1]
+    assert ids(index.complete("state")) == ["doc1"]
+
+
+def test_added_documents_are_suggested_before_a_merge(tmp_path):
+    index = build(tmp_path)
+    index.add_documents([{"docid": "doc6", "title": "Indira Gandhi v. Raj Narain", "citation": "AIR 1975 SC 2299"}])
+
+    assert index.stats()["delta_keys"] == 4
+    assert ids(index.complete("indira")) == ["doc6"]
+    assert index.complete("raj narain")[0]["matched"] == "party"
+    assert ids(index.complete("m")) == ["doc3", "doc5"]
+
+
+def test_delta_is_merged_into_a_new_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(autocomplete_module.settings, "autocomplete_delta_max", 4)
+    index = build(tmp_path)
+    index.add_documents([{"docid": "doc6", "title": "Indira Gandhi v. Raj Narain", "citation": "AIR 1975 SC 2299"}])
+
+    deadline = time.monotonic() + 5
+    while index.stats()["delta_keys"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    stats = index.stats()
+    assert stats["delta_keys"] == 0
+    assert stats["documents"] == 6
+    # Merging only replaces the in-memory snapshot; the addition is still unsaved
+    assert stats["unsaved"] == 1
+    assert ids(index.complete("indira")) == ["doc6"]
+
+
+def test_refresh_picks_up_saved_snapshots(tmp_path):
+    reader = build(tmp_path, DOCUMENTS[:2])
+    reader.add_documents([{"docid": "doc9", "title": "Local v. Unsaved", "citation": ""}])
+    assert not reader.refresh()
+
+    writer = AutocompleteIndex(reader.path)
+    writer.add_documents([{"docid": docid, "title": title, "citation": citation} for docid, title, citation in DOCUMENTS[2:]])
+    writer.save()
+
+    assert reader.refresh()
+    assert ids(reader.complete("union of india")) == ["doc3", "doc5"]
+    assert ids(reader.complete("local")) == ["doc9"]
+    # Additions survive the refresh and still need saving
+    assert reader.dirty and not writer.dirty
+
+    reader.save()
+    assert not reader.dirty
+    loaded = AutocompleteIndex(reader.path)
+    assert loaded.stats()["documents"] == 6
+    assert ids(loaded.complete("m")) == ["doc3", "doc5"]
@@ -0,0 +1,117 @@
+import asyncio
+import io
+import zipfile
+import pytest
+from starlette.datastructures import UploadFile
+from app.services import batch_analysis
+from app.services.batch_analysis import BatchInputError, expand_uploads, read_uploads
+
+
+@pytest.fixture(autouse=True)
+def small_limits(monkeypatch):
+    monkeypatch.setattr(batch_analysis.settings, "max_file_size", 100)
+    monkeypatch.setattr(batch_analysis.settings, "batch_analysis_max_files", 5)
+    monkeypatch.setattr(batch_analysis.settings, "batch_analysis_max_bytes", 1000)
+
+
+def archive(members: dict) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, content in members.items():
+            zf.writestr(name, content)
+    return buffer.getvalue()
+
+
+def upload(filename: str, content: bytes) -> UploadFile:
+    return UploadFile(io.BytesIO(content), size=len(content), filename=filename)
+
+
+def test_files_and_zip_members_become_documents():
+    bundle = archive({
+        "bundle/a.txt": b"first",
+        "bundle/b.txt": b"second",
+        "bundle/": b"",
+        "__MACOSX/bundle/._a.txt": b"resource fork",
+        "bundle/.DS_Store": b"finder",
+        "bundle/notes.xls": b"sheet",
+    })
+    documents = expand_uploads([("single.txt", b"text"), ("case.zip", bundle), ("tool.exe", b"binary")])
+    assert documents == [
+        ("single.txt", b"text", None),
+        ("case.zip/bundle/a.txt", b"first", None),
+        ("case.zip/bundle/b.txt", b"second", None),
+        ("case.zip/bundle/notes.xls", None, "Unsupported file format"),
+        ("tool.exe", None, "Unsupported file format"),
+    ]
+
+
+def test_oversized_files_and_members_are_reported():
+    bundle = archive({"big.txt": b"x" * 101, "small.txt": b"ok"})
+    documents = expand_uploads([("large.txt", b"x" * 101), ("unread.txt", None), ("case.zip", bundle)])
+    assert [(name, error) for name, _, error in documents] == [
+        ("large.txt", "File too large"),
+        ("unread.txt", "File too large"),
+        ("case.zip/big.txt", "File too large"),
+        ("case.zip/small.txt", None),
+    ]
+
+
+def test_invalid_zip_is_reported():
+    assert expand_uploads([("broken.zip", b"not a zip")]) == [("broken.zip", None, "Invalid zip archive")]
+
+
+def test_unreadable_members_are_reported():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as zf:
+        zf.writestr("damaged.txt", b"original judgment text")
+        zf.writestr("method.txt", b"second judgment text")
+        zf.writestr("fine.txt", b"intact")
+    data = bytearray(buffer.getvalue())
+    # Corrupt the first member's data so its CRC no longer matches
+    start = data.index(b"original")
+    data[start:start + 8] = b"tampered"
+    # Mark the second member as using an unsupported compression method (99, AES)
+    local = data.index(b"PK\x03\x04", data.index(b"judgment text") + 1)
+    data[local + 8:local + 10] = (99).to_bytes(2, "little")
+    central = data.index(b"PK\x01\x02", data.index(b"PK\x01\x02") + 1)
+    data[central + 10:central + 12] = (99).to_bytes(2, "little")
+
+    documents = expand_uploads([("case.zip", bytes(data))])
+    assert documents == [
+        ("case.zip/damaged.txt", None, "Unreadable zip member"),
+        ("case.zip/method.txt", None, "Unreadable zip member"),
+        ("case.zip/fine.txt", b"intact", None),
+    ]
+
+
+def test_file_count_limit_counts_zip_members():
+    bundle = archive({f"{i}.txt": b"x" for i in range(6)})
+    with pytest.raises(BatchInputError):
+        expand_uploads([("case.zip", bundle)])
+
+
+def test_total_size_limit_uses_inflated_sizes(monkeypatch):
+    monkeypatch.setattr(batch_analysis.settings, "max_file_size", 1000)
+    # Compresses to far less than the limit, inflates past it
+    bundle = archive({"a.txt": b"x" * 600, "b.txt": b"x" * 600})
+    assert len(bundle) < 500
+    with pytest.raises(BatchInputError):
+        expand_uploads([("case.zip", bundle)])
+
+
+def test_read_uploads_skips_oversized_files():
+    uploads = asyncio.run(read_uploads([upload("a.txt", b"first"), upload("large.txt", b"x" * 101)]))
+    assert uploads == [("a.txt", b"first"), ("large.txt", None)]
+
+
+def test_read_uploads_rejects_batches_over_the_byte_limit():
+    files = [upload(f"{i}.zip", b"x" * 400) for i in range(3)]
+    with pytest.raises(BatchInputError):
+        asyncio.run(read_uploads(files))
+    # Declared sizes are checked before reading, so the last file is never read
+    assert files[2].file.tell() == 0
+
+
+def test_read_uploads_rejects_too_many_files():
+    with pytest.raises(BatchInputError):
+        asyncio.run(read_uploads([upload(f"{i}.txt", b"x") for i in range(6)]))
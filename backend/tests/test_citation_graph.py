@@ -0,0 +1,93 @@
+import numpy as np
+from app.services.citation_graph import CitationGraph, normalize_citation, pagerank
+
+
+def judgment(number: int, cites=()) -> dict:
+    return {
+        "docid": f"doc{number}",
+        "title": f"Case {number}",
+        "citation": f"AIR 1990 SC {number}",
+        "text": " ".join(f"Reliance was placed on AIR 1990 SC {cited}." for cited in cites),
+    }
+
+
+# doc1 is cited by every other judgment, doc2 by one
+CORPUS = [judgment(1), judgment(2, [1]), judgment(3, [1, 2]), judgment(4, [1])]
+
+
+def test_pagerank_favours_cited_nodes():
+    src = np.array([1, 2, 2, 3], dtype=np.int32)
+    dst = np.array([0, 0, 1, 0], dtype=np.int32)
+    rank = pagerank(src, dst, 4)
+    assert abs(rank.sum() - 1.0) < 1e-4
+    assert rank.argmax() == 0
+    assert rank[1] > rank[2]
+
+
+def test_links_and_authority(tmp_path):
+    graph = CitationGraph(str(tmp_path))
+    graph.add_documents(CORPUS)
+    graph.rebuild()
+
+    cited_by = graph.cited_by("doc1")
+    assert cited_by["count"] == 3
+    assert {result["id"] for result in cited_by["results"]} == {"doc2", "doc3", "doc4"}
+    assert [result["id"] for result in graph.cites("doc3")["results"]] == ["doc1", "doc2"]
+    assert graph.authority_of("doc1") == 1.0
+    assert graph.authority_of("doc2") > graph.authority_of("doc4")
+    assert graph.authority_of("unknown") is None
+
+
+def test_citations_resolve_when_the_cited_judgment_arrives_later(tmp_path):
+    graph = CitationGraph(str(tmp_path))
+    graph.add_documents([judgment(2, [1])])
+    assert graph.stats()["pending_citations"] == 1
+
+    graph.add_documents([judgment(1)])
+    assert graph.stats() == {"nodes": 2, "edges": 1, "pending_citations": 0}
+
+
+def test_save_and_load(tmp_path):
+    graph = CitationGraph(str(tmp_path))
+    assert not graph.dirty
+    graph.add_documents(CORPUS)
+    assert graph.dirty
+    graph.save()
+    assert not graph.dirty
+
+    loaded = CitationGraph(str(tmp_path))
+    assert not loaded.dirty
+    assert loaded.stats() == {"nodes": 4, "edges": 4, "pending_citations": 0}
+    assert loaded.authority_of("doc1") == graph.authority_of("doc1")
+    assert loaded.cited_by("doc1")["count"] == 3
+
+
+def test_saves_from_two_processes_merge(tmp_path):
+    first = CitationGraph(str(tmp_path))
+    second = CitationGraph(str(tmp_path))
+    first.add_documents(CORPUS[:2])
+    second.add_documents(CORPUS[2:])
+    first.save()
+    second.save()
+
+    assert CitationGraph(str(tmp_path)).stats()["nodes"] == 4
+
+
+def test_refresh_picks_up_graphs_saved_elsewhere(tmp_path):
+    reader = CitationGraph(str(tmp_path))
+    assert reader.stats()["nodes"] == 0
+    assert not reader.refresh()
+
+    writer = CitationGraph(str(tmp_path))
+    writer.add_documents(CORPUS)
+    writer.save()
+
+    assert reader.refresh()
+    assert reader.stats()["nodes"] == 4
+    assert reader.authority_of("doc1") == 1.0
+
+
+def test_normalize_citation():
+    assert normalize_citation("Kesavananda Bharati, AIR  1973 SC 1461") == "AIR 1973 SC 1461"
+    assert normalize_citation("(1973) 4  SCC 225") == "(1973) 4 SCC 225"
+    assert normalize_citation("unreported") is None
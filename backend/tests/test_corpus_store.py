@@ -0,0 +1,52 @@
+from app.services.corpus_store import CorpusStore
+
+
+def record(docid: str, text: str = "The appeal is dismissed.") -> dict:
+    return {"docid": docid, "title": f"Case {docid}", "court": "Supreme Court", "text": text * 20}
+
+
+def test_put_and_get(tmp_path):
+    store = CorpusStore(str(tmp_path))
+    store.put(record("1"))
+    store.put_many([record("2"), record("3")])
+
+    assert store.get("2") == record("2")
+    assert store.get("missing") is None
+    assert store.contains("3")
+    assert len(store) == 3
+
+
+def test_overwrite_keeps_latest_and_counts_dead_space(tmp_path):
+    store = CorpusStore(str(tmp_path))
+    store.put(record("1", "First version."))
+    store.put(record("1", "Second version."))
+
+    assert store.get("1") == record("1", "Second version.")
+    assert len(store) == 1
+    assert store.stats()["dead_bytes"] > 0
+    assert [item["docid"] for item in store.iter_records()] == ["1"]
+
+
+def test_reopened_store_reads_records(tmp_path):
+    CorpusStore(str(tmp_path)).put_many([record(str(i)) for i in range(50)])
+
+    store = CorpusStore(str(tmp_path))
+    assert len(store) == 50
+    assert store.get("42") == record("42")
+
+
+def test_compaction_drops_dead_records(tmp_path):
+    store = CorpusStore(str(tmp_path))
+    for version in range(3):
+        store.put_many([record(str(i), f"Version {version}.") for i in range(20)])
+    before = store.stats()
+
+    store.compact()
+
+    after = store.stats()
+    assert after["dead_bytes"] == 0
+    assert after["total_bytes"] < before["total_bytes"]
+    assert len(store) == 20
+    assert store.get("7") == record("7", "Version 2.")
+    # Another process opening the store sees the compacted index
+    assert CorpusStore(str(tmp_path)).get("7") == record("7", "Version 2.")
@@ -0,0 +1,150 @@
+import gzip
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+from main import app
+from app.api.auth import get_current_user
+from app.core import http_cache
+from app.core.http_cache import cached_response, encoded_response, negotiate_encoding
+from app.services.corpus_store import corpus_store
+from app.services.legal_service import LegalService
+from app.services.text_store import text_store
+
+JUDGMENT = {
+    "docid": "cache-test-1",
+    "title": "State of Kerala v. N.M. Thomas",
+    "court": "Supreme Court",
+    "date": "1975-09-19",
+    "citation": "AIR 1976 SC 490",
+    "summary": "Reservation in promotions",
+    "text": "The appeal raises a question of equality.\n\nThe appeal is allowed.",
+}
+
+
+class User:
+    id = 1
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_current_user] = lambda: User()
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def stored_judgment():
+    corpus_store.put(JUDGMENT)
+    text_store.put(JUDGMENT["docid"], JUDGMENT["text"])
+    return JUDGMENT["docid"]
+
+
+def test_authenticated_responses_are_private(client, stored_judgment):
+    for path in ("/api/legal/courts", f"/api/legal/precedent/{stored_judgment}", f"/api/legal/precedent/{stored_judgment}/text"):
+        response = client.get(path)
+        assert response.status_code == 200, path
+        cache_control = response.headers["Cache-Control"]
+        assert cache_control.startswith("private"), path
+        assert "public" not in cache_control and "s-maxage" not in cache_control, path
+        assert response.headers["ETag"], path
+
+
+def test_matching_etag_answers_304(client, stored_judgment):
+    path = f"/api/legal/precedent/{stored_judgment}"
+    response = client.get(path)
+    etag = response.headers["ETag"]
+
+    cached = client.get(path, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+    assert cached.headers["Cache-Control"] == response.headers["Cache-Control"]
+
+    assert client.get(path, headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_etag_differs_per_content_encoding(client):
+    corpus_store.put({**JUDGMENT, "docid": "cache-test-2", "text": "The appeal is allowed. " * 500})
+    path = "/api/legal/precedent/cache-test-2"
+    plain = client.get(path, headers={"Accept-Encoding": "identity"})
+    compressed = client.get(path, headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in plain.headers
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["ETag"] != plain.headers["ETag"]
+    assert plain.headers["Vary"] == compressed.headers["Vary"] == "Accept-Encoding"
+    assert client.get(path, headers={"Accept-Encoding": "gzip", "If-None-Match": plain.headers["ETag"]}).status_code == 200
+
+
+def test_mock_fallback_is_not_stored(client, monkeypatch):
+    async def unavailable_upstream(self, precedent_id):
+        self.fallback_used = True
+        return await self._get_mock_precedent_detail(precedent_id)
+
+    monkeypatch.setattr(LegalService, "get_precedent_detail", unavailable_upstream)
+    response = client.get("/api/legal/precedent/not-stored-anywhere")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "no-store"
+    assert "ETag" not in response.headers
+
+
+def request_with(accept_encoding: str) -> Request:
+    return Request({"type": "http", "headers": [(b"accept-encoding", accept_encoding.encode())]})
+
+
+def test_small_bodies_are_not_compressed(monkeypatch):
+    monkeypatch.setattr(http_cache.settings, "compression_min_size", 100)
+    assert negotiate_encoding("gzip", 99) is None
+    assert negotiate_encoding("gzip", 100) == "gzip"
+    assert negotiate_encoding(None, 5000) is None
+
+    small = encoded_response(request_with("gzip"), b"x" * 99)
+    assert "Content-Encoding" not in small.headers
+    assert small.body == b"x" * 99
+    large = encoded_response(request_with("gzip"), b"x" * 100)
+    assert large.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(large.body) == b"x" * 100
+
+
+def test_encodings_refused_with_zero_quality(monkeypatch):
+    monkeypatch.setattr(http_cache.settings, "compression_min_size", 0)
+    assert negotiate_encoding("gzip;q=0, deflate", 10) is None
+    assert negotiate_encoding("identity, GZIP;q=0.5", 10) == "gzip"
+    assert negotiate_encoding("gzip;q=oops", 10) is None
+
+
+def test_brotli_is_preferred_over_gzip(monkeypatch):
+    pytest.importorskip("brotli")
+    monkeypatch.setattr(http_cache.settings, "compression_min_size", 0)
+    assert negotiate_encoding("gzip, br", 10) == "br"
+    assert negotiate_encoding("gzip, br;q=0", 10) == "gzip"
+    response = cached_response(request_with("gzip, deflate, br"), b"x" * 2000, "private, max-age=60")
+    assert response.headers["Content-Encoding"] == "br"
+    assert response.headers["ETag"].endswith('-br"')
+
+
+def test_gzip_is_used_when_brotli_is_not_installed(monkeypatch):
+    monkeypatch.setattr(http_cache, "brotli", None)
+    monkeypatch.setattr(http_cache.settings, "compression_min_size", 0)
+    assert negotiate_encoding("br, gzip", 10) == "gzip"
+    assert negotiate_encoding("br", 10) is None
+
+
+def test_responses_vary_on_accept_encoding(monkeypatch):
+    monkeypatch.setattr(http_cache.settings, "compression_min_size", 0)
+    for accept_encoding in ("gzip", "identity"):
+        request = request_with(accept_encoding)
+        assert encoded_response(request, b"{}").headers["Vary"] == "Accept-Encoding"
+        assert cached_response(request, b"{}", "private").headers["Vary"] == "Accept-Encoding"
+    assert encoded_response(request_with("gzip"), b"{}", headers={"Vary": "Cookie"}).headers["Vary"] == "Cookie"
+
+
+def test_precedent_exclude_drops_fields(client, stored_judgment):
+    path = f"/api/legal/precedent/{stored_judgment}"
+    full = client.get(path).json()
+    trimmed = client.get(path, params={"exclude": "full_text,key_points"}).json()
+    assert "full_text" in full
+    assert set(trimmed) == set(full) - {"full_text", "key_points"}
+    assert client.get(path, params={"fields": "id,title"}).json() == {"id": full["id"], "title": full["title"]}
+    assert client.get(path, params={"exclude": "text"}).status_code == 400
@@ -0,0 +1,103 @@
+import asyncio
+import functools
+import json
+
+import httpx
+import pytest
+
+from app.services import inference as inference_module
+from app.services.inference import InferenceDispatcher, InferenceError
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Serve the inference API in-process, echoing each input upper-cased"""
+    received = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        model = request.url.path.rsplit("/", 1)[-1]
+        received.append((model, payload["inputs"]))
+        if model == "broken":
+            return httpx.Response(503)
+        if model == "short":
+            return httpx.Response(200, json=["only one"])
+        if isinstance(payload["inputs"], list):
+            return httpx.Response(200, json=[text.upper() for text in payload["inputs"]])
+        return httpx.Response(200, json=payload["inputs"].upper())
+
+    transport = httpx.MockTransport(handler)
+    monkeypatch.setattr(inference_module.httpx, "AsyncClient", functools.partial(httpx.AsyncClient, transport=transport))
+    return received
+
+
+def run(dispatcher: InferenceDispatcher, requests):
+    async def main():
+        try:
+            return await asyncio.gather(*requests(), return_exceptions=True)
+        finally:
+            await dispatcher.close()
+    return asyncio.run(main())
+
+
+def test_full_batches_are_sent_at_once(calls):
+    dispatcher = InferenceDispatcher(api_url="http://inference/models", max_batch_size=3, max_wait_ms=10_000)
+    words = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta"]
+    results = run(dispatcher, lambda: [dispatcher.infer("model", word) for word in words])
+
+    assert results == [word.upper() for word in words]
+    assert calls == [("model", words[:3]), ("model", words[3:])]
+    assert dispatcher.status()["mean_batch_size"] == 3
+
+
+def test_partial_batches_are_flushed_after_max_wait(calls):
+    dispatcher = InferenceDispatcher(api_url="http://inference/models", max_batch_size=8, max_wait_ms=20)
+
+    async def requests():
+        first = asyncio.ensure_future(dispatcher.infer("model", "alpha"))
+        second = asyncio.ensure_future(dispatcher.infer("model", "beta"))
+        await asyncio.sleep(0)
+        assert dispatcher.status()["queued"] == 2
+        return await asyncio.wait_for(asyncio.gather(first, second), timeout=5)
+
+    async def main():
+        try:
+            return await requests()
+        finally:
+            await dispatcher.close()
+
+    assert asyncio.run(main()) == ["ALPHA", "BETA"]
+    assert calls == [("model", ["alpha", "beta"])]
+
+
+def test_results_reach_their_callers(calls):
+    dispatcher = InferenceDispatcher(api_url="http://inference/models", max_batch_size=4, max_wait_ms=5)
+    requests = [("model", "alpha", None), ("other", "beta", None), ("model", "gamma", {"top_k": 1}),
+                ("model", "delta", None), ("other", "epsilon", None)]
+    results = run(dispatcher, lambda: [dispatcher.infer(model, text, parameters) for model, text, parameters in requests])
+
+    assert results == ["ALPHA", "BETA", "GAMMA", "DELTA", "EPSILON"]
+    # Batches are per model and parameters; a lone input is sent unwrapped
+    assert sorted(calls, key=str) == sorted(
+        [("model", ["alpha", "delta"]), ("other", ["beta", "epsilon"]), ("model", "gamma")], key=str
+    )
+
+
+def test_failed_batch_raises_in_every_caller(calls):
+    dispatcher = InferenceDispatcher(api_url="http://inference/models", max_batch_size=3, max_wait_ms=5)
+    results = run(dispatcher, lambda: [dispatcher.infer("broken", word) for word in ("alpha", "beta", "gamma")])
+
+    assert len(calls) == 1
+    assert all(isinstance(result, InferenceError) for result in results)
+    assert str(results[0]) == "broken returned 503"
+    status = dispatcher.status()
+    assert status["failures"] == 1
+    assert status["last_error"] == "broken returned 503"
+
+
+def test_wrong_result_count_fails_the_batch(calls):
+    dispatcher = InferenceDispatcher(api_url="http://inference/models", max_batch_size=2, max_wait_ms=5)
+    results = run(dispatcher, lambda: [dispatcher.infer("short", word) for word in ("alpha", "beta")])
+
+    assert all(isinstance(result, InferenceError) for result in results)
+    assert "unexpected batch result" in str(results[0])
@@ -0,0 +1,112 @@
+import asyncio
+
+from app.services.inference_backends import (
+    InferenceBackend, LocalBackend, LocalFirstBackend, RegexEntityExtractor, TextRankSummarizer,
+)
+from app.services.segmenter import segment
+
+JUDGMENT = """IN THE SUPREME COURT OF INDIA
+Civil Appeal No. 1234 of 1990
+
+Ram Prasad Sharma ... Appellant
+versus
+State of Rajasthan ... Respondent
+
+Hon'ble Mr. Justice Kuldip Singh and Justice S.C. Agrawal
+
+JUDGMENT
+Agrawal, J.
+The appellant challenges the acquisition of his agricultural land by the State.
+The land was acquired for a public purpose under the Land Acquisition Act.
+The appellant argues that the compensation for the acquired land was inadequate.
+The Collector assessed compensation for the land on the basis of recent sale deeds.
+The High Court upheld the compensation awarded by the Collector for the land.
+The weather during the hearing was unusually warm for the season.
+We find that the compensation for the acquired land must be enhanced.
+The appeal is allowed with costs.
+"""
+
+
+class RecordingBackend(InferenceBackend):
+    name = "recording"
+
+    def __init__(self):
+        self.calls = []
+
+    async def generate(self, prompt, parameters):
+        self.calls.append("generate")
+        return "remote answer"
+
+    async def summarize(self, text, sentences=None):
+        self.calls.append("summarize")
+        return "remote summary"
+
+    async def extract_entities(self, text):
+        self.calls.append("extract_entities")
+        return {"judges": ["Remote"], "parties": {}}
+
+
+def test_textrank_returns_the_configured_number_of_sentences():
+    summarizer = TextRankSummarizer(max_sentences=3)
+    summary = summarizer.summarize(JUDGMENT)
+    chosen = [sentence for sentence in segment(JUDGMENT) if sentence in summary]
+    assert len(chosen) == 3
+    # The sentence sharing no terms with the others is never central
+    assert "weather" not in summary
+    assert "compensation" in summary
+    assert len([s for s in segment(JUDGMENT) if s in summarizer.summarize(JUDGMENT, max_sentences=2)]) == 2
+
+
+def test_textrank_keeps_short_texts_whole():
+    text = "The appeal is dismissed for want of prosecution. No order as to costs is made here."
+    assert TextRankSummarizer(max_sentences=3).summarize(text) == text
+
+
+def test_textrank_scores_favour_central_sentences():
+    sentences = [
+        "compensation for acquired land",
+        "compensation for land was inadequate",
+        "land compensation was enhanced",
+        "unrelated weather remark",
+    ]
+    scores = TextRankSummarizer().rank(sentences)
+    assert scores.argmin() == 3
+    assert scores[:3].min() > scores[3]
+
+
+def test_regex_judges():
+    judges = RegexEntityExtractor().judges(JUDGMENT)
+    # "Agrawal, J." is the same judge as "Justice S.C. Agrawal", and the
+    # honorific form of "Justice Kuldip Singh" is not a third judge
+    assert judges == ["Kuldip Singh", "S.C. Agrawal"]
+    assert RegexEntityExtractor(max_judges=1).judges(JUDGMENT) == judges[:1]
+
+
+def test_regex_parties():
+    extractor = RegexEntityExtractor()
+    assert extractor.parties(JUDGMENT) == {"petitioner": "Ram Prasad Sharma", "respondent": "State of Rajasthan"}
+    assert extractor.parties("Maneka Gandhi vs Union Of India on 25 January, 1978\n") == {
+        "petitioner": "Maneka Gandhi", "respondent": "Union Of India"
+    }
+    assert extractor.parties("No parties are named here.") == {}
+
+
+def test_local_first_serves_local_results_locally():
+    remote = RecordingBackend()
+    backend = LocalFirstBackend(LocalBackend(TextRankSummarizer(max_sentences=2), RegexEntityExtractor()), remote)
+
+    summary = asyncio.run(backend.summarize(JUDGMENT))
+    entities = asyncio.run(backend.extract_entities(JUDGMENT))
+    assert summary != "remote summary" and "compensation" in summary
+    assert entities["parties"]["respondent"] == "State of Rajasthan"
+    assert remote.calls == []
+
+
+def test_local_first_falls_back_when_local_is_empty():
+    remote = RecordingBackend()
+    backend = LocalFirstBackend(LocalBackend(TextRankSummarizer(), RegexEntityExtractor()), remote)
+
+    # Too short to hold a summary sentence, and no local text generation
+    assert asyncio.run(backend.summarize("Dismissed.")) == "remote summary"
+    assert asyncio.run(backend.generate("What is res judicata?", {})) == "remote answer"
+    assert remote.calls == ["summarize", "generate"]
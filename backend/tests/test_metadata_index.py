@@ -0,0 +1,103 @@
+from app.services.metadata_index import MetadataIndex, record_year
+
+
+def judgment(number: int, court: str, date: str, title: str) -> dict:
+    return {
+        "docid": f"doc{number}",
+        "title": title,
+        "court": court,
+        "date": date,
+        "summary": "",
+        "text": "",
+    }
+
+
+CORPUS = [
+    judgment(1, "Supreme Court", "1973-04-24", "Basic structure of the constitution"),
+    judgment(2, "Supreme Court", "1980-07-31", "Basic structure and judicial review"),
+    judgment(3, "Delhi High Court", "1980-01-10", "Bail in economic offences"),
+    judgment(4, "Delhi High Court", "2001-05-02", "Judicial review of tenders"),
+    judgment(5, "Bombay High Court", "", "Structure of rent control"),
+]
+
+
+def build(tmp_path) -> MetadataIndex:
+    index = MetadataIndex(str(tmp_path))
+    index.add_documents(CORPUS)
+    return index
+
+
+def test_search_ranks_documents_matching_more_terms(tmp_path):
+    result = build(tmp_path).search("basic structure")
+    assert result.total == 3
+    assert {docid for docid, _ in result.hits[:2]} == {"doc1", "doc2"}
+    assert result.hits[-1][0] == "doc5"
+    assert result.hits[0][1] == 1.0
+
+
+def test_court_and_year_filters_intersect(tmp_path):
+    index = build(tmp_path)
+    assert [docid for docid, _ in index.search("judicial review", court="delhi high court").hits] == ["doc4"]
+    assert [docid for docid, _ in index.search("basic structure", year_from=1975, year_to=1990).hits] == ["doc2"]
+    result = index.search("review basic bail", court="Supreme Court", year_from=1979)
+    assert [docid for docid, _ in result.hits] == ["doc2"]
+    assert result.total == 1
+    assert index.search("bail", court="Supreme Court").hits == []
+
+
+def test_facets_count_with_the_other_filter_applied(tmp_path):
+    index = build(tmp_path)
+    facets = index.search("structure review bail").facets
+    assert facets["court"] == {"Supreme Court": 2, "Delhi High Court": 2, "Bombay High Court": 1}
+    # Documents without a date have no year facet
+    assert facets["year"] == {"1973": 1, "1980": 2, "2001": 1}
+
+    filtered = index.search("structure review bail", court="Delhi High Court", year_from=1980, year_to=1980)
+    # Court counts respect the year filter, year counts respect the court filter
+    assert filtered.facets["court"] == {"Supreme Court": 1, "Delhi High Court": 1}
+    assert filtered.facets["year"] == {"1980": 1, "2001": 1}
+    assert filtered.total == 1
+
+
+def test_bitmaps_grow_past_their_initial_capacity(tmp_path):
+    index = MetadataIndex(str(tmp_path))
+    index.add_documents([
+        judgment(number, "Supreme Court" if number % 2 else "Madras High Court", f"{1950 + number % 50}-01-01", "Contract dispute")
+        for number in range(1200)
+    ])
+    result = index.search("contract", court="Madras High Court", year_from=1950, year_to=1950)
+    assert result.total == 24  # multiples of 50 are all even
+    assert result.facets["court"]["Madras High Court"] == 24
+    assert result.facets["year"]["1950"] == 24
+
+
+def test_save_and_load(tmp_path):
+    index = build(tmp_path)
+    assert index.dirty
+    index.save()
+    assert not index.dirty
+
+    loaded = MetadataIndex(str(tmp_path))
+    assert not loaded.dirty
+    assert loaded.stats() == index.stats()
+    assert loaded.search("judicial review", court="Delhi High Court").hits == \
+        index.search("judicial review", court="Delhi High Court").hits
+    assert loaded.search("structure").facets == index.search("structure").facets
+
+
+def test_refresh_picks_up_indexes_saved_elsewhere(tmp_path):
+    reader = MetadataIndex(str(tmp_path))
+    reader.add_documents([judgment(9, "Supreme Court", "1990-01-01", "Unsaved local judgment")])
+    assert not reader.refresh()
+
+    build(tmp_path).save()
+
+    assert reader.refresh()
+    assert reader.search("bail").total == 1
+    # Documents this process added but had not saved are kept
+    assert reader.search("unsaved").total == 1
+
+
+def test_record_year():
+    assert record_year({"date": "24 April 1973"}) == 1973
+    assert record_year({"date": ""}) == 0
@@ -0,0 +1,45 @@
+from app.services.segmenter import segment
+
+
+def sentences(text: str) -> list:
+    return list(segment(text))
+
+
+def test_case_names_and_sections_do_not_split():
+    text = (
+        "In State of Kerala v. N.M. Thomas the court considered Art. 16. "
+        "The appellant was charged u/s 302 r/w Sec. 34 of the Penal Code. It was convicted."
+    )
+    assert sentences(text) == [
+        "In State of Kerala v. N.M. Thomas the court considered Art. 16.",
+        "The appellant was charged u/s 302 r/w Sec. 34 of the Penal Code.",
+        "It was convicted.",
+    ]
+
+
+def test_honorifics_and_initials_do_not_split():
+    text = "Hon'ble Mr. Justice H.R. Khanna delivered the judgment. Smt. Indira Gandhi appealed."
+    assert sentences(text) == [
+        "Hon'ble Mr. Justice H.R. Khanna delivered the judgment.",
+        "Smt. Indira Gandhi appealed.",
+    ]
+
+
+def test_reporter_citations_do_not_split():
+    text = "See A.I.R. 1973 S.C. 1461 and Crl. Appeal No. 12 of 2001. The appeal fails."
+    assert sentences(text) == [
+        "See A.I.R. 1973 S.C. 1461 and Crl. Appeal No. 12 of 2001.",
+        "The appeal fails.",
+    ]
+
+
+def test_paragraph_numbers_and_decimals():
+    text = "12. The fine of Rs. 1.5 lakh was paid.\n13. The appeal is allowed."
+    assert sentences(text) == [
+        "12. The fine of Rs. 1.5 lakh was paid.",
+        "13. The appeal is allowed.",
+    ]
+
+
+def test_blank_lines_end_sentences():
+    assert sentences("JUDGMENT\n\nThe appeal is dismissed") == ["JUDGMENT", "The appeal is dismissed"]
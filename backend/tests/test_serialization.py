@@ -0,0 +1,42 @@
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.serialization import dumps, parse_field_set, project
+from app.schemas.legal import PrecedentDetail
+
+PRECEDENT = PrecedentDetail(
+    id="doc1", title="Kesavananda Bharati v. State of Kerala", court="Supreme Court", date="1973-04-24",
+    citation="AIR 1973 SC 1461", summary="Basic structure doctrine", key_points=["Basic structure"],
+    full_text="Long judgment text", tags=["constitution"], similarity=0.9, relevance="High",
+    how_it_helps="", judges=["S.M. Sikri"], parties={"petitioner": "Kesavananda Bharati"}, citations=[],
+)
+
+
+def test_project_include_and_exclude():
+    assert project(PRECEDENT, include={"id", "title"}) == {
+        "id": "doc1", "title": "Kesavananda Bharati v. State of Kerala"
+    }
+    excluded = project(PRECEDENT, exclude={"full_text", "key_points"})
+    assert "full_text" not in excluded and "key_points" not in excluded
+    assert set(excluded) == set(PrecedentDetail.model_fields) - {"full_text", "key_points"}
+    # Exclusion wins over inclusion
+    assert project(PRECEDENT, include={"id", "full_text"}, exclude={"full_text"}) == {"id": "doc1"}
+    assert project(PRECEDENT) == PRECEDENT.model_dump()
+
+
+def test_parse_field_set():
+    assert parse_field_set(None, PrecedentDetail, "fields") is None
+    assert parse_field_set("", PrecedentDetail, "fields") is None
+    assert parse_field_set(" id, title ,,", PrecedentDetail, "fields") == {"id", "title"}
+    with pytest.raises(HTTPException) as error:
+        parse_field_set("id,text,body", PrecedentDetail, "exclude")
+    assert error.value.status_code == 400
+    assert error.value.detail == "Unknown field(s) in exclude: body, text"
+
+
+def test_dumps_is_compact_json():
+    body = dumps({"title": "Maneka Gandhi v. Union of India", "year": 1978, "tags": ["liberty"]})
+    assert b": " not in body and b", " not in body
+    assert json.loads(body) == {"title": "Maneka Gandhi v. Union of India", "year": 1978, "tags": ["liberty"]}
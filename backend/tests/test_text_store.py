@@ -0,0 +1,101 @@
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from app.api import legal as legal_module
+from app.api.auth import get_current_user
+from app.services.text_store import JudgmentTextStore, paragraph_offsets, text_store
+
+TEXT = "\n\n".join(f"Paragraph {number}." for number in range(10))
+
+
+class User:
+    id = 1
+
+
+def test_paragraph_offsets():
+    data = b"  First paragraph.\n \nSecond\nstill second.\n\n\n\nThird.  "
+    assert [data[start:end] for start, end in paragraph_offsets(data)] == [
+        b"First paragraph.", b"Second\nstill second.", b"Third."
+    ]
+    # Without blank lines every line is a paragraph
+    lines = b"One\nTwo\n"
+    assert [lines[start:end] for start, end in paragraph_offsets(lines)] == [b"One", b"Two"]
+    assert paragraph_offsets(b" \n ") == []
+
+
+def test_read_range(tmp_path):
+    store = JudgmentTextStore(str(tmp_path))
+    assert store.put("doc1", TEXT) == 10
+    assert store.paragraph_count("doc1") == 10
+
+    assert store.read_range("doc1", 2, 5) == (["Paragraph 2.", "Paragraph 3.", "Paragraph 4."], 10)
+    assert store.read_range("doc1", 8) == (["Paragraph 8.", "Paragraph 9."], 10)
+    assert store.read_range("doc1", 8, 50) == (["Paragraph 8.", "Paragraph 9."], 10)
+    assert store.read_range("doc1", 12, 15) == ([], 10)
+    assert store.read_range("missing", 0, 5) is None
+    assert not store.has("missing")
+
+
+def test_replaced_text_is_read_back(tmp_path):
+    store = JudgmentTextStore(str(tmp_path))
+    store.put("doc1", TEXT)
+    assert store.read_range("doc1", 0, 1) == (["Paragraph 0."], 10)
+    store.put("doc1", "Revised judgment.\n\nSecond paragraph. ünicode")
+    assert store.read_range("doc1", 0) == (["Revised judgment.", "Second paragraph. ünicode"], 2)
+
+
+def test_stale_index_is_ignored(tmp_path):
+    store = JudgmentTextStore(str(tmp_path))
+    store.put("doc1", TEXT)
+    text_path, _ = store._paths("doc1")
+    # A text file replaced without its index no longer matches the recorded length
+    with open(text_path, "ab") as f:
+        f.write(b"\n\nAppended after indexing.")
+    assert store.read_range("doc1", 0) is None
+
+
+def test_mappings_beyond_max_open_are_evicted(tmp_path):
+    store = JudgmentTextStore(str(tmp_path), max_open=2)
+    for docid in ("doc1", "doc2", "doc3"):
+        store.put(docid, TEXT)
+
+    held = store._document("doc1")
+    store.read_range("doc2", 0, 1)
+    assert list(store._open) == ["doc1", "doc2"]
+    # Reading doc1 again makes doc2 the least recently used
+    store.read_range("doc1", 0, 1)
+    store.read_range("doc3", 0, 1)
+    assert list(store._open) == ["doc1", "doc3"]
+    store.read_range("doc2", 0, 1)
+    assert list(store._open) == ["doc3", "doc2"]
+
+    # Evicted documents stay readable by callers that still hold them and are
+    # mapped again on the next read
+    assert held.paragraph(9) == "Paragraph 9."
+    assert store.read_range("doc1", 9) == (["Paragraph 9."], 10)
+    assert len(store._open) == 2
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_current_user] = lambda: User()
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_endpoint_clamps_ranges_to_max_paragraphs(client, monkeypatch):
+    monkeypatch.setattr(legal_module.settings, "judgment_text_max_paragraphs", 3)
+    text_store.put("text-store-test", TEXT)
+    path = "/api/legal/precedent/text-store-test/text"
+
+    body = client.get(path, params={"from": 2, "to": 9}).json()
+    assert (body["start"], body["end"], body["total_paragraphs"]) == (2, 5, 10)
+    assert body["paragraphs"] == ["Paragraph 2.", "Paragraph 3.", "Paragraph 4."]
+
+    body = client.get(path).json()
+    assert (body["start"], body["end"]) == (0, 3)
+
+    body = client.get(path, params={"from": 8, "to": 9}).json()
+    assert body["paragraphs"] == ["Paragraph 8."]
+    body = client.get(path, params={"from": 8}).json()
+    assert (body["end"], body["paragraphs"]) == (10, ["Paragraph 8.", "Paragraph 9."])
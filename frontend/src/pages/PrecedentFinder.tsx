@@ -140,7 +140,7 @@ const PrecedentFinder: React.FC = () => {
 
     try {
       // Search for precedents using the API
-      const searchResults = await legalAPI.searchPrecedents({
+      const { results: searchResults } = await legalAPI.searchPrecedents({
         query: inputMessage,
         limit: 5
       });
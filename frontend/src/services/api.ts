@@ -80,6 +80,15 @@ export const legalAPI = {
     return response.data;
   },
 
+  getPrecedentText: async (precedentId: string, from: number = 0, to?: number) => {
+    const params = new URLSearchParams({ from: String(from) });
+    if (to !== undefined) {
+      params.append('to', String(to));
+    }
+    const response = await api.get(`/api/legal/precedent/${precedentId}/text?${params}`);
+    return response.data;
+  },
+
   chatWithAI: async (message: { content: string; context?: any }) => {
     const response = await api.post('/api/legal/chat', message);
     return response.data;
@@ -98,6 +107,40 @@ export const legalAPI = {
     return response.data;
   },
 
+  // Streams one event per file as it completes, then the merged bundle
+  analyzeBatch: async (
+    files: File[],
+    onEvent: (event: any) => void,
+    analysisType: string = 'summary'
+  ) => {
+    const formData = new FormData();
+    files.forEach((file) => formData.append('files', file));
+    formData.append('analysis_type', analysisType);
+
+    const token = localStorage.getItem('authToken');
+    const response = await fetch(`${API_BASE_URL}/api/legal/analyze-batch`, {
+      method: 'POST',
+      body: formData,
+      headers: token ? { Authorization: `Bearer ${token}` } : {},
+    });
+    if (!response.ok || !response.body) {
+      throw new Error(`Batch analysis failed with status ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+    for (;;) {
+      const { done, value } = await reader.read();
+      buffered += decoder.decode(value, { stream: !done });
+      const lines = buffered.split('\n');
+      buffered = lines.pop() || '';
+      lines.filter((line) => line.trim()).forEach((line) => onEvent(JSON.parse(line)));
+      if (done) break;
+    }
+    if (buffered.trim()) onEvent(JSON.parse(buffered));
+  },
+
   getAvailableCourts: async () => {
     const response = await api.get('/api/legal/courts');
     return response.data;
@@ -107,6 +150,12 @@ export const legalAPI = {
     const response = await api.get(`/api/legal/recent-cases?limit=${limit}`);
     return response.data;
   },
+
+  autocomplete: async (query: string, limit: number = 8) => {
+    const params = new URLSearchParams({ q: query, limit: String(limit) });
+    const response = await api.get(`/api/legal/autocomplete?${params}`);
+    return response.data;
+  },
 };
 
 // Health check